@@ -1,5 +1,13 @@
 import streamlit as st
 from typing import List, Dict
+from grading import GradingEngine
+from leaderboard import board_for, get_leaderboard, mask_email
+from analytics import get_analytics
+from Intitialise import session_text
+
+def is_answer_correct(q: Dict, user_answer: str) -> bool:
+    """Instant correctness check used by the adaptive test"""
+    return GradingEngine([q]).score_answer(0, user_answer)[0]
 
 def analyze_performance():
     """Calculate test results with accurate scoring"""
@@ -7,78 +15,28 @@ def analyze_performance():
         st.warning("Complete the test first!")
         return
     
-    # Initialize counters
-    correct_mcqs = 0
-    total_mcqs = 0
-    correct_short = 0.0
-    total_short = 0
-    correct_answers = []
-    incorrect_answers = []
-
-    for q in st.session_state.questions:
-        # Get and clean the user's answer
-        user_answer = str(st.session_state.user_answers.get(q["question"], "")).strip()
-        correct_answer = str(q["answer"]).strip()
-        
-        if q["type"] == "MCQ":
-            total_mcqs += 1
-            # Compare selected option value with correct answer
-            if user_answer == correct_answer:
-                correct_mcqs += 1
-                correct_answers.append({
-                    "question": q["question"],
-                    "user_answer": user_answer,
-                    "correct_answer": correct_answer,
-                    "explanation": q.get("explanation", ""),
-                    "type": "MCQ"
-                })
-            else:
-                incorrect_answers.append({
-                    "question": q["question"],
-                    "user_answer": user_answer,
-                    "correct_answer": correct_answer,
-                    "explanation": q.get("explanation", ""),
-                    "type": "MCQ"
-                })
-                
-        else:  # Short Answer
-            total_short += 1
-            keywords = [str(kw).strip().lower() for kw in q.get("keywords", [])]
-            user_answer_lower = user_answer.lower()
-            
-            # Check if we should use keyword matching or direct comparison
-            if keywords:
-                # Keyword-based scoring
-                matched = sum(1 for kw in keywords if kw in user_answer_lower)
-                score = matched / len(keywords)
-                is_correct = score >= 0.6  # 60% match threshold
-            else:
-                # Direct answer comparison if no keywords
-                is_correct = user_answer_lower == correct_answer.lower()
-                score = 1.0 if is_correct else 0.0
-            
-            # Record answer details
-            answer_data = {
-                "question": q["question"],
-                "user_answer": user_answer,
-                "correct_answer": correct_answer,
-                "explanation": q.get("explanation", ""),
-                "score": score,
-                "matched_keywords": matched if keywords else 0,
-                "total_keywords": len(keywords) if keywords else 0,
-                "type": "Short Answer"
-            }
-            
-            if is_correct:
-                correct_short += score if keywords else 1.0
-                correct_answers.append(answer_data)
-            else:
-                incorrect_answers.append(answer_data)
-    
-    # Calculate final scores
-    total_score = correct_mcqs + correct_short
-    total_questions = len(st.session_state.questions)
-    accuracy = (total_score / total_questions) * 100 if total_questions > 0 else 0
+    # Keywords are prepared once per test and all answers graded in one pass
+    results = GradingEngine(st.session_state.questions).grade(
+        st.session_state.user_answers,
+        float(st.session_state.get('time_taken', 0))
+    )
+    # Dwell time per question position, recorded on navigation
+    time_per_question = st.session_state.get('time_per_question') or {}
+    for detail in results["correct_answers"] + results["incorrect_answers"]:
+        detail["time_spent"] = float(time_per_question.get(detail["index"], 0.0))
+    results["time_per_question"] = [
+        float(time_per_question.get(index, 0.0)) for index in range(len(st.session_state.questions))
+    ]
+    
+    if st.session_state.get('semantic_grading', False):
+        from semantic_grading import apply_semantic_grading
+        with st.spinner("Grading short answers..."):
+            apply_semantic_grading(st.session_state.questions, results)
+    correct_mcqs = results["correct_mcqs"]
+    total_mcqs = results["total_mcqs"]
+    correct_short = results["correct_short"]
+    total_short = results["total_short"]
+    total_score = results["score"]
     
     # Debug output - remove after testing
     st.write("Debug Info:")
@@ -88,26 +46,28 @@ def analyze_performance():
     st.write(f"Questions: {st.session_state.questions}")
     
     # Update session state
-    st.session_state.analysis_results = {
-        "correct_mcqs": correct_mcqs,
-        "total_mcqs": total_mcqs,
-        "correct_short": correct_short,
-        "total_short": total_short,
-        "score": total_score,
-        "total": total_questions,
-        "accuracy": accuracy,
-        "time_taken": float(st.session_state.get('time_taken', 0)),
-        "correct_answers": correct_answers,
-        "incorrect_answers": incorrect_answers
+    st.session_state.analysis_results = results
+    
+    # Update the shared leaderboard for this topic
+    user = st.session_state.get('user') or {}
+    board = board_for(session_text("custom_topic"), st.session_state.get('difficulty'))
+    leaderboard = get_leaderboard()
+    if user.get('uid'):
+        # Other users only ever see the display name, never the address
+        display_name = user.get('display_name') or mask_email(user.get('email', ''))
+        # The board holds the user's best entry, so rank that rather than this attempt,
+        # which would otherwise be counted behind the user's own row
+        entry = leaderboard.submit(board, user['uid'], display_name, total_score, results["total"], results["time_taken"])
+        size = leaderboard.size(board)
+    else:
+        # Signed-out results are ranked among the users without being stored
+        entry = {"score": float(total_score), "time_taken": results["time_taken"]}
+        size = leaderboard.size(board) + 1
+    st.session_state.leaderboard = {
+        "board": board,
+        "rank": leaderboard.rank(board, entry["score"], entry["time_taken"]),
+        "size": size
     }
-    # Update leaderboard
-    if 'leaderboard' not in st.session_state:
-        st.session_state.leaderboard = []
-    st.session_state.leaderboard.append((
-        float(st.session_state.time_taken),
-        float(total_score)
-    ))
-    st.session_state.leaderboard.sort(key=lambda x: (-x[1], x[0]))
 
 def display_analysis():
     """Display test results with enhanced visualization"""
@@ -146,14 +106,27 @@ def display_analysis():
         short_accuracy = (results['correct_short'] / results['total_short']) * 100
         st.write(f"**Short Answers:** {results['correct_short']:.1f}/{results['total_short']} ({short_accuracy:.1f}%)")
     
+    # Time per question
+    if any(results.get('time_per_question') or []):
+        st.subheader("⏱️ Time per Question")
+        timings = results['time_per_question']
+        st.bar_chart(timings)
+        slowest = max(range(len(timings)), key=timings.__getitem__)
+        question = st.session_state.questions[slowest]["question"] if slowest < len(st.session_state.questions) else ""
+        st.caption(f"Longest: Q{slowest + 1} \"{question[:80]}\" ({timings[slowest]:.0f}s)")
+    
     # Correct Answers
     if results.get('correct_answers'):
         st.subheader("✅ Correct Answers")
         for item in results['correct_answers']:
             with st.expander(f"{item['question']}"):
                 st.write(f"**Your answer:** {item['user_answer']}")
+                st.caption(f"Time spent: {item.get('time_spent', 0):.0f}s")
                 if item['type'] == "Short Answer":
-                    st.write(f"**Keywords matched:** {item.get('matched_keywords', 0)}/{item.get('total_keywords', 1)}")
+                    if item.get('graded_by') == "model":
+                        st.write(f"**Feedback:** {item.get('feedback', '')}")
+                    else:
+                        st.write(f"**Keywords matched:** {item.get('matched_keywords', 0)}/{item.get('total_keywords', 1)}")
                     st.progress(item.get('score', 0))
                 st.write(f"**Explanation:** {item.get('explanation', '')}")
     else:
@@ -165,21 +138,42 @@ def display_analysis():
         for item in results['incorrect_answers']:
             with st.expander(f"{item['question']}"):
                 st.write(f"**Your answer:** {item['user_answer']}")
+                st.caption(f"Time spent: {item.get('time_spent', 0):.0f}s")
                 st.write(f"**Correct answer:** {item['correct_answer']}")
                 if item['type'] == "Short Answer":
-                    st.write(f"**Keywords matched:** {item.get('matched_keywords', 0)}/{item.get('total_keywords', 1)}")
+                    if item.get('graded_by') == "model":
+                        st.write(f"**Feedback:** {item.get('feedback', '')}")
+                    else:
+                        st.write(f"**Keywords matched:** {item.get('matched_keywords', 0)}/{item.get('total_keywords', 1)}")
                     st.progress(item.get('score', 0))
                 st.write(f"**Explanation:** {item.get('explanation', '')}")
     else:
         st.write("No incorrect answers")
     
     # Leaderboard
-    if st.session_state.get('leaderboard'):
+    entry = st.session_state.get('leaderboard')
+    if isinstance(entry, dict) and entry.get('board'):
         st.subheader("🏆 Leaderboard")
-        for i, (time_val, score_val) in enumerate(st.session_state.leaderboard[:5], 1):
-            minutes = int(time_val // 60)
-            seconds = int(time_val % 60)
-            st.write(f"{i}. Score: {score_val:.1f} | Time: {minutes}m {seconds}s")
+        st.caption(f"Your rank: {entry['rank']} of {entry['size']}")
+        for i, row in enumerate(get_leaderboard().top(entry['board'], 5), 1):
+            minutes = int(row['time_taken'] // 60)
+            seconds = int(row['time_taken'] % 60)
+            st.write(f"{i}. {row['display_name']} | Score: {row['score']:.1f} | Time: {minutes}m {seconds}s")
+    
+    # Progress across all recorded attempts
+    user = st.session_state.get('user') or {}
+    summary = get_analytics().user_summary(str(user.get('uid', 'Anonymous')))
+    if summary and summary['attempts'] > 1:
+        st.subheader("📈 Your Progress")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Tests taken", summary['attempts'])
+        col2.metric("Overall accuracy", f"{summary['accuracy']:.1f}%", f"{summary['trend']:+.1f}% per test")
+        col3.metric("Time per question", f"{summary['time_per_question']:.0f}s")
+        st.line_chart(summary['recent_accuracy'])
+        if summary['weakest_topics']:
+            st.write("**Topics to revise:**")
+            for item in summary['weakest_topics']:
+                st.write(f"- {item['topic']} ({item['accuracy']:.1f}% over {item['attempts']} tests)")
     
     # Reset Button
     if st.button("🔄 Take New Test", type="primary"):
@@ -187,6 +181,10 @@ def display_analysis():
             "questions": [],
             "user_answers": {},
             "current_question_index": 0,
+            "adaptive_state": None,
+            "start_time": None,
+            "time_per_question": {},
+            "question_started": None,
             "test_completed": False,
             "page": "upload"
         })
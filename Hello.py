@@ -1,21 +1,21 @@
 import streamlit as st
 import json
 import os
-from model import get_output  # Assuming this calls your AI model
 import time
 from login_page import show_login_page
-from Intitialise import initialize_session  # Ensure this matches your filename
+from Intitialise import initialize_session, session_text  # Ensure this matches your filename
 from Upload import process_input
 from Mock_test import generate_mock_test, validate_questions, record_attempt, parse_questions
 from Analysis import analyze_performance, display_analysis
 from Process import process_task
 from typing import List, Dict, Union
 from datetime import datetime  #
-from utils import load_templates,save_templates,generate_prompt
+from utils import load_templates,save_templates,generate_question_paper
 
 
 from firebase_auth import is_authenticated, logout_user, save_starred_topic, unstar_topic, get_starred_topics
 from Mindmap import generate_mindmap
+from topic_hierarchy import extract_topic_hierarchy, to_topics_dict
 
 # Must be the first Streamlit command
 st.set_page_config(page_title="Edugenius", layout="centered")
@@ -61,8 +61,6 @@ def render_app_content():
         custom_topic = st.text_area("Or enter a study topic manually:")
         
         if uploaded_file:
-            st.session_state.uploaded_file = uploaded_file
-            st.session_state.file_content = uploaded_file.read().decode("utf-8", errors="ignore")
             st.success("File uploaded successfully!")
         
         if st.button("Next ➡️"):
@@ -109,30 +107,14 @@ def render_app_content():
                 content = st.session_state.get("user_input", "")
                 
                 if not content and st.session_state.get("uploaded_file"):
-                    content = st.session_state.get("file_content", "")
-                elif not content and st.session_state.get("custom_topic"):
-                    content = st.session_state.custom_topic
+                    content = session_text("file_content")
+                elif not content and st.session_state.get("custom_topic_id"):
+                    content = session_text("custom_topic")
                 
                 if content:
-                    response = process_task(
-                        "Extract Key Topics",
-                        f"Extract main topics and key points from:\n{content[:3000]}"
-                    )
-                    
-                    if response:
-                        topics = {}
-                        current_topic = None
-                        
-                        for line in response.split('\n'):
-                            line = line.strip()
-                            if line.startswith("## "):
-                                current_topic = line[3:].strip()
-                                topics[current_topic] = []
-                            elif line.startswith("- ") and current_topic:
-                                point = line[2:].strip()
-                                topics[current_topic].append(point)
-                        
-                        st.session_state.topics_dict = topics
+                    topics = extract_topic_hierarchy(content)
+                    if topics:
+                        st.session_state.topics_dict = to_topics_dict(topics)
                         st.rerun()
                 else:
                     st.warning("⚠️ No content available to analyze. Please upload a file with readable text or enter a topic.")
@@ -168,9 +150,14 @@ def render_app_content():
         
         # Generate questions if not already created
         if not st.session_state.questions:
-            if st.session_state.custom_topic:
+            if st.session_state.custom_topic_id:
                 with st.spinner("Generating questions..."):
-                    st.session_state.questions = generate_mock_test(st.session_state.custom_topic)
+                    st.session_state.questions = generate_mock_test(
+                        session_text("custom_topic"),
+                        st.session_state.difficulty,
+                        st.session_state.num_mcq,
+                        st.session_state.num_short_answer
+                    )
                     st.rerun()
             else:
                 st.warning("Please enter a topic first")
@@ -298,12 +285,11 @@ def render_app_content():
             difficulty = st.selectbox("Difficulty Level", ["Easy", "Medium", "Hard"])
             
             if st.button("🚀 Generate Question Paper"):
-                if not st.session_state.uploaded_file and not st.session_state.custom_topic:
+                if not st.session_state.uploaded_file and not st.session_state.custom_topic_id:
                     st.warning("Please upload content or enter a topic first!")
                 else:
                     with st.spinner("Generating your custom question paper..."):
-                        prompt = generate_prompt(num_mcq, num_3_marks, num_5_marks, difficulty, topics_list)
-                        st.session_state.response = get_output(prompt)
+                        st.session_state.response = generate_question_paper(num_mcq, num_3_marks, num_5_marks, difficulty, topics_list)
                         st.text_area("📄 Generated Question Paper:", st.session_state.response, height=400)
         # if st.button("Back to Options"):
         #     st.session_state.page = "options"
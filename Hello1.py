@@ -1,21 +1,17 @@
 import streamlit as st
 import json
-import os
-from model import get_output  # Assuming this calls your AI model
 import time
 from login_page import show_login_page
-from Intitialise import initialize_session  # Ensure this matches your filename
-from Upload import process_input
-from Mock_test import generate_mock_test, validate_questions, record_attempt, parse_questions
-from Analysis import analyze_performance, display_analysis
-from Process import process_task
+from Intitialise import initialize_session, session_text, session_footprint  # Ensure this matches your filename
 from typing import List, Dict, Union
 from datetime import datetime
 import re
-import numpy as np
-import networkx as nx
-import plotly.graph_objects as go
-from firebase_auth import is_authenticated, logout_user, save_starred_topic, unstar_topic, get_starred_topics
+from firebase_auth import is_authenticated, logout_user, save_starred_topic, unstar_topic, get_starred_topics, invalidate_starred_topics, flush_starred_topics, get_starred_topics_page, save_user_artifact
+from storage import get_storage
+
+# Page modules pull in numpy, networkx, plotly, groq and the PDF loader, so each page
+# imports its own dependencies when it is first shown (see bench_startup.py); the
+# login page loads none of them.
 
 # Must be the first Streamlit command
 st.set_page_config(page_title="Edugenius", layout="centered")
@@ -45,7 +41,7 @@ def save_templates(templates):
         json.dump(templates, f)
 
 def generate_prompt(num_mcq, num_3_marks, num_5_marks, difficulty_level, topics=None):
-    prompt = f"Generate a comprehensive question paper with: "
+    prompt = "Generate a comprehensive question paper with: "
     if num_mcq > 0:
         prompt += f'{num_mcq} MCQs with 1 mark each, '
     if num_3_marks > 0:
@@ -55,9 +51,9 @@ def generate_prompt(num_mcq, num_3_marks, num_5_marks, difficulty_level, topics=
     prompt += f'Difficulty level: {difficulty_level}. '
     
     if st.session_state.uploaded_file:
-        prompt += f"\n\nBase the questions on this content:\n{st.session_state.file_content[:3000]}"
-    elif st.session_state.custom_topic:
-        prompt += f"\n\nBase the questions on this topic: {st.session_state.custom_topic}"
+        prompt += f"\n\nBase the questions on this content:\n{session_text('file_content')[:3000]}"
+    elif st.session_state.custom_topic_id:
+        prompt += f"\n\nBase the questions on this topic: {session_text('custom_topic')}"
     
     if topics:
         prompt += f'\nFocus specifically on these aspects: {", ".join(topics)}'
@@ -65,266 +61,6 @@ def generate_prompt(num_mcq, num_3_marks, num_5_marks, difficulty_level, topics=
     prompt += "\n\nFormat the output with clear question numbering and mark allocations."
     return prompt
 
-def generate_mindmap():
-    """Generate and display a static mind map using Plotly with important topics and subheadings from user content"""
-    st.title("🧠 Knowledge Mind Map")
-    
-    # Check if user input exists
-    if not st.session_state.get("file_content") and not st.session_state.get("custom_topic"):
-        st.warning("No input provided. Please:")
-        st.markdown("""
-        1. Go to **Home**
-        2. Upload a file or enter a topic
-        3. Return here
-        """)
-        if st.button("⏩ Go to Home Page Now"):
-            st.session_state.page = "upload"
-            st.rerun()
-        return
-    
-    # Get user input
-    user_input = st.session_state.get("file_content", "") or st.session_state.get("custom_topic", "")
-    if isinstance(user_input, bytes):
-        user_input = user_input.decode("utf-8", errors="ignore")
-    
-    if not user_input or user_input.strip() == "":
-        st.error("No valid input provided. Please upload a file or enter a topic.")
-        return
-    
-    # Customization options
-    with st.expander("⚙️ Mind Map Settings", expanded=True):
-        col1, col2 = st.columns(2)
-        with col1:
-            layout_style = st.selectbox(
-                "Layout Style",
-                ["Radial", "Tree"],
-                index=0
-            )
-            node_size = st.slider("Node Size", 10, 50, st.session_state.flowchart_settings.get("node_size", 30))
-        with col2:
-            central_color = st.color_picker("Central Topic Color", st.session_state.flowchart_settings.get("main_topic_color", "#FF5722"))
-            subtopic_color = st.color_picker("Subtopic Color", st.session_state.flowchart_settings.get("subtopic_color", "#4CAF50"))
-            starred_color = st.color_picker("Starred Topic Color", st.session_state.flowchart_settings.get("starred_color", "#FF9800"))
-    
-    st.session_state.flowchart_settings.update({
-        "layout": layout_style,
-        "node_size": node_size,
-        "main_topic_color": central_color,
-        "subtopic_color": subtopic_color,
-        "starred_color": starred_color
-    })
-    
-    # Craft prompt
-    prompt = f"""
-    Based on the following content, identify the important topics and their subheadings, and generate a mind map structure representing their relationships.
-    - Mark main topics with 'level': 0 (central nodes).
-    - Mark subheadings under each main topic with 'level': 1 (branches).
-    - Include 'id' as a unique string (e.g., topic_name_subheading_name) and 'label' as the readable name.
-    - Provide 'edges' to show relationships (e.g., from main topic to subheading).
-    - Ensure the structure is hierarchical, suitable for a mind map.
-    Example output for content about "Programming":
-    {{
-        "nodes": [
-            {{"id": "programming", "label": "Programming", "level": 0}},
-            {{"id": "programming_variables", "label": "Variables", "level": 1}},
-            {{"id": "programming_loops", "label": "Loops", "level": 1}}
-        ],
-        "edges": [
-            {{"from": "programming", "to": "programming_variables"}},
-            {{"from": "programming", "to": "programming_loops"}}
-        ]
-    }}
-    Provide the output as a JSON object with:
-    - "nodes": a list of objects with "id" (unique string), "label" (string), and "level" (integer, 0 for main topics, 1 for subtopics)
-    - "edges": a list of objects with "from" (source node id) and "to" (target node id)
-    Limit the content to the first 3000 characters if longer.
-    Return ONLY the JSON object, no additional text or explanation.
-
-    Content:
-    {user_input[:3000]}
-    """
-    
-    # Call the model
-    with st.spinner("Generating mind map from model..."):
-        try:
-            model_output = get_output(prompt)
-            if not model_output or model_output.isspace():
-                raise ValueError("Model returned empty or whitespace-only response")
-            
-            # Parse JSON
-            try:
-                mindmap_data = json.loads(model_output)
-            except json.JSONDecodeError as e:
-                st.error(f"Failed to parse JSON: {e}")
-                return
-            
-            # Validate structure
-            if not isinstance(mindmap_data, dict) or "nodes" not in mindmap_data or "edges" not in mindmap_data:
-                st.error("Invalid model output. Expected 'nodes' and 'edges'.")
-                return
-            
-            # Fix nodes
-            for node in mindmap_data["nodes"]:
-                if "level" not in node:
-                    node["level"] = 1
-                    st.warning(f"Node {node.get('id', 'unknown')} missing 'level'. Set to 1.")
-                if "id" not in node or "label" not in node:
-                    st.error(f"Invalid node: {node}")
-                    return
-            
-        except Exception as e:
-            st.error(f"Failed to generate mind map: {e}")
-            return
-    
-    # Create graph
-    G = nx.DiGraph()
-    for node in mindmap_data["nodes"]:
-        G.add_node(node["id"], label=node["label"], level=node["level"])
-    for edge in mindmap_data["edges"]:
-        if edge["from"] in G.nodes and edge["to"] in G.nodes:
-            G.add_edge(edge["from"], edge["to"])
-        else:
-            st.warning(f"Skipping invalid edge: {edge}")
-    
-    # Compute layout
-    if G.number_of_nodes() > 0:
-        try:
-            if layout_style == "Radial":
-                pos = nx.spring_layout(G, k=1.5, iterations=100)  # Increased k for better spacing
-                for node, data in G.nodes(data=True):
-                    if data.get("level", 1) == 0:
-                        # Spread multiple main topics
-                        main_nodes = [n for n, d in G.nodes(data=True) if d.get("level", 1) == 0]
-                        if len(main_nodes) > 1:
-                            angle = (main_nodes.index(node) * 360 / len(main_nodes))
-                            radius = 0.5
-                            pos[node] = [radius * np.cos(np.radians(angle)), radius * np.sin(np.radians(angle))]
-                        else:
-                            pos[node] = [0, 0]
-            elif layout_style == "Tree":
-                pos = nx.spring_layout(G, k=0.7, iterations=50)  # Adjusted k
-                main_nodes = [n for n, d in G.nodes(data=True) if d.get("level", 1) == 0]
-                for node, data in G.nodes(data=True):
-                    if data.get("level", 1) == 0:
-                        if len(main_nodes) > 1:
-                            angle = (main_nodes.index(node) * 360 / len(main_nodes))
-                            pos[node] = [0.5 * np.cos(np.radians(angle)), 0.5 * np.sin(np.radians(angle))]
-                        else:
-                            pos[node] = [0, 0]
-                    elif data.get("level", 1) == 1:
-                        angle = hash(node) % 360
-                        radius = 1.8  # Increased for clarity
-                        pos[node] = [radius * np.cos(np.radians(angle)), radius * np.sin(np.radians(angle))]
-        except Exception as e:
-            st.error(f"Error computing layout: {e}. Falling back to default Radial layout.")
-            pos = nx.spring_layout(G, k=1.5, iterations=100)
-            for node, data in G.nodes(data=True):
-                if data.get("level", 1) == 0:
-                    main_nodes = [n for n, d in G.nodes(data=True) if d.get("level", 1) == 0]
-                    if len(main_nodes) > 1:
-                        angle = (main_nodes.index(node) * 360 / len(main_nodes))
-                        pos[node] = [0.5 * np.cos(np.radians(angle)), 0.5 * np.sin(np.radians(angle))]
-                    else:
-                        pos[node] = [0, 0]
-    else:
-        st.error("No nodes to display in the mind map.")
-        return
-    
-    # Render mind map
-    labels = [data["label"] for _, data in G.nodes(data=True)]
-    x_positions = [pos[node][0] for node in G.nodes()]
-    y_positions = [pos[node][1] for node in G.nodes()]
-    colors = [central_color if data.get("level", 1) == 0 else subtopic_color for _, data in G.nodes(data=True)]
-    is_starred = [st.session_state.get('starred_topics', {}).get(data["label"], False) for _, data in G.nodes(data=True)]
-    sizes = [node_size * 2 if data.get("level", 1) == 0 else node_size for _, data in G.nodes(data=True)]
-    
-    fig = go.Figure()
-    
-    # Edges
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        xc = (x0 + x1) / 2 + (y1 - y0) * 0.1
-        yc = (y0 + y1) / 2 + (x0 - x1) * 0.1
-        fig.add_trace(go.Scatter(
-            x=[x0, xc, x1],
-            y=[y0, yc, y1],
-            mode='lines',
-            line=dict(color='#666', width=2, shape='spline'),
-            hoverinfo='none'
-        ))
-    
-    # Nodes
-    fig.add_trace(go.Scatter(
-        x=x_positions,
-        y=y_positions,
-        mode='markers+text',
-        text=labels,
-        textposition="middle center",
-        textfont=dict(size=12, color='#000000'),  # Dark black text
-        marker=dict(
-            size=sizes,
-            color=[starred_color if starred else color for starred, color in zip(is_starred, colors)],
-            line=dict(width=2, color='#333'),
-            symbol=['hexagon' if data.get("level", 1) == 0 else 'circle' for _, data in G.nodes(data=True)]
-        ),
-        hoverinfo='none'
-    ))
-    
-    # Layout
-    fig.update_layout(
-        title="Knowledge Mind Map",
-        showlegend=False,
-        xaxis=dict(visible=False, fixedrange=True),
-        yaxis=dict(visible=False, fixedrange=True),
-        dragmode=False,
-        height=750,
-        width=800,
-        plot_bgcolor='white',
-        margin=dict(l=0, r=0, t=50, b=0)
-    )
-    
-    config = {'staticPlot': True, 'displayModeBar': False}
-    st.plotly_chart(fig, config=config, use_container_width=True)
-    st.session_state.flowchart_generated = True
-    
-    # Save and action buttons
-    mindmap_path = f"mindmap_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-    with open(mindmap_path, "w", encoding="utf-8") as f:
-        f.write("Mind Map Data (JSON):\n\n")
-        f.write(json.dumps(mindmap_data, indent=2))
-    st.session_state.last_flowchart_path = mindmap_path
-    
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        with open(mindmap_path, "rb") as f:
-            st.download_button(
-                label="📥 Download Mind Map Data",
-                data=f,
-                file_name="knowledge_mindmap.json",
-                mime="application/json"
-            )
-    with col2:
-        if st.button("🔄 Regenerate Mind Map"):
-            st.session_state.flowchart_generated = False
-            if os.path.exists(mindmap_path):
-                os.remove(mindmap_path)
-            st.rerun()
-    with col3:
-        if is_authenticated() and st.button("💾 Save to Firebase"):
-            try:
-                with open(mindmap_path, "r", encoding="utf-8") as f:
-                    mindmap_text = f.read()
-                from firebase_auth import save_flowchart
-                save_flowchart(st.session_state.user['uid'], mindmap_text, datetime.now().isoformat())
-                st.success("Mind map saved to Firebase!")
-            except (ImportError, AttributeError) as e:
-                st.error(f"Firebase save not implemented: {e}")
-    
-    if st.button("← Back to Options"):
-        st.session_state.page = "options"
-        st.rerun()
-
 def render_app_content():
     with st.sidebar:
         if 'user' in st.session_state:
@@ -340,6 +76,18 @@ def render_app_content():
             if st.button("⚙️ Options"):
                 st.session_state.page = "options"
                 st.rerun()
+            
+            with st.expander("🧮 Session memory"):
+                footprint = session_footprint()
+                st.caption(f"{sum(size for _, size in footprint) / 1024:.1f} KiB in session state")
+                for key, size in footprint[:8]:
+                    st.write(f"`{key}`: {size / 1024:.1f} KiB")
+    
+    # Leaving a page writes any star/unstar clicks still waiting for their debounce
+    if st.session_state.get("_last_page") != st.session_state.page:
+        if is_authenticated():
+            flush_starred_topics(st.session_state.user['uid'])
+        st.session_state._last_page = st.session_state.page
     
     if st.session_state.page == "upload":
         st.title("📚 Edugenius: AI Study Assistant")
@@ -349,11 +97,11 @@ def render_app_content():
         custom_topic = st.text_area("Or enter a study topic manually:")
         
         if uploaded_file:
-            st.session_state.uploaded_file = uploaded_file
-            st.session_state.file_content = uploaded_file.read().decode("utf-8", errors="ignore")
+            # Read on "Next" by process_input; the UploadedFile itself stays out of session state
             st.success("File uploaded successfully!")
         
         if st.button("Next ➡️"):
+            from Upload import process_input
             process_input(uploaded_file, custom_topic)
             st.session_state.page = "options"
             st.rerun()
@@ -374,6 +122,9 @@ def render_app_content():
                 st.session_state.page = "mindmap"   # Changed page
                 st.rerun()
         with col2:
+            with st.expander("Mock test size"):
+                st.number_input("MCQs", min_value=1, max_value=50, key="num_mcq")
+                st.number_input("Short answers", min_value=0, max_value=30, key="num_short_answer")
             if st.button("🎯 Generate Mock Tests"):
                 st.session_state.page = "mock_tests"
                 st.rerun()
@@ -390,6 +141,7 @@ def render_app_content():
             st.rerun()
     
     elif st.session_state.page == "mindmap":  # Changed from "flowchart"
+        from Mindmap import generate_mindmap
         generate_mindmap()                    # Changed function
 
     elif st.session_state.page == "topics":
@@ -409,31 +161,16 @@ def render_app_content():
                     if data.get('starred', False)
                 }
 
-        # Generate topics if they don't exist
+        # Generate topics if they don't exist (shared with the mind map page per content hash)
         if not st.session_state.get("topics_dict"):
             with st.spinner("Analyzing your content..."):
-                content = st.session_state.file_content if st.session_state.uploaded_file else st.session_state.custom_topic
+                content = session_text("file_content") if st.session_state.uploaded_file else session_text("custom_topic")
                 
                 if content:
-                    response = process_task(
-                        "Important Topics",
-                        f"Extract main topics and key points from:\n{content[:3000]}"
-                    )
-                    
-                    if response:
-                        topics = {}
-                        current_topic = None
-                        
-                        for line in response.split('\n'):
-                            line = line.strip()
-                            if line.startswith("## "):
-                                current_topic = line[3:].strip()
-                                topics[current_topic] = []
-                            elif line.startswith("- ") and current_topic:
-                                point = line[2:].strip()
-                                topics[current_topic].append(point)
-                        
-                        st.session_state.topics_dict = topics
+                    from topic_hierarchy import extract_topic_hierarchy, to_topics_dict
+                    topics = extract_topic_hierarchy(content)
+                    if topics:
+                        st.session_state.topics_dict = to_topics_dict(topics)
                         st.rerun()
 
         # Display topics in cards
@@ -518,22 +255,19 @@ def render_app_content():
     elif st.session_state.page == "starred_topics":
         st.title("⭐ Your Starred Topics")
         
-        # Load fresh data from Firestore
+        # Read a page at a time with a cursor; pages stay cached until a topic is (un)starred
+        starred_data, next_cursor = {}, None
+        cursors = st.session_state.setdefault("starred_cursors", [None])
         if is_authenticated():
-            starred_data = get_starred_topics(st.session_state.user['uid'])
-            if starred_data:
-                # Update session state
-                st.session_state.starred_topics = {
-                    data['point']: True 
-                    for data in starred_data.values() 
-                    if data.get('starred', False)
-                }
+            if st.button("🔄 Refresh"):
+                invalidate_starred_topics(st.session_state.user['uid'])
+                cursors[:] = [None]
+            page_items, next_cursor = get_starred_topics_page(st.session_state.user['uid'], cursors[-1])
+            starred_data = {item['topic_id']: item for item in page_items}
         
-        if not st.session_state.starred_topics:
+        if not starred_data:
             st.info("You haven't starred any topics yet!")
         else:
-            # Get full data from Firestore for display
-            starred_data = get_starred_topics(st.session_state.user['uid'])
             for topic_id, data in starred_data.items():
                 if data.get('starred', False):
                     # Card for starred topics
@@ -575,18 +309,61 @@ def render_app_content():
                             st.session_state.starred_topics.pop(data['point'], None)
                             st.rerun()
         
+            page_col1, page_col2 = st.columns(2)
+            with page_col1:
+                if st.button("◀ Newer", disabled=len(cursors) == 1):
+                    cursors.pop()
+                    st.rerun()
+            with page_col2:
+                if st.button("Older ▶", disabled=next_cursor is None):
+                    cursors.append(next_cursor)
+                    st.rerun()
+        
         if st.button("← Back to All Topics"):
             st.session_state.page = "topics"
             st.rerun()
             
     elif st.session_state.page == "mock_tests":
+        from Mock_test import generate_mock_test, start_adaptive_mock_test, record_attempt, record_dwell_time
+        from Analysis import analyze_performance, is_answer_correct
+        from adaptive_test import next_question, record_response
         st.title("📝 Mock Test")
         
+        st.radio(
+            "Test mode",
+            ["Standard", "Adaptive"],
+            key="test_mode",
+            horizontal=True,
+            disabled=bool(st.session_state.questions),
+            help="Adaptive tests pick each next question from the question bank to match your ability"
+        )
+        st.checkbox(
+            "Grade short answers by meaning",
+            key="semantic_grading",
+            help="Uses the model to accept paraphrased answers; falls back to keyword matching if it is slow"
+        )
+        adaptive = st.session_state.test_mode == "Adaptive"
+        
         # Generate questions if not already created
         if not st.session_state.questions:
-            if st.session_state.custom_topic:
+            if st.session_state.custom_topic_id:
                 with st.spinner("Generating questions..."):
-                    st.session_state.questions = generate_mock_test(st.session_state.custom_topic)
+                    first_question = None
+                    if adaptive:
+                        st.session_state.adaptive_state, first_question = start_adaptive_mock_test(
+                            session_text("custom_topic"),
+                            st.session_state.difficulty
+                        )
+                    if first_question is not None:
+                        st.session_state.questions = [first_question]
+                    else:
+                        st.session_state.adaptive_state = None
+                        st.session_state.questions = generate_mock_test(
+                            session_text("custom_topic"),
+                            st.session_state.difficulty,
+                            st.session_state.num_mcq,
+                            st.session_state.num_short_answer
+                        )
                     st.rerun()
             else:
                 st.warning("Please enter a topic first")
@@ -597,6 +374,11 @@ def render_app_content():
         if st.session_state.start_time is None:
             st.session_state.start_time = datetime.now()
             st.session_state.test_active = True
+        if st.session_state.question_started is None:
+            record_dwell_time()
+
+        adaptive_state = st.session_state.adaptive_state
+        adaptive = adaptive_state is not None
 
         # Calculate progress
         total_questions = len(st.session_state.questions)
@@ -607,7 +389,10 @@ def render_app_content():
         col1, col2 = st.columns([3, 1])
         with col1:
             st.progress(min(progress, 1.0))
-            st.caption(f"Completed: {answered}/{total_questions}")
+            if adaptive:
+                st.caption(f"Question {total_questions} of up to {adaptive_state['max_items']} · ability estimate {adaptive_state['theta']:+.2f}")
+            else:
+                st.caption(f"Completed: {answered}/{total_questions}")
         with col2:
             elapsed = datetime.now() - st.session_state.start_time
             st.metric("Time", f"{elapsed.seconds//60}m {elapsed.seconds%60}s")
@@ -646,12 +431,29 @@ def render_app_content():
         nav_col1, nav_col2 = st.columns([1, 1])
         
         with nav_col1:
-            if st.button("◀ Previous", disabled=st.session_state.current_question_index == 0):
+            # Adaptive answers are graded as soon as the student moves on, so no going back
+            if st.button("◀ Previous", disabled=adaptive or st.session_state.current_question_index == 0):
+                record_dwell_time()
                 st.session_state.current_question_index -= 1
                 st.rerun()
         
         with nav_col2:
-            if st.button("Next ▶", disabled=st.session_state.current_question_index >= total_questions - 1):
+            if adaptive:
+                current = st.session_state.user_answers.get(q["question"], "")
+                if st.button("Next ▶", disabled=adaptive_state.get("finished", False) or current in [None, ""]):
+                    record_dwell_time()
+                    record_response(adaptive_state, q, is_answer_correct(q, current))
+                    next_q = next_question(adaptive_state)
+                    if next_q is None:
+                        adaptive_state["finished"] = True
+                    else:
+                        st.session_state.questions.append(next_q)
+                        st.session_state.current_question_index += 1
+                    st.rerun()
+                if adaptive_state.get("finished", False):
+                    st.info("That's the last question of this adaptive test. Submit when you're ready.")
+            elif st.button("Next ▶", disabled=st.session_state.current_question_index >= total_questions - 1):
+                record_dwell_time()
                 st.session_state.current_question_index += 1
                 st.rerun()
 
@@ -665,6 +467,7 @@ def render_app_content():
         if st.button("✅ Submit Test"):
             try:
                 st.session_state.end_time = datetime.now()
+                record_dwell_time()
                 
                 # Safely calculate time taken
                 if st.session_state.start_time and st.session_state.end_time:
@@ -678,10 +481,27 @@ def render_app_content():
                     st.session_state.time_taken = 0.0
                     
                 st.session_state.test_completed = True
+                # The final adaptive answer still feeds the item statistics
+                if adaptive and not adaptive_state.get("finished", False):
+                    record_response(adaptive_state, q, is_answer_correct(q, st.session_state.user_answers.get(q["question"], "")))
+                    adaptive_state["finished"] = True
                 st.write("User Answers:", st.session_state.user_answers)
                 st.write("Correct Answers:", {q["question"]: q["answer"] for q in st.session_state.questions})
                 analyze_performance()
                 record_attempt()
+                # Keep the full test set with the user's data: written in the background, or
+                # right away when the write queue is full
+                test_set_args = (
+                    st.session_state.user['uid'],
+                    "mock_test",
+                    f"mock_test_{st.session_state.end_time.strftime('%Y%m%d_%H%M%S')}",
+                    {"questions": st.session_state.questions, "answers": st.session_state.user_answers}
+                )
+                if not save_user_artifact(*test_set_args):
+                    try:
+                        get_storage().save_artifact(*test_set_args)
+                    except Exception as e:
+                        st.warning(f"Could not save this test set: {e}")
                 st.session_state.page = "analysis"
                 st.rerun()
                 
@@ -691,6 +511,7 @@ def render_app_content():
                 st.rerun()
 
     if st.session_state.page == "analysis":
+        from Analysis import display_analysis
         display_analysis()
 
         if st.button("Back to Options"):
@@ -701,30 +522,9 @@ def render_app_content():
         option = st.radio("Choose an option:", ["Generate Key Questions", "Generate a Full Question Paper"])
         
         if option == "Generate Key Questions":
+            from Process import process_task
             process_task("Important Questions", "Generate 5 key questions for: {}")
         else:
-            def generate_prompt(num_mcq, num_3_marks, num_5_marks, difficulty_level, topics=None):
-                prompt = f"Generate a comprehensive question paper with: "
-                if num_mcq > 0:
-                    prompt += f'{num_mcq} MCQs with 1 mark each, '
-                if num_3_marks > 0:
-                    prompt += f'{num_3_marks} Questions with 3 marks each, '
-                if num_5_marks > 0:
-                    prompt += f'{num_5_marks} Questions with 5 marks each. '
-                prompt += f'Difficulty level: {difficulty_level}. '
-                
-                # Use either the uploaded content or custom topic
-                if st.session_state.uploaded_file:
-                    prompt += f"\n\nBase the questions on this content:\n{st.session_state.file_content[:3000]}"  # Using first 3000 chars
-                elif st.session_state.custom_topic:
-                    prompt += f"\n\nBase the questions on this topic: {st.session_state.custom_topic}"
-                
-                if topics:
-                    prompt += f'\nFocus specifically on these aspects: {", ".join(topics)}'
-                
-                prompt += "\n\nFormat the output with clear question numbering and mark allocations."
-                return prompt
-            
             # Let user specify topics/focus areas
             topics = st.text_input("Specific topics to focus on (comma separated):")
             topics_list = [t.strip() for t in topics.split(",")] if topics else None
@@ -735,13 +535,20 @@ def render_app_content():
             difficulty = st.selectbox("Difficulty Level", ["Easy", "Medium", "Hard"])
             
             if st.button("🚀 Generate Question Paper"):
-                if not st.session_state.uploaded_file and not st.session_state.custom_topic:
+                if not st.session_state.uploaded_file and not st.session_state.custom_topic_id:
                     st.warning("Please upload content or enter a topic first!")
                 else:
                     with st.spinner("Generating your custom question paper..."):
-                        prompt = generate_prompt(num_mcq, num_3_marks, num_5_marks, difficulty, topics_list)
-                        st.session_state.response = get_output(prompt)
+                        from utils import generate_question_paper
+                        st.session_state.response = generate_question_paper(num_mcq, num_3_marks, num_5_marks, difficulty, topics_list)
                         st.text_area("📄 Generated Question Paper:", st.session_state.response, height=400)
+            
+            if st.session_state.get("response") and is_authenticated() and st.button("💾 Save Question Paper"):
+                name = f"question_paper_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                if save_user_artifact(st.session_state.user['uid'], "question_paper", name, st.session_state.response):
+                    st.success("Question paper queued for saving.")
+                else:
+                    st.error("Too many saves in progress, please try again in a moment.")
         if st.button("Back to Options"):
             st.session_state.page = "options"
             st.rerun()
@@ -2,21 +2,24 @@
 import streamlit as st
 from datetime import datetime
 import json
+import pickle
+import sys
+from artifact_cache import put_document, get_document
 try:
     from firebase_auth import is_authenticated, get_starred_topics  # Explicit import
 except ImportError:
     # Fallback if firebase_auth is incomplete
     def is_authenticated(): return False
     def get_starred_topics(uid): return {}
-from pyvis.network import Network
-import streamlit.components.v1 as components
 
 def initialize_session():
     """Initialize all session state variables with enhanced defaults"""
     session_defaults = {
+        # Path of the processed upload; its text and the topic live in the shared
+        # document store and the session only keeps their ids (see set_session_text)
         "uploaded_file": None,
-        "custom_topic": "",
-        "file_content": "",
+        "custom_topic_id": None,
+        "file_content_id": None,
         "page": "upload",
         "topics_dict": {},
         "topics_list": [],
@@ -32,7 +35,11 @@ def initialize_session():
         "start_time": None,
         "end_time": None,
         "time_taken": None,
-        "time_per_question": [],
+        "time_per_question": {},
+        "question_started": None,
+        "test_mode": "Standard",
+        "adaptive_state": None,
+        "semantic_grading": False,
         "firebase_collections": {
             "user_topics": "user_topics",
             "flowcharts": "user_flowcharts"
@@ -55,7 +62,7 @@ def initialize_session():
             "total_keywords": 0,
             "knowledge_gaps": []
         },
-        "leaderboard": [],
+        "leaderboard": None,
         "personal_best": None,
         "subject": "",
         "topics": [],
@@ -118,4 +125,32 @@ def initialize_session():
                 }
         except (NameError, AttributeError, Exception) as e:
             st.warning(f"Could not load starred topics: {str(e)}. Proceeding without starred topics.")
-            st.session_state.starred_topics = {}
\ No newline at end of file
+            st.session_state.starred_topics = {}
+
+def set_session_text(key, text):
+    """Store ``text`` in the shared document store and keep only its id in ``<key>_id``"""
+    st.session_state[f"{key}_id"] = put_document(text) if text else None
+
+def session_text(key):
+    """Text stored with ``set_session_text`` ("" if unset or evicted from the store)"""
+    doc_id = st.session_state.get(f"{key}_id")
+    if not doc_id:
+        return ""
+    text = get_document(doc_id)
+    if text is None:
+        st.warning("Your uploaded content has expired. Please upload it again.")
+        st.session_state[f"{key}_id"] = None
+        return ""
+    return text
+
+def session_footprint():
+    """Approximate size in bytes of each session state entry, largest first"""
+    sizes = []
+    for key, value in st.session_state.items():
+        try:
+            size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            # Widgets and other unpicklable objects: shallow size only
+            size = sys.getsizeof(value)
+        sizes.append((key, size))
+    return sorted(sizes, key=lambda item: item[1], reverse=True)
@@ -1,18 +1,20 @@
 import streamlit as st
-from model1 import get_mindmap_output
-import networkx as nx
+import streamlit.components.v1 as components
+from mindmap_render import build_graph, build_mindmap_figure, build_pyvis_html, LOD_NODE_THRESHOLD
+from artifact_cache import content_hash, get_artifact_cache
+from flowchart import to_mermaid, to_dot
 import json
-import plotly.graph_objects as go
-import numpy as np
-from firebase_auth import is_authenticated
+from topic_hierarchy import extract_topic_hierarchy, to_mindmap_data, to_topics_dict
+from firebase_auth import is_authenticated, save_flowchart, flowchart_save_status
 from datetime import datetime
 import os
+from Intitialise import session_text
 def generate_mindmap():
     """Generate and display a static mind map using Plotly with important topics and subheadings from user content"""
     st.title("🧠 Knowledge Mind Map")
     
     # Check if user input exists
-    if not st.session_state.get("file_content") and not st.session_state.get("custom_topic"):
+    if not st.session_state.get("file_content_id") and not st.session_state.get("custom_topic_id"):
         st.warning("No input provided. Please:")
         st.markdown("""
         1. Go to **Home**
@@ -25,7 +27,7 @@ def generate_mindmap():
         return
     
     # Get user input
-    user_input = st.session_state.get("file_content", "") or st.session_state.get("custom_topic", "")
+    user_input = session_text("file_content") or session_text("custom_topic")
     if isinstance(user_input, bytes):
         user_input = user_input.decode("utf-8", errors="ignore")
     
@@ -56,176 +58,40 @@ def generate_mindmap():
         "starred_color": starred_color
     })
     
-    # Craft prompt
-    prompt = f"""
-    Based on the following content, identify the important topics and their subheadings, and generate a mind map structure representing their relationships.
-    - Mark main topics with 'level': 0 (central nodes).
-    - Mark subheadings under each main topic with 'level': 1 (branches).
-    - Include 'id' as a unique string (e.g., topic_name_subheading_name) and 'label' as the readable name.
-    - Provide 'edges' to show relationships (e.g., from main topic to subheading).
-    - Ensure the structure is hierarchical, suitable for a mind map.
-    Example output for content about "Programming":
-    {{
-        "nodes": [
-            {{"id": "programming", "label": "Programming", "level": 0}},
-            {{"id": "programming_variables", "label": "Variables", "level": 1}},
-            {{"id": "programming_loops", "label": "Loops", "level": 1}}
-        ],
-        "edges": [
-            {{"from": "programming", "to": "programming_variables"}},
-            {{"from": "programming", "to": "programming_loops"}}
-        ]
-    }}
-    Provide the output as a JSON object with:
-    - "nodes": a list of objects with "id" (unique string), "label" (string), and "level" (integer, 0 for main topics, 1 for subtopics)
-    - "edges": a list of objects with "from" (source node id) and "to" (target node id)
-    Limit the content to the first 3000 characters if longer.
-    Return ONLY the JSON object, no additional text or explanation.
-
-    Content:
-    {user_input[:3000]}
-    """
-    
-    # Call the model
+    # Derive the mind map from the shared topic extraction (one model call per content hash,
+    # reused by the topics page)
     with st.spinner("Generating mind map from model..."):
         try:
-            model_output = get_mindmap_output(prompt)
-            if not model_output or model_output.isspace():
-                raise ValueError("Model returned empty or whitespace-only response")
-            
-            # Parse JSON
-            try:
-                mindmap_data = json.loads(model_output)
-            except json.JSONDecodeError as e:
-                st.error(f"Failed to parse JSON: {e}")
-                return
-            
-            # Validate structure
-            if not isinstance(mindmap_data, dict) or "nodes" not in mindmap_data or "edges" not in mindmap_data:
-                st.error("Invalid model output. Expected 'nodes' and 'edges'.")
-                return
-            
-            # Fix nodes
-            for node in mindmap_data["nodes"]:
-                if "level" not in node:
-                    node["level"] = 1
-                    st.warning(f"Node {node.get('id', 'unknown')} missing 'level'. Set to 1.")
-                if "id" not in node or "label" not in node:
-                    st.error(f"Invalid node: {node}")
-                    return
-            
+            topics = extract_topic_hierarchy(user_input, refresh=st.session_state.pop("refresh_topics", False))
         except Exception as e:
             st.error(f"Failed to generate mind map: {e}")
             return
+    mindmap_data = to_mindmap_data(topics)
+    if topics and not st.session_state.get("topics_dict"):
+        st.session_state.topics_dict = to_topics_dict(topics)
     
     # Create graph
-    G = nx.DiGraph()
-    for node in mindmap_data["nodes"]:
-        G.add_node(node["id"], label=node["label"], level=node["level"])
-    for edge in mindmap_data["edges"]:
-        if edge["from"] in G.nodes and edge["to"] in G.nodes:
-            G.add_edge(edge["from"], edge["to"])
-        else:
-            st.warning(f"Skipping invalid edge: {edge}")
+    G, skipped_edges = build_graph(mindmap_data)
+    for edge in skipped_edges:
+        st.warning(f"Skipping invalid edge: {edge}")
     
-    # Compute layout
-    if G.number_of_nodes() > 0:
-        try:
-            if layout_style == "Radial":
-                pos = nx.spring_layout(G, k=1.5, iterations=100)
-                for node, data in G.nodes(data=True):
-                    if data.get("level", 1) == 0:
-                        main_nodes = [n for n, d in G.nodes(data=True) if d.get("level", 1) == 0]
-                        if len(main_nodes) > 1:
-                            angle = (main_nodes.index(node) * 360 / len(main_nodes))
-                            radius = 0.5
-                            pos[node] = [radius * np.cos(np.radians(angle)), radius * np.sin(np.radians(angle))]
-                        else:
-                            pos[node] = [0, 0]
-            elif layout_style == "Tree":
-                pos = nx.spring_layout(G, k=0.7, iterations=50)
-                main_nodes = [n for n, d in G.nodes(data=True) if d.get("level", 1) == 0]
-                for node, data in G.nodes(data=True):
-                    if data.get("level", 1) == 0:
-                        if len(main_nodes) > 1:
-                            angle = (main_nodes.index(node) * 360 / len(main_nodes))
-                            pos[node] = [0.5 * np.cos(np.radians(angle)), 0.5 * np.sin(np.radians(angle))]
-                        else:
-                            pos[node] = [0, 0]
-                    elif data.get("level", 1) == 1:
-                        angle = hash(node) % 360
-                        radius = 1.8
-                        pos[node] = [radius * np.cos(np.radians(angle)), radius * np.sin(np.radians(angle))]
-        except Exception as e:
-            st.error(f"Error computing layout: {e}. Falling back to default Radial layout.")
-            pos = nx.spring_layout(G, k=1.5, iterations=100)
-            for node, data in G.nodes(data=True):
-                if data.get("level", 1) == 0:
-                    main_nodes = [n for n, d in G.nodes(data=True) if d.get("level", 1) == 0]
-                    if len(main_nodes) > 1:
-                        angle = (main_nodes.index(node) * 360 / len(main_nodes))
-                        pos[node] = [0.5 * np.cos(np.radians(angle)), 0.5 * np.sin(np.radians(angle))]
-                    else:
-                        pos[node] = [0, 0]
-    else:
+    if G.number_of_nodes() == 0:
         st.error("No nodes to display in the mind map.")
         return
     
-    # Render mind map
-    labels = [data["label"] for _, data in G.nodes(data=True)]
-    x_positions = [pos[node][0] for node in G.nodes()]
-    y_positions = [pos[node][1] for node in G.nodes()]
-    colors = [central_color if data.get("level", 1) == 0 else subtopic_color for _, data in G.nodes(data=True)]
-    is_starred = [st.session_state.get('starred_topics', {}).get(data["label"], False) for _, data in G.nodes(data=True)]
-    sizes = [node_size * 2 if data.get("level", 1) == 0 else node_size for _, data in G.nodes(data=True)]
-    
-    fig = go.Figure()
-    
-    # Edges
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        xc = (x0 + x1) / 2 + (y1 - y0) * 0.1
-        yc = (y0 + y1) / 2 + (x0 - x1) * 0.1
-        fig.add_trace(go.Scatter(
-            x=[x0, xc, x1],
-            y=[y0, yc, y1],
-            mode='lines',
-            line=dict(color='#666', width=2, shape='spline'),
-            hoverinfo='none'
-        ))
-    
-    # Nodes
-    fig.add_trace(go.Scatter(
-        x=x_positions,
-        y=y_positions,
-        mode='markers+text',
-        text=labels,
-        textposition="middle center",
-        textfont=dict(size=12, color='#000000'),
-        marker=dict(
-            size=sizes,
-            color=[starred_color if starred else color for starred, color in zip(is_starred, colors)],
-            line=dict(width=2, color='#333'),
-            symbol=['hexagon' if data.get("level", 1) == 0 else 'circle' for _, data in G.nodes(data=True)]
-        ),
-        hoverinfo='none'
-    ))
-    
-    # Layout
-    fig.update_layout(
-        title="Knowledge Mind Map",
-        showlegend=False,
-        xaxis=dict(visible=False, fixedrange=True),
-        yaxis=dict(visible=False, fixedrange=True),
-        dragmode=False,
-        height=750,
-        width=800,
-        plot_bgcolor='white',
-        margin=dict(l=0, r=0, t=50, b=0)
-    )
+    # Render mind map (level-of-detail rendering kicks in for very large graphs)
+    try:
+        fig, config = build_mindmap_figure(
+            G, layout_style, st.session_state.flowchart_settings, st.session_state.get('starred_topics', {})
+        )
+    except Exception as e:
+        st.error(f"Error computing layout: {e}. Falling back to default Radial layout.")
+        fig, config = build_mindmap_figure(
+            G, "Radial", st.session_state.flowchart_settings, st.session_state.get('starred_topics', {})
+        )
+    if G.number_of_nodes() > LOD_NODE_THRESHOLD:
+        st.caption(f"{G.number_of_nodes()} nodes: showing a simplified view. Zoom and hover to explore collapsed branches.")
     
-    config = {'staticPlot': True, 'displayModeBar': False}
     st.plotly_chart(fig, config=config, use_container_width=True)
     st.session_state.flowchart_generated = True
     
@@ -236,7 +102,37 @@ def generate_mindmap():
         f.write(json.dumps(mindmap_data, indent=2))
     st.session_state.last_flowchart_path = mindmap_path
     
-    col1, col2, col3 = st.columns(3)
+    # Interactive HTML export, built once per graph/settings and served from the artifact cache
+    starred_topics = st.session_state.get('starred_topics', {})
+    html_key = content_hash({
+        "graph": mindmap_data,
+        "layout": layout_style,
+        "settings": st.session_state.flowchart_settings,
+        "starred": sorted(data["label"] for _, data in G.nodes(data=True) if starred_topics.get(data["label"], False))
+    })
+    mindmap_html = get_artifact_cache().get_or_create(
+        "mindmap_html", html_key,
+        lambda: build_pyvis_html(G, layout_style, st.session_state.flowchart_settings, starred_topics)
+    )
+    if st.checkbox("🌐 Show interactive view"):
+        components.html(mindmap_html.decode("utf-8"), height=770, scrolling=False)
+    
+    # Flowchart source generated locally from the same graph (no model call)
+    with st.expander("📊 Flowchart Export"):
+        mermaid_source = to_mermaid(mindmap_data, st.session_state.flowchart_settings, starred_topics)
+        st.code(mermaid_source, language="text")
+        fc1, fc2 = st.columns(2)
+        with fc1:
+            st.download_button("Mermaid", mermaid_source, file_name="flowchart.mmd", mime="text/plain")
+        with fc2:
+            st.download_button(
+                "Graphviz DOT",
+                to_dot(mindmap_data, st.session_state.flowchart_settings, starred_topics),
+                file_name="flowchart.dot",
+                mime="text/vnd.graphviz"
+            )
+    
+    col1, col2, col3, col4 = st.columns(4)
     with col1:
         with open(mindmap_path, "rb") as f:
             st.download_button(
@@ -246,21 +142,39 @@ def generate_mindmap():
                 mime="application/json"
             )
     with col2:
+        st.download_button(
+            label="🌐 Download Interactive HTML",
+            data=mindmap_html,
+            file_name="knowledge_mindmap.html",
+            mime="text/html"
+        )
+    with col3:
         if st.button("🔄 Regenerate Mind Map"):
             st.session_state.flowchart_generated = False
+            st.session_state.refresh_topics = True
+            st.session_state.topics_dict = {}
             if os.path.exists(mindmap_path):
                 os.remove(mindmap_path)
             st.rerun()
-    with col3:
+    with col4:
         if is_authenticated() and st.button("💾 Save to Firebase"):
-            try:
-                with open(mindmap_path, "r", encoding="utf-8") as f:
-                    mindmap_text = f.read()
-                from firebase_auth import save_flowchart
-                save_flowchart(st.session_state.user['uid'], mindmap_text, datetime.now().isoformat())
+            with open(mindmap_path, "r", encoding="utf-8") as f:
+                mindmap_text = f.read()
+            # Written in the background; the page doesn't wait for Firestore
+            mindmap_id = save_flowchart(st.session_state.user['uid'], mindmap_text, datetime.now().isoformat())
+            if mindmap_id:
+                st.session_state.last_saved_mindmap = mindmap_id
+            else:
+                st.error("Too many saves in progress, please try again in a moment.")
+        saved_id = st.session_state.get("last_saved_mindmap")
+        if saved_id:
+            status = flowchart_save_status(saved_id)
+            if status == "done":
                 st.success("Mind map saved to Firebase!")
-            except (ImportError, AttributeError) as e:
-                st.error(f"Firebase save not implemented: {e}")
+            elif status == "failed":
+                st.error("Saving the mind map failed, please try again.")
+            elif status == "pending":
+                st.info("Saving mind map...")
     
     if st.button("← Back to Options"):
         st.session_state.page = "options"
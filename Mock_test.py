@@ -1,27 +1,36 @@
 import streamlit as st
 import json
-import re
+import time
 from typing import List, Dict
 from datetime import datetime
-from model import get_output
+from model import request_output
+from json_repair import parse_model_json
+from concurrent.futures import ThreadPoolExecutor
+from artifact_cache import content_hash, get_artifact_cache
+from question_bank import get_question_bank, question_fingerprint, parse_marks
+from analytics import record
+from adaptive_test import start_adaptive_test, next_question, DEFAULT_MAX_ITEMS
+from Intitialise import session_text
 
+# Largest number of questions asked for in one request; long completions get truncated
+SHARD_SIZE = 6
+MAX_PARALLEL_SHARDS = 8
 
-def generate_mock_test(topic: str) -> List[Dict]:
-    """Generate mock test questions with robust error handling"""
-    # Input validation
-    if not topic or not isinstance(topic, str):
-        st.warning("⚠️ Please enter a valid topic!")
-        return get_default_questions()
 
-    prompt = f"""Generate a mock test about {topic} with:
-    - 5 MCQs (4 options each)
-    - 3 short-answer questions
+def build_mock_test_prompt(topic: str, num_mcq: int, num_short: int, difficulty: str, focus: List[str] = None) -> str:
+    focus_line = f"Only ask about these sub-topics: {', '.join(focus)}.\n    " if focus else ""
+    return f"""Generate a mock test about {topic[:3000]} with:
+    - {num_mcq} MCQs (4 options each)
+    - {num_short} short-answer questions
+    Difficulty level: {difficulty}.
+    {focus_line}Tag every question with the short name of the sub-topic it tests.
     Return ONLY valid JSON with this structure:
     {{
         "questions": [
             {{
                 "question": "...",
                 "type": "MCQ",
+                "topic": "...",
                 "options": ["A", "B", "C", "D"],
                 "answer": "CorrectOption",
                 "explanation": "...",
@@ -30,16 +39,93 @@ def generate_mock_test(topic: str) -> List[Dict]:
             {{
                 "question": "...", 
                 "type": "Short Answer",
+                "topic": "...",
                 "answer": "...",
                 "explanation": "...",
                 "keywords": ["key", "terms"]
             }}
         ]
     }}"""
-    
+
+def cached_subtopics(topic: str) -> List[str]:
+    """Main topics of the document's cached topic hierarchy, without a model call"""
+    cached = get_artifact_cache().get("topic_hierarchy", content_hash(topic[:3000]))
+    if cached is None:
+        return []
+    return [item["topic"] for item in json.loads(cached)]
+
+def topic_label(topic: str) -> str:
+    """Readable name for a test's topic: the document's first main topic, or the typed topic"""
+    subtopics = cached_subtopics(topic)
+    if subtopics:
+        return subtopics[0]
+    topic = topic.strip()
+    # A typed topic is one short line; anything else is document text
+    if topic and len(topic) <= 80 and "\n" not in topic:
+        return topic
+    return "Uploaded document"
+
+def plan_shards(num_mcq: int, num_short: int, subtopics: List[str]) -> List[Dict]:
+    """Split a request into shards of at most SHARD_SIZE questions of one type, spread over sub-topics"""
+    shards = []
+    for q_type, count in (("MCQ", num_mcq), ("Short Answer", num_short)):
+        while count > 0:
+            size = min(count, SHARD_SIZE)
+            shards.append({"MCQ": size if q_type == "MCQ" else 0, "Short Answer": size if q_type != "MCQ" else 0})
+            count -= size
+    if len(shards) > 1 and subtopics:
+        # Deal sub-topics out round-robin so shards don't all ask about the same thing
+        for index, shard in enumerate(shards):
+            shard["focus"] = subtopics[index::len(shards)] or [subtopics[index % len(subtopics)]]
+    return shards
+
+def generate_shards(topic: str, difficulty: str, shards: List[Dict]) -> List[Dict]:
+    """Generate all shards concurrently and merge them, dropping invalid and duplicate questions"""
+    def generate(shard):
+        # Runs in a worker thread without a script context, so problems are returned,
+        # not shown; they are reported below from the script thread
+        prompt = build_mock_test_prompt(topic, shard["MCQ"], shard["Short Answer"], difficulty, shard.get("focus"))
+        try:
+            return extract_questions(request_output(prompt))
+        except Exception as e:
+            return [], f"Error generating response: {e}"
+
+    if len(shards) == 1:
+        results = [generate(shards[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(len(shards), MAX_PARALLEL_SHARDS)) as executor:
+            results = list(executor.map(generate, shards))
+
+    for error in dict.fromkeys(error for _, error in results if error):
+        st.warning(f"⚠️ {error}")
+
+    merged, seen = [], set()
+    for questions, _ in results:
+        for q in questions:
+            fingerprint = question_fingerprint(q, "")
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                merged.append(q)
+    return merged
+
+def generate_mock_test(topic: str, difficulty: str = "Medium", num_mcq: int = 5, num_short: int = 3) -> List[Dict]:
+    """Assemble a mock test from the question bank, calling the model only to top up thin categories"""
+    # Input validation
+    if not topic or not isinstance(topic, str):
+        st.warning("⚠️ Please enter a valid topic!")
+        return get_default_questions()
+
     try:
-        response = get_output(prompt)
-        questions = parse_questions(response)
+        bank = get_question_bank()
+        key = content_hash(topic[:3000])
+        wanted = {"MCQ": num_mcq, "Short Answer": num_short}
+        missing = {q_type: max(0, n - bank.count(key, q_type, difficulty)) for q_type, n in wanted.items()}
+        
+        if any(missing.values()):
+            shards = plan_shards(missing["MCQ"], missing["Short Answer"], cached_subtopics(topic))
+            bank.add_questions(generate_shards(topic, difficulty, shards), key, difficulty)
+        
+        questions = [q for q_type, n in wanted.items() for q in bank.draw(key, q_type, difficulty, n)]
         
         if not validate_questions(questions):
             st.warning("⚠️ Generated questions didn't pass validation")
@@ -51,31 +137,34 @@ def generate_mock_test(topic: str) -> List[Dict]:
         st.error(f"❌ Generation failed: {str(e)}")
         return get_default_questions()
 
+def start_adaptive_mock_test(topic: str, difficulty: str = "Medium", max_items: int = DEFAULT_MAX_ITEMS):
+    """Top up the bank for ``topic`` and start an adaptive test; returns (state, first question)"""
+    # A pool larger than the test itself so items can be matched to the student's ability
+    generate_mock_test(topic, difficulty, num_mcq=max_items, num_short=max_items // 2)
+    state = start_adaptive_test(content_hash(topic[:3000]), max_items)
+    return state, next_question(state)
+
 def parse_questions(raw_response: str) -> List[Dict]:
-    """Safely extract questions from API response"""
-    try:
-        # Try direct JSON parse first
-        try:
-            data = json.loads(raw_response)
-            return data.get("questions", [])
-        except json.JSONDecodeError:
-            pass
-        
-        # Try extracting from markdown code block
-        json_match = re.search(r'```(?:json)?\n(.*?)\n```', raw_response, re.DOTALL)
-        if json_match:
-            data = json.loads(json_match.group(1))
-            return data.get("questions", [])
-        
-        # Final cleanup attempt
-        cleaned = raw_response.strip()
-        cleaned = re.sub(r'^.*?\{', '{', cleaned, 1, re.DOTALL)
-        data = json.loads(cleaned)
-        return data.get("questions", [])
-        
-    except Exception as e:
-        st.warning(f"⚠️ Parsing failed: {str(e)}")
-        return []
+    """Safely extract questions from API response, salvaging complete questions from damaged JSON"""
+    questions, error = extract_questions(raw_response)
+    if error:
+        st.warning(f"⚠️ {error}")
+    return questions
+
+def extract_questions(raw_response: str):
+    """(valid questions, error message or None) from a model response, without touching the page"""
+    data = parse_model_json(raw_response)
+    if data is None:
+        return [], "Parsing failed: model output is not valid JSON"
+    questions = data.get("questions", []) if isinstance(data, dict) else data
+    if not isinstance(questions, list):
+        return [], None
+    # Drop questions cut off by truncation instead of rejecting the whole set
+    questions = [q for q in questions if isinstance(q, dict) and validate_questions([q])]
+    for q in questions:
+        if "marks" in q:
+            q["marks"] = parse_marks(q["marks"], q["type"])
+    return questions, None
 
 def validate_questions(questions: List[Dict]) -> bool:
     """Comprehensive question validation"""
@@ -84,7 +173,8 @@ def validate_questions(questions: List[Dict]) -> bool:
     
     required = {
         "MCQ": ["question", "type", "options", "answer"],
-        "Short Answer": ["question", "type", "answer"]
+        "Short Answer": ["question", "type", "answer"],
+        "Descriptive": ["question", "type"]
     }
     
     for q in questions:
@@ -95,6 +185,8 @@ def validate_questions(questions: List[Dict]) -> bool:
             return False
         if q_type == "MCQ" and len(q.get("options", [])) != 4:
             return False
+        if "marks" in q and parse_marks(q["marks"], q_type) is None:
+            return False
             
     return True
 
@@ -128,6 +220,17 @@ def get_default_questions() -> List[Dict]:
         }
     ]
 
+def record_dwell_time():
+    """Charge the time since the current question was shown to it; call on every navigation"""
+    now = time.monotonic()
+    started = st.session_state.get('question_started')
+    if started is not None and st.session_state.questions:
+        # Keyed by position: two questions can have the same text
+        index = st.session_state.current_question_index
+        times = st.session_state.time_per_question
+        times[index] = times.get(index, 0.0) + (now - started)
+    st.session_state.question_started = now
+
 def record_attempt():
     """Safely record test attempt with validation"""
     if not hasattr(st.session_state, 'analysis_results'):
@@ -137,22 +240,47 @@ def record_attempt():
     try:
         # Safely get all values with type conversion
         analysis = st.session_state.analysis_results
+        user = st.session_state.get('user') or {}
+        topic = session_text("custom_topic")
+        question_results = [
+            {"question": d["question"], "type": d["type"], "correct": correct,
+             "score": float(d.get("score", float(correct))), "time_spent": float(d.get("time_spent", 0))}
+            for correct, details in ((True, analysis.get("correct_answers", [])), (False, analysis.get("incorrect_answers", [])))
+            for d in details
+        ]
         attempt = {
-            "user": str(st.session_state.get('current_user', 'Anonymous')),
+            "user": str(user.get('uid', 'Anonymous')),
+            "email": user.get('email'),
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "topic": topic_label(topic),
+            "topic_hash": content_hash(topic[:3000]),
+            "difficulty": st.session_state.get('difficulty'),
+            "test_mode": st.session_state.get('test_mode', "Standard"),
             "score": float(analysis.get("score", 0)),
+            "total": int(analysis.get("total", 0)),
             "time_taken": float(analysis.get("time_taken", 0)),
             "correct_mcqs": int(analysis.get("correct_mcqs", 0)),
             "total_mcqs": int(analysis.get("total_mcqs", 1)),
             "correct_short": float(analysis.get("correct_short", 0)),
-            "total_short": int(analysis.get("total_short", 1))
+            "total_short": int(analysis.get("total_short", 1)),
+            "questions": question_results
         }
         
-        # Initialize history if needed
-        if 'attempts_history' not in st.session_state:
-            st.session_state.attempts_history = []
-            
-        st.session_state.attempts_history.append(attempt)
+        # Written by the log's background thread, so submitting never waits on disk
+        if not record(attempt):
+            st.warning("The server is busy and this attempt could not be saved to your history.")
+        
+        # Dwell times feed the shared per-item statistics of bank questions
+        times = st.session_state.time_per_question
+        timings = [
+            (q["bank_id"], times[index])
+            for index, q in enumerate(st.session_state.questions)
+            if q.get("bank_id") is not None and index in times
+        ]
+        if timings:
+            bank = get_question_bank()
+            bank.ensure_item_stats(attempt["topic_hash"])
+            bank.record_response_times(timings)
         
     except Exception as e:
         st.error(f"Failed to record attempt: {str(e)}")
\ No newline at end of file
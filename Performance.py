@@ -1,5 +1,11 @@
 import streamlit as st
+from json_repair import repair_stats
+from semantic_grading import grading_stats
+from artifact_cache import get_artifact_cache
 
 st.write("Firebase config exists:", "firebase" in st.secrets)
 if "firebase" in st.secrets:
-    st.write("Project ID:", st.secrets["firebase"]["project_id"])
\ No newline at end of file
+    st.write("Project ID:", st.secrets["firebase"]["project_id"])
+st.write("Model JSON parses (clean / repaired / failed):", repair_stats())
+st.write("Short answer verdicts (cached / model-graded / keyword fallback / requests):", grading_stats())
+st.write("Shared artifact/document store (entries / bytes in memory / budget):", get_artifact_cache().stats())
@@ -1,11 +1,12 @@
 import streamlit as st 
 from model import get_output
+from Intitialise import session_text
 
 # Process tasks like extracting topics or generating questions
 def process_task(task_name, prompt_template):
     st.title(f"🔍 {task_name}")
     with st.spinner("Processing... (AI is working)"):
-        user_input = st.session_state.get("custom_topic", "")
+        user_input = session_text("custom_topic")
         if user_input:
             prompt = prompt_template.format(user_input)
             st.session_state.response = get_output(prompt)
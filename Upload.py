@@ -1,12 +1,13 @@
 import streamlit as st
 import os
-from langchain_community.document_loaders import PyPDFLoader
+from Intitialise import set_session_text
 
 # Process user input (uploaded file or custom topic)
 def process_input(uploaded_file, custom_topic):
-    # Reset previous session state for input
-    st.session_state.custom_topic = None
-    st.session_state.file_content = None
+    # Reset previous session state for input. Text goes to the shared document store;
+    # when no topic is typed the topic is the document itself, so both ids match.
+    set_session_text("custom_topic", None)
+    set_session_text("file_content", None)
     st.session_state.uploaded_file = None
 
     if uploaded_file:
@@ -19,20 +20,18 @@ def process_input(uploaded_file, custom_topic):
                 with open(file_path, "wb") as f:
                     f.write(uploaded_file.getbuffer())
                 
-                # Extract text from PDF using LangChain's PyPDFLoader
+                # Extract text from PDF using LangChain's PyPDFLoader (imported only for PDFs)
+                from langchain_community.document_loaders import PyPDFLoader
                 loader = PyPDFLoader(file_path)
                 documents = loader.load()
                 text = "".join(doc.page_content for doc in documents)
                 
                 # Store the extracted text as file_content
-                st.session_state.file_content = text
+                set_session_text("file_content", text)
                 st.session_state.uploaded_file = file_path
                 
                 # If no custom topic is provided, use the extracted text as the topic
-                if not custom_topic:
-                    st.session_state.custom_topic = text
-                else:
-                    st.session_state.custom_topic = custom_topic
+                set_session_text("custom_topic", custom_topic or text)
                 
                 st.success("PDF uploaded and text extracted successfully!")
             except Exception as e:
@@ -44,15 +43,12 @@ def process_input(uploaded_file, custom_topic):
                 os.makedirs("temp", exist_ok=True)
                 with open(file_path, "wb") as f:
                     f.write(uploaded_file.getbuffer())
-                text = uploaded_file.read().decode("utf-8", errors="ignore")
-                st.session_state.file_content = text
+                text = uploaded_file.getvalue().decode("utf-8", errors="ignore")
+                set_session_text("file_content", text)
                 st.session_state.uploaded_file = file_path
                 
                 # If no custom topic is provided, use the file content as the topic
-                if not custom_topic:
-                    st.session_state.custom_topic = text
-                else:
-                    st.session_state.custom_topic = custom_topic
+                set_session_text("custom_topic", custom_topic or text)
                 
                 st.success("File uploaded and content extracted successfully!")
             except Exception as e:
@@ -60,9 +56,9 @@ def process_input(uploaded_file, custom_topic):
     
     elif custom_topic:
         # If only a manual topic is provided
-        st.session_state.custom_topic = custom_topic
+        set_session_text("custom_topic", custom_topic)
     
-    if st.session_state.custom_topic or st.session_state.uploaded_file:
+    if st.session_state.custom_topic_id or st.session_state.uploaded_file:
         st.session_state.page = "options"
         st.rerun()
     else:
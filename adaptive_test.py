@@ -0,0 +1,92 @@
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+from question_bank import get_question_bank
+
+# Ability grid for the expected-a-posteriori estimate
+THETA_GRID = np.linspace(-4, 4, 81)
+PRIOR = np.exp(-0.5 * THETA_GRID ** 2)
+# Step size of the incremental (Elo-style) item difficulty update
+DIFFICULTY_STEP = 0.3
+DEFAULT_MAX_ITEMS = 15
+# Stop early once the ability estimate is this precise
+TARGET_STANDARD_ERROR = 0.35
+
+
+def probability_correct(theta, difficulty, discrimination):
+    """Two-parameter logistic item response function"""
+    return 1.0 / (1.0 + np.exp(-discrimination * (theta - difficulty)))
+
+
+def estimate_ability(responses):
+    """EAP ability estimate and its standard error from [(difficulty, discrimination, correct)]"""
+    posterior = PRIOR.copy()
+    for difficulty, discrimination, correct in responses:
+        p = probability_correct(THETA_GRID, difficulty, discrimination)
+        posterior *= p if correct else 1.0 - p
+    posterior /= posterior.sum()
+    theta = float(np.dot(THETA_GRID, posterior))
+    se = float(math.sqrt(np.dot((THETA_GRID - theta) ** 2, posterior)))
+    return theta, se
+
+
+def _updated_item(stats: Dict, correct: bool, theta: float) -> Dict:
+    """Fold one response into an item's running statistics"""
+    x = 1.0 if correct else 0.0
+    p = float(probability_correct(theta, stats["difficulty"], stats["discrimination"]))
+    stats = dict(stats)
+    stats["attempts"] += 1
+    stats["sum_x"] += x
+    stats["sum_t"] += theta
+    stats["sum_xt"] += x * theta
+    stats["sum_tt"] += theta * theta
+    # Items answered correctly more often than expected get easier, and vice versa
+    stats["difficulty"] -= DIFFICULTY_STEP * (x - p) / math.sqrt(stats["attempts"])
+
+    # Discrimination from the point-biserial correlation between correctness and ability
+    n = stats["attempts"]
+    if n >= 5:
+        var_x = stats["sum_x"] / n - (stats["sum_x"] / n) ** 2
+        var_t = stats["sum_tt"] / n - (stats["sum_t"] / n) ** 2
+        if var_x > 1e-9 and var_t > 1e-9:
+            r = (stats["sum_xt"] / n - (stats["sum_x"] / n) * (stats["sum_t"] / n)) / math.sqrt(var_x * var_t)
+            r = max(min(r, 0.95), 0.05)
+            stats["discrimination"] = min(max(1.7 * r / math.sqrt(1 - r * r), 0.2), 3.0)
+    return stats
+
+
+def start_adaptive_test(content_hash: str, max_items: int = DEFAULT_MAX_ITEMS) -> Dict:
+    """New adaptive test state (kept in session state) for the bank items of ``content_hash``"""
+    get_question_bank().ensure_item_stats(content_hash)
+    return {
+        "content_hash": content_hash,
+        "theta": 0.0,
+        "se": 1.0,
+        "asked": [],
+        "responses": [],
+        "max_items": max_items
+    }
+
+
+def next_question(state: Dict) -> Optional[Dict]:
+    """Bank question best matched to the current ability estimate, or None when the test is over"""
+    if len(state["asked"]) >= state["max_items"]:
+        return None
+    if state["responses"] and state["se"] <= TARGET_STANDARD_ERROR:
+        return None
+    question = get_question_bank().nearest_item(state["content_hash"], state["theta"], state["asked"])
+    if question is not None:
+        state["asked"].append(question["bank_id"])
+    return question
+
+
+def record_response(state: Dict, question: Dict, correct: bool) -> None:
+    """Update the ability estimate and the shared item statistics after an answer"""
+    theta_before = state["theta"]
+    state["responses"].append((question["item_difficulty"], question["item_discrimination"], bool(correct)))
+    state["theta"], state["se"] = estimate_ability(state["responses"])
+    get_question_bank().update_item_stats(
+        question["bank_id"], lambda stats: _updated_item(stats, correct, theta_before)
+    )
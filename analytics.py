@@ -0,0 +1,143 @@
+"""
+Incremental analytics over the attempt log.
+
+Each user and each topic has a rollup of columnar NumPy arrays (one slot per attempt)
+plus running totals, updated as attempts are recorded. The analysis page only reads the
+precomputed totals and the last ``TREND_WINDOW`` slots, so it costs the same for a user
+with five attempts as for one with five thousand. Rollups are rebuilt from the attempt
+log once per server process.
+"""
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+
+from attempt_log import get_attempt_log
+
+TREND_WINDOW = 50
+WEAK_TOPIC_COUNT = 3
+
+
+class Rollup:
+    """Per-attempt columns and running totals for one user or one topic"""
+
+    COLUMNS = ("timestamp", "accuracy", "score", "total", "time_taken")
+
+    def __init__(self, capacity=16):
+        self.size = 0
+        self.columns = {name: np.zeros(capacity, dtype=np.float64) for name in self.COLUMNS}
+        self.score_sum = 0.0
+        self.question_sum = 0
+        self.time_sum = 0.0
+        # topic hash -> [attempts, score, questions, label of the latest attempt]
+        self.topics = {}
+
+    def add(self, attempt: Dict) -> None:
+        if self.size == len(self.columns["accuracy"]):
+            # Amortised O(1) append: double the columns when full
+            for name, column in self.columns.items():
+                self.columns[name] = np.concatenate([column, np.zeros_like(column)])
+        total = max(int(attempt.get("total", 0)), 0)
+        score = float(attempt.get("score", 0))
+        try:
+            timestamp = datetime.strptime(attempt.get("timestamp", ""), "%Y-%m-%d %H:%M:%S").timestamp()
+        except ValueError:
+            timestamp = 0.0
+        row = {
+            "timestamp": timestamp,
+            "accuracy": score / total * 100 if total else 0.0,
+            "score": score,
+            "total": total,
+            "time_taken": float(attempt.get("time_taken", 0))
+        }
+        for name, value in row.items():
+            self.columns[name][self.size] = value
+        self.size += 1
+        self.score_sum += score
+        self.question_sum += total
+        self.time_sum += row["time_taken"]
+
+        # Grouped by content hash; the label is only for display
+        label = attempt.get("topic") or "Untitled"
+        stats = self.topics.setdefault(attempt.get("topic_hash") or label, [0, 0.0, 0, label])
+        stats[0] += 1
+        stats[1] += score
+        stats[2] += total
+        stats[3] = label
+
+    def column(self, name: str, last: Optional[int] = None) -> np.ndarray:
+        data = self.columns[name][:self.size]
+        return data[-last:] if last else data
+
+    def summary(self) -> Dict:
+        recent = self.column("accuracy", TREND_WINDOW)
+        slope = 0.0
+        if len(recent) >= 2:
+            # Accuracy change per attempt over the recent window
+            slope = float(np.polyfit(np.arange(len(recent)), recent, 1)[0])
+        weakest = sorted(
+            ((stats[3], stats[1] / stats[2] * 100, stats[0]) for stats in self.topics.values() if stats[2]),
+            key=lambda item: item[1]
+        )[:WEAK_TOPIC_COUNT]
+        return {
+            "attempts": self.size,
+            "accuracy": self.score_sum / self.question_sum * 100 if self.question_sum else 0.0,
+            "time_per_question": self.time_sum / self.question_sum if self.question_sum else 0.0,
+            "recent_accuracy": recent.tolist(),
+            "trend": slope,
+            "weakest_topics": [{"topic": t, "accuracy": a, "attempts": n} for t, a, n in weakest]
+        }
+
+
+class Analytics:
+    """Per-user and per-topic rollups kept in step with the attempt log"""
+
+    def __init__(self):
+        self.users = {}
+        self.topics = {}
+        self._lock = threading.Lock()
+
+    def add(self, attempt: Dict) -> None:
+        with self._lock:
+            self.users.setdefault(attempt.get("user", "Anonymous"), Rollup()).add(attempt)
+            self.topics.setdefault(attempt.get("topic_hash") or attempt.get("topic"), Rollup()).add(attempt)
+
+    def user_summary(self, user: str) -> Optional[Dict]:
+        with self._lock:
+            rollup = self.users.get(user)
+            return rollup.summary() if rollup else None
+
+    def topic_summary(self, topic_hash: str) -> Optional[Dict]:
+        with self._lock:
+            rollup = self.topics.get(topic_hash)
+            return rollup.summary() if rollup else None
+
+
+_analytics = None
+_analytics_lock = threading.Lock()
+
+
+def get_analytics() -> Analytics:
+    """Process-wide rollups, built from the attempt log on first use"""
+    global _analytics
+    with _analytics_lock:
+        if _analytics is None:
+            log = get_attempt_log()
+            log.flush(timeout=5)
+            analytics = Analytics()
+            for attempt in log.read():
+                analytics.add(attempt)
+            _analytics = analytics
+        return _analytics
+
+
+def record(attempt: Dict) -> bool:
+    """Log an attempt and fold it into the rollups; False if the log dropped it"""
+    # Build the rollups before appending so a first-time rebuild can't count it twice
+    analytics = get_analytics()
+    if not get_attempt_log().append(attempt):
+        return False
+    analytics.add(attempt)
+    return True
+
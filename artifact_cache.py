@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+ARTIFACT_DIR = "artifacts"
+# In-memory budget shared by all sessions of this server process
+MAX_MEMORY_BYTES = 64 * 1024 * 1024
+# Uploaded documents and topics, referenced from session state by content hash
+DOCUMENT_KIND = "documents"
+MAX_DOCUMENT_DISK_BYTES = 1024 * 1024 * 1024
+
+
+def content_hash(data) -> str:
+    """Stable SHA-256 of text, bytes or any JSON-serialisable object"""
+    if isinstance(data, bytes):
+        raw = data
+    elif isinstance(data, str):
+        raw = data.encode("utf-8")
+    else:
+        raw = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class ArtifactCache:
+    """
+    Content-addressed cache of generated artifacts (HTML exports, rendered files, ...).
+
+    Entries live in a size-bounded in-memory LRU backed by files under ``ARTIFACT_DIR``,
+    so they are shared by every session and survive server restarts.
+    """
+
+    def __init__(self, directory=ARTIFACT_DIR, max_memory_bytes=MAX_MEMORY_BYTES):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, kind, key):
+        return os.path.join(self.directory, kind, key)
+
+    def _remember(self, cache_key, data):
+        with self._lock:
+            if cache_key in self._memory:
+                self._memory.move_to_end(cache_key)
+                return
+            self._memory[cache_key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def get(self, kind, key):
+        """Return the cached bytes for ``kind/key`` or None"""
+        cache_key = (kind, key)
+        with self._lock:
+            if cache_key in self._memory:
+                self._memory.move_to_end(cache_key)
+                return self._memory[cache_key]
+        try:
+            with open(self._path(kind, key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        self._remember(cache_key, data)
+        return data
+
+    def put(self, kind, key, data):
+        """Store ``data`` (str or bytes) under ``kind/key`` and return it as bytes"""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        path = self._path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file and rename so readers never see partial artifacts
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._remember((kind, key), data)
+        return data
+
+    def keys(self, kind):
+        """Keys of every artifact of ``kind`` stored on disk"""
+        try:
+            return [name for name in os.listdir(os.path.join(self.directory, kind)) if not name.endswith(".tmp")]
+        except FileNotFoundError:
+            return []
+
+    def prune(self, kind, max_bytes):
+        """Delete the oldest artifacts of ``kind`` on disk until they fit in ``max_bytes``"""
+        directory = os.path.join(self.directory, kind)
+        files = []
+        for name in self.keys(kind):
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._memory), "memory_bytes": self._memory_bytes,
+                    "max_memory_bytes": self.max_memory_bytes}
+
+    def get_or_create(self, kind, key, factory):
+        """Return the cached artifact, building it with ``factory()`` only on a miss"""
+        data = self.get(kind, key)
+        if data is None:
+            data = self.put(kind, key, factory())
+        return data
+
+
+_cache = None
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """Process-wide artifact cache shared by all Streamlit sessions"""
+    global _cache
+    if _cache is None:
+        _cache = ArtifactCache()
+    return _cache
+
+
+def put_document(text: str) -> str:
+    """
+    Store a document once for all sessions and return its id (the content hash).
+
+    Rewriting an existing document refreshes its modification time, so ``prune``
+    evicts documents nobody has uploaded recently first.
+    """
+    key = content_hash(text)
+    cache = get_artifact_cache()
+    cache.put(DOCUMENT_KIND, key, text)
+    cache.prune(DOCUMENT_KIND, MAX_DOCUMENT_DISK_BYTES)
+    return key
+
+
+def get_document(doc_id: str):
+    """Text of a stored document, or None if it has been evicted"""
+    data = get_artifact_cache().get(DOCUMENT_KIND, doc_id)
+    return data.decode("utf-8") if data is not None else None
@@ -0,0 +1,147 @@
+"""
+Durable, append-only log of mock test attempts.
+
+Attempts are handed to a background writer thread and appended to a JSONL file in
+batches, so recording an attempt never blocks the submit path and history survives
+logouts and server restarts. ``FSYNC_POLICY`` trades durability for throughput:
+
+* ``"batch"``  - fsync after every written batch (default)
+* ``"interval"`` - fsync at most every ``FSYNC_INTERVAL`` seconds
+* ``"never"``  - leave it to the OS
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+LOG_PATH = os.path.join("data", "attempts.jsonl")
+MAX_BATCH = 256
+# Longest an attempt waits in memory before it is written
+FLUSH_INTERVAL = 0.5
+FSYNC_POLICY = "batch"
+FSYNC_INTERVAL = 5.0
+
+
+class AttemptLog:
+    """Append-only JSONL attempt log with a single background writer"""
+
+    def __init__(self, path=LOG_PATH, fsync_policy=FSYNC_POLICY, max_queue=10000):
+        if fsync_policy not in ("batch", "interval", "never"):
+            raise ValueError(f"Unknown fsync policy: {fsync_policy}")
+        self.path = path
+        self.fsync_policy = fsync_policy
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._flushed = threading.Condition()
+        self._written = 0
+        self._enqueued = 0
+        # Attempts turned away because the writer fell ``max_queue`` behind
+        self.dropped = 0
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="attempt-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, attempt: Dict) -> bool:
+        """Queue an attempt for writing; returns immediately, False if the queue is full and it was dropped"""
+        with self._flushed:
+            # Counted under the lock before queueing so flush() never waits on a dropped attempt
+            try:
+                self._queue.put_nowait(attempt)
+            except queue.Full:
+                self.dropped += 1
+                logger.warning(f"Attempt log queue full, dropped attempt ({self.dropped} dropped so far)")
+                return False
+            self._enqueued += 1
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything appended so far is on disk; False on timeout"""
+        with self._flushed:
+            target = self._enqueued
+            return self._flushed.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+
+    def _run(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            stopping = False
+            while not stopping:
+                try:
+                    first = self._queue.get(timeout=FLUSH_INTERVAL)
+                except queue.Empty:
+                    self._maybe_fsync(f, idle=True)
+                    continue
+                batch = [first]
+                # Drain whatever else is waiting, up to one batch
+                while len(batch) < MAX_BATCH:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    stopping = True
+                    batch = [a for a in batch if a is not None]
+                try:
+                    f.write("".join(json.dumps(a, default=str) + "\n" for a in batch))
+                    f.flush()
+                    self._dirty = True
+                    self._maybe_fsync(f, force=stopping)
+                except (OSError, TypeError, ValueError) as e:
+                    logger.error(f"Failed to write {len(batch)} attempts: {e}")
+                with self._flushed:
+                    self._written += len(batch)
+                    self._flushed.notify_all()
+
+    def _maybe_fsync(self, f, force=False, idle=False):
+        if not self._dirty:
+            return
+        now = time.monotonic()
+        if not force:
+            if self.fsync_policy == "never" or (self.fsync_policy == "batch" and idle):
+                return
+            if self.fsync_policy == "interval" and now - self._last_fsync < FSYNC_INTERVAL:
+                return
+        os.fsync(f.fileno())
+        self._last_fsync = now
+        self._dirty = False
+
+    def read(self, user: Optional[str] = None) -> Iterator[Dict]:
+        """Yield logged attempts (optionally for one user), oldest first"""
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    attempt = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write
+                    continue
+                if user is None or attempt.get("user") == user:
+                    yield attempt
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_attempt_log() -> AttemptLog:
+    """Process-wide attempt log"""
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = AttemptLog()
+        return _log
@@ -0,0 +1,114 @@
+"""
+Benchmark bulk grading of mock test submissions.
+
+Compares the legacy per-question keyword loop from ``Analysis.analyze_performance``
+(substring checks, one question at a time) with ``grading.GradingEngine.grade_batch``.
+
+Usage: python bench_grading.py [num_submissions]
+"""
+import random
+import sys
+import time
+
+from grading import GradingEngine
+
+VOCABULARY = (
+    "plants sunlight energy convert chlorophyll light water carbon dioxide oxygen glucose "
+    "process leaves cells green pigment absorb produce release food chemical reaction "
+    "stomata roots transport sugar starch respiration mitochondria enzyme membrane "
+    "photon electron thylakoid stroma calvin cycle atp nadph fixation vascular xylem phloem"
+).split()
+
+
+def make_test(num_mcq=5, num_short=3, keywords_per_question=6):
+    questions = []
+    for i in range(num_mcq):
+        questions.append({"question": f"MCQ {i}", "type": "MCQ", "options": list("ABCD"), "answer": "C"})
+    for i in range(num_short):
+        questions.append({
+            "question": f"Short {i}",
+            "type": "Short Answer",
+            "answer": "reference answer",
+            "keywords": random.sample(VOCABULARY, keywords_per_question)
+        })
+    return questions
+
+
+def make_submissions(questions, count, words=40):
+    submissions = []
+    for _ in range(count):
+        answers = {}
+        for q in questions:
+            if q["type"] == "MCQ":
+                answers[q["question"]] = random.choice(q["options"])
+            else:
+                answers[q["question"]] = " ".join(random.choices(VOCABULARY, k=words))
+        submissions.append(answers)
+    return submissions
+
+
+def legacy_grade(questions, answers, time_taken=0.0):
+    """Scoring loop as it was written inline in analyze_performance, building the same analysis_results"""
+    correct_mcqs, total_mcqs = 0, 0
+    correct_short, total_short = 0.0, 0
+    correct_answers, incorrect_answers = [], []
+    for q in questions:
+        user_answer = str(answers.get(q["question"], "")).strip()
+        correct_answer = str(q["answer"]).strip()
+        if q["type"] == "MCQ":
+            total_mcqs += 1
+            is_correct = user_answer == correct_answer
+            correct_mcqs += is_correct
+            detail = {"question": q["question"], "user_answer": user_answer, "correct_answer": correct_answer,
+                      "explanation": q.get("explanation", ""), "type": "MCQ"}
+        else:
+            total_short += 1
+            keywords = [str(kw).strip().lower() for kw in q.get("keywords", [])]
+            user_answer_lower = user_answer.lower()
+            matched = sum(1 for kw in keywords if kw in user_answer_lower)
+            score = matched / len(keywords)
+            is_correct = score >= 0.6
+            if is_correct:
+                correct_short += score
+            detail = {"question": q["question"], "user_answer": user_answer, "correct_answer": correct_answer,
+                      "explanation": q.get("explanation", ""), "score": score, "matched_keywords": matched,
+                      "total_keywords": len(keywords), "type": "Short Answer"}
+        (correct_answers if is_correct else incorrect_answers).append(detail)
+    total_score = correct_mcqs + correct_short
+    return {
+        "correct_mcqs": correct_mcqs, "total_mcqs": total_mcqs, "correct_short": correct_short,
+        "total_short": total_short, "score": total_score, "total": len(questions),
+        "accuracy": (total_score / len(questions)) * 100 if questions else 0, "time_taken": float(time_taken),
+        "correct_answers": correct_answers, "incorrect_answers": incorrect_answers
+    }
+
+
+def run(count, keywords_per_question):
+    random.seed(7)
+    questions = make_test(keywords_per_question=keywords_per_question)
+    submissions = make_submissions(questions, count)
+
+    # Both keep their results, as a caller grading a batch would
+    start = time.perf_counter()
+    results = [legacy_grade(questions, answers) for answers in submissions]
+    legacy = time.perf_counter() - start
+    del results
+
+    start = time.perf_counter()
+    results = GradingEngine(questions).grade_batch(submissions)
+    engine = time.perf_counter() - start
+    del results
+
+    print(f"{keywords_per_question:>9} | {count / legacy:14.0f} | {count / engine:16.0f}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"{count} submissions of 5 MCQ + 3 short answers (submissions/s, full analysis_results)")
+    print(f"{'keywords':>9} | {'legacy loop':>14} | {'engine':>16}")
+    for keywords_per_question in (6, 12, 24):
+        run(count, keywords_per_question)
+
+
+if __name__ == "__main__":
+    main()
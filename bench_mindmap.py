@@ -0,0 +1,57 @@
+"""
+Benchmark mind map render time versus node count.
+
+Compares the fully labelled renderer (spring layout, one trace per edge) with the
+level-of-detail renderer (radial tree layout, collapsed subtrees, WebGL traces).
+Times cover layout, figure construction and JSON serialisation, which is what
+Streamlit ships to the browser.
+
+Usage: python bench_mindmap.py [max_full_nodes]
+"""
+import sys
+import time
+
+import networkx as nx
+
+from mindmap_render import build_full_figure, build_lod_figure, layout_positions
+
+SIZES = [50, 100, 300, 1000, 3000, 10000]
+SETTINGS = {"node_size": 30, "main_topic_color": "#FF5722", "subtopic_color": "#4CAF50", "starred_color": "#FF9800"}
+
+
+def synthetic_mindmap(num_nodes, branching=6):
+    """Balanced topic tree with ``branching`` children per node"""
+    G = nx.DiGraph()
+    G.add_node("n0", label="Topic 0", level=0)
+    for i in range(1, num_nodes):
+        parent = (i - 1) // branching
+        G.add_node(f"n{i}", label=f"Topic {i}", level=1)
+        G.add_edge(f"n{parent}", f"n{i}")
+    return G
+
+
+def time_render(render, G):
+    start = time.perf_counter()
+    fig = render(G)
+    payload = fig.to_json()
+    return (time.perf_counter() - start) * 1000, len(payload) / 1024
+
+
+def main():
+    max_full_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    print(f"{'nodes':>7} | {'full ms':>9} {'full KB':>9} | {'lod ms':>8} {'lod KB':>8}")
+    for n in SIZES:
+        G = synthetic_mindmap(n)
+        if n <= max_full_nodes:
+            full_ms, full_kb = time_render(
+                lambda g: build_full_figure(g, layout_positions(g, "Radial"), SETTINGS, {}), G
+            )
+            full = f"{full_ms:9.1f} {full_kb:9.1f}"
+        else:
+            full = f"{'skipped':>9} {'':>9}"
+        lod_ms, lod_kb = time_render(lambda g: build_lod_figure(g, SETTINGS, {}), G)
+        print(f"{n:>7} | {full} | {lod_ms:8.1f} {lod_kb:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Report import time for the app's cold start.
+
+Runs each scenario in a fresh interpreter with ``python -X importtime`` and summarises
+the captured timings: total import time, the slowest top-level imports, and which of
+the heavy dependencies were loaded. ``login`` is what a new session pays before the
+login page renders; ``all pages`` additionally imports every page module, which is
+what ``Hello1.py`` used to load up front.
+
+Usage: python bench_startup.py [top_n]
+"""
+import os
+import subprocess
+import sys
+
+SCENARIOS = {
+    "login": ["Hello1"],
+    "all pages": ["Hello1", "Upload", "Mindmap", "Mock_test", "Analysis", "Process", "topic_hierarchy", "utils"]
+}
+HEAVY_MODULES = [
+    "numpy", "networkx", "plotly", "pyvis", "groq", "firebase_admin", "google.cloud.firestore",
+    "langchain_community"
+]
+
+
+def import_times(modules):
+    """Run ``import <modules>`` with -X importtime; returns ({module: (self_us, cumulative_us)}, top-level order, error)"""
+    code = "; ".join(f"import {module}" for module in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    times, top_level = {}, []
+    error = None
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            if line.strip():
+                error = line.strip()
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the column header
+        name = fields[2].rstrip()
+        module = name.strip()
+        times[module] = (int(fields[0]), int(fields[1]))
+        if name.startswith(" ") and not name.startswith("  "):
+            top_level.append(module)
+    return times, top_level, error if proc.returncode else None
+
+
+def main():
+    top_n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for scenario, modules in SCENARIOS.items():
+        times, top_level, error = import_times(modules)
+        total = sum(times[module][1] for module in top_level)
+        print(f"\n{scenario}: {len(times)} modules, {total / 1000:.0f} ms")
+        if error:
+            print(f"  import failed: {error}")
+        for module in sorted(top_level, key=lambda m: -times[m][1])[:top_n]:
+            print(f"  {times[module][1] / 1000:8.1f} ms  {module}")
+        heavy = [module for module in HEAVY_MODULES if module in times]
+        print(f"  heavy modules loaded: {', '.join(heavy) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,24 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, auth
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import datetime
-from firebase_admin import firestore
+import time
+import logging
+import threading
+import atexit
+from storage import get_storage
+from write_queue import get_write_queue
+from artifact_cache import content_hash
 
-# Initialize Firebase Admin SDK
+logger = logging.getLogger(__name__)
+
+# Initialize Firebase Admin SDK. The SDK (and its gRPC/Google Cloud dependencies) is
+# imported on first use: signing in only needs the REST identity API.
 def initialize_firebase():
+    import firebase_admin
+    from firebase_admin import credentials
+
     try:
         if not firebase_admin._apps:
             firebase_creds = st.secrets["firebase"]
@@ -28,27 +39,51 @@ def initialize_firebase():
         st.error(f"Firebase initialization error: {str(e)}")
 
 # Authentication Functions
+IDENTITY_URL = "https://identitytoolkit.googleapis.com/v1/accounts:{}?key={}"
+TOKEN_URL = "https://securetoken.googleapis.com/v1/token?key={}"
+# Refresh the ID token this long before it expires
+TOKEN_REFRESH_MARGIN = 300
+HTTP_TIMEOUT = 10
+
+_http = None
+_http_lock = threading.Lock()
+
+def get_http_session():
+    """Keep-alive HTTP session shared by all auth calls, so logins reuse TLS connections"""
+    global _http
+    with _http_lock:
+        if _http is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=2)
+            session.mount("https://", adapter)
+            _http = session
+        return _http
+
+def _session_user(data):
+    """Session user record from an identitytoolkit sign-in/sign-up response"""
+    return {
+        "uid": data["localId"],
+        "email": data["email"],
+        "id_token": data["idToken"],
+        "refresh_token": data["refreshToken"],
+        "expires_at": time.time() + int(data.get("expiresIn", 3600)),
+        "verified": False
+    }
+
+def _identity_call(action, email, password):
+    api_key = st.secrets["firebase"]["api_key"]
+    payload = {
+        "email": email,
+        "password": password,
+        "returnSecureToken": True
+    }
+    response = get_http_session().post(IDENTITY_URL.format(action, api_key), json=payload, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
 def login_user(email, password):
     try:
-        api_key = st.secrets["firebase"]["api_key"]
-        url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={api_key}"
-        
-        payload = {
-            "email": email,
-            "password": password,
-            "returnSecureToken": True
-        }
-        
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        
-        data = response.json()
-        st.session_state.user = {
-            "uid": data["localId"],
-            "email": data["email"],
-            "id_token": data["idToken"],
-            "refresh_token": data["refreshToken"]
-        }
+        st.session_state.user = _session_user(_identity_call("signInWithPassword", email, password))
         return True
     except requests.exceptions.HTTPError as e:
         error_data = json.loads(e.response.text)
@@ -60,25 +95,7 @@ def login_user(email, password):
 
 def signup_user(email, password):
     try:
-        api_key = st.secrets["firebase"]["api_key"]
-        url = f"https://identitytoolkit.googleapis.com/v1/accounts:signUp?key={api_key}"
-        
-        payload = {
-            "email": email,
-            "password": password,
-            "returnSecureToken": True
-        }
-        
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        
-        data = response.json()
-        st.session_state.user = {
-            "uid": data["localId"],
-            "email": data["email"],
-            "id_token": data["idToken"],
-            "refresh_token": data["refreshToken"]
-        }
+        st.session_state.user = _session_user(_identity_call("signUp", email, password))
         return True
     except requests.exceptions.HTTPError as e:
         error_data = json.loads(e.response.text)
@@ -88,8 +105,66 @@ def signup_user(email, password):
         st.error(f"Signup error: {str(e)}")
         return False
 
+def refresh_id_token(user):
+    """Exchange the refresh token for a new ID token, updating ``user`` in place"""
+    api_key = st.secrets["firebase"]["api_key"]
+    response = get_http_session().post(
+        TOKEN_URL.format(api_key),
+        data={"grant_type": "refresh_token", "refresh_token": user["refresh_token"]},
+        timeout=HTTP_TIMEOUT
+    )
+    response.raise_for_status()
+    data = response.json()
+    user.update({
+        "id_token": data["id_token"],
+        "refresh_token": data["refresh_token"],
+        "expires_at": time.time() + int(data.get("expires_in", 3600)),
+        "verified": False
+    })
+    return user
+
+def verify_session_token(user):
+    """
+    Check the session's ID token, refreshing it shortly before expiry.
+
+    Signature verification is local: the Admin SDK caches Google's public signing keys
+    for as long as their Cache-Control allows, and a verified token is only checked
+    again after a refresh, so a normal page load makes no network call.
+    """
+    if time.time() > user.get("expires_at", 0) - TOKEN_REFRESH_MARGIN:
+        refresh_id_token(user)
+    if not user.get("verified"):
+        from firebase_admin import auth
+
+        initialize_firebase()
+        try:
+            claims = auth.verify_id_token(user["id_token"])
+        except auth.ExpiredIdTokenError:
+            # Clock skew or a refresh that failed earlier: refresh on the next check instead
+            user["expires_at"] = 0
+            raise RuntimeError("ID token expired before it was refreshed")
+        if claims.get("uid") != user["uid"]:
+            raise auth.InvalidIdTokenError("ID token belongs to a different user")
+        user["verified"] = True
+    return True
+
+def _session_rejected(error):
+    """
+    True if ``error`` is a definite refusal of the session: the refresh token was rejected
+    (invalid, revoked or expired) or the ID token failed verification. Network errors,
+    server errors and key fetch failures are transient and don't end the session.
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code in (400, 401, 403)
+    from firebase_admin import auth
+
+    return isinstance(error, (auth.InvalidIdTokenError, auth.UserDisabledError))
+
 def logout_user():
     if "user" in st.session_state:
+        # Pending star/unstar changes must reach Firestore before the session goes away
+        if not flush_starred_topics(st.session_state.user["uid"]):
+            st.warning("Some starred topic changes could not be saved yet; they will be retried.")
         del st.session_state.user
     st.session_state.clear()
     st.rerun()
@@ -98,29 +173,141 @@ def get_user():
     return st.session_state.get("user", None)
 
 def is_authenticated():
-    return "user" in st.session_state
+    user = st.session_state.get("user")
+    if user is None:
+        return False
+    if "expires_at" not in user:
+        # Users signed in before token tracking; nothing to verify
+        return True
+    try:
+        return verify_session_token(user)
+    except Exception as e:
+        if _session_rejected(e):
+            logger.warning(f"Session token rejected for {user.get('uid')}: {e}")
+            del st.session_state.user
+            return False
+        # Keep the session; the token is checked again on the next run
+        logger.warning(f"Could not verify session token for {user.get('uid')}, will retry: {e}")
+        return True
 
 # Firestore Database Functions
 def get_db():
-    if not firebase_admin._apps:
-        initialize_firebase()
+    from firebase_admin import firestore
+
+    initialize_firebase()
     return firestore.client()
 
+# Starred topics cache, kept per session: {user_id: {"version", "topics"}}.
+# Reads hit Firestore once; star/unstar write through so renders need no further reads.
+def _starred_cache():
+    if "_starred_cache" not in st.session_state:
+        st.session_state._starred_cache = {}
+    return st.session_state._starred_cache
+
+def _cache_write_through(user_id, topic_id, topic_data=None):
+    """Apply a successful write to the cached copy (``topic_data=None`` removes the topic)"""
+    entry = _starred_cache().get(user_id)
+    if entry is None:
+        return
+    if topic_data is None:
+        entry["topics"].pop(topic_id, None)
+    else:
+        entry["topics"][topic_id] = dict(topic_data)
+    entry["version"] += 1
+
+# Star/unstar changes waiting to be written, per user: {user_id: {topic_id: data or None}}.
+# Rapid clicks collapse into one batched field-level write per user after STAR_DEBOUNCE_SECONDS.
+STAR_DEBOUNCE_SECONDS = 1.5
+# Failed writes are retried after doubling delays, capped at this
+STAR_RETRY_MAX_SECONDS = 60
+_pending_star_writes = {}
+_star_timers = {}
+_star_failures = {}
+_star_lock = threading.Lock()
+
+def _arm_star_timer(user_id, delay):
+    """(Re)start the user's flush timer; caller holds _star_lock"""
+    timer = _star_timers.pop(user_id, None)
+    if timer is not None:
+        timer.cancel()
+    timer = threading.Timer(delay, flush_starred_topics, args=(user_id,))
+    timer.daemon = True
+    _star_timers[user_id] = timer
+    timer.start()
+
+def _queue_star_write(user_id, topic_id, topic_data):
+    _cache_write_through(user_id, topic_id, topic_data)
+    with _star_lock:
+        _pending_star_writes.setdefault(user_id, {})[topic_id] = dict(topic_data) if topic_data else None
+        _arm_star_timer(user_id, STAR_DEBOUNCE_SECONDS)
+
+def flush_starred_topics(user_id):
+    """Write a user's pending star/unstar changes as one batched field-path update"""
+    with _star_lock:
+        changes = _pending_star_writes.pop(user_id, None)
+        timer = _star_timers.pop(user_id, None)
+    if timer is not None:
+        timer.cancel()
+    if not changes:
+        return True
+    try:
+        get_storage().apply_starred_changes(user_id, changes)
+        with _star_lock:
+            _star_failures.pop(user_id, None)
+        return True
+    except Exception as e:
+        # Put the changes back unless newer ones for the same topics arrived meanwhile,
+        # and retry them with exponential backoff
+        with _star_lock:
+            pending = _pending_star_writes.setdefault(user_id, {})
+            for topic_id, data in changes.items():
+                pending.setdefault(topic_id, data)
+            failures = _star_failures[user_id] = _star_failures.get(user_id, 0) + 1
+            delay = min(STAR_DEBOUNCE_SECONDS * 2 ** failures, STAR_RETRY_MAX_SECONDS)
+            _arm_star_timer(user_id, delay)
+        logger.error(f"Error saving starred topics for {user_id} (retrying in {delay:.1f} s): {e}")
+        return False
+
+def flush_all_starred_topics():
+    with _star_lock:
+        user_ids = list(_pending_star_writes)
+    return all([flush_starred_topics(user_id) for user_id in user_ids])
+
+atexit.register(flush_all_starred_topics)
+
+def invalidate_starred_topics(user_id=None):
+    """Drop the cached starred topics of one user (or all users) so the next read refetches"""
+    pages = st.session_state.get("_starred_pages", {})
+    if user_id is None:
+        _starred_cache().clear()
+        pages.clear()
+    else:
+        _starred_cache().pop(user_id, None)
+        pages.pop(user_id, None)
+
+def starred_topics_version(user_id):
+    """Version stamp of the cached starred topics, bumped on every write; None if not cached"""
+    entry = _starred_cache().get(user_id)
+    return entry["version"] if entry else None
+
 def save_starred_topic(user_id: str, topic_id: str, topic_data: dict) -> bool:
     """
     Save a complete topic with all metadata to Firestore.
     
+    The change is visible immediately through the starred topics cache and written
+    with the user's other pending changes in one batch after STAR_DEBOUNCE_SECONDS.
+    
     Args:
         user_id: The user's unique ID from Firebase Auth
         topic_id: A unique identifier for the topic (recommended format: "main_topic_subtopic")
         topic_data: Dictionary containing topic metadata with required keys:
             - main_topic: str
-            - subtopic: str
+            - subtopic (or point): str
             - content: str
             - starred: bool
     
     Returns:
-        bool: True if successful, False if failed
+        bool: True if the change was accepted, False if the data is invalid
     
     Example:
         topic_data = {
@@ -133,8 +320,8 @@ def save_starred_topic(user_id: str, topic_id: str, topic_data: dict) -> bool:
     """
     
     # Validate input data
-    required_keys = ["main_topic", "subtopic", "content", "starred"]
-    if not all(key in topic_data for key in required_keys):
+    required_keys = ["main_topic", "content", "starred"]
+    if not all(key in topic_data for key in required_keys) or not ("subtopic" in topic_data or "point" in topic_data):
         st.error("Invalid topic data structure. Missing required fields.")
         return False
     
@@ -142,76 +329,105 @@ def save_starred_topic(user_id: str, topic_id: str, topic_data: dict) -> bool:
         st.error("Starred status must be boolean")
         return False
     
-    try:
-        db = get_db()
-        user_ref = db.collection("user_topics").document(user_id)
-        
-        # Add timestamp and ensure consistent data structure
-        topic_data.update({
-            "timestamp": datetime.datetime.now().isoformat(),
-            "last_updated": datetime.datetime.now().isoformat()
-        })
-        
-        # Atomic update using transaction
-        @firestore.transactional
-        def update_starred_topic(transaction, user_ref):
-            doc = user_ref.get(transaction=transaction)
-            current_data = doc.to_dict() or {}
-            starred_topics = current_data.get("starred_topics", {})
-            
-            # Update only the specified topic
-            starred_topics[topic_id] = topic_data
-            
-            transaction.set(user_ref, {
-                "starred_topics": starred_topics,
-                "last_updated": topic_data["last_updated"]
-            }, merge=True)
-        
-        # Run the transaction
-        transaction = db.transaction()
-        update_starred_topic(transaction, user_ref)
-        
-        return True
-        
-    except firestore.exceptions.FirestoreError as e:
-        st.error(f"Firestore error while saving topic: {str(e)}")
-        return False
-    except ValueError as e:
-        st.error(f"Invalid data format: {str(e)}")
-        return False
-    except Exception as e:
-        st.error(f"Unexpected error saving topic: {str(e)}")
-        return False
+    # Add timestamp and ensure consistent data structure
+    topic_data.update({
+        "timestamp": datetime.datetime.now().isoformat(),
+        "last_updated": datetime.datetime.now().isoformat()
+    })
+    # Optimistic: visible immediately, written to Firestore by the debounced flush.
+    # Unstarred topics are deleted rather than kept with starred=False.
+    _queue_star_write(user_id, topic_id, topic_data if topic_data["starred"] else None)
+    return True
 
-def get_starred_topics(user_id):
-    """Retrieve all starred topics with complete metadata"""
-    try:
-        db = get_db()
-        doc_ref = db.collection("user_topics").document(user_id)
-        doc = doc_ref.get()
-        
-        if doc.exists:
-            starred_data = doc.to_dict().get("starred_topics", {})
-            # Filter to only return starred items
-            return {k: v for k, v in starred_data.items() if v.get("starred", False)}
-        return {}
-    except Exception as e:
-        st.error(f"Error loading starred topics: {str(e)}")
-        return {}
+def get_starred_topics(user_id, refresh=False):
+    """Retrieve all starred topics with complete metadata, from the session cache when possible"""
+    cache = _starred_cache()
+    entry = cache.get(user_id)
+    if entry is None or refresh:
+        try:
+            starred_data = get_storage().get_starred_topics(user_id)
+            # Keep optimistic changes that haven't been flushed yet
+            with _star_lock:
+                pending = dict(_pending_star_writes.get(user_id, {}))
+            for topic_id, data in pending.items():
+                if data is None:
+                    starred_data.pop(topic_id, None)
+                else:
+                    starred_data[topic_id] = data
+        except Exception as e:
+            st.error(f"Error loading starred topics: {str(e)}")
+            return {}
+        entry = cache[user_id] = {
+            "version": (entry["version"] + 1) if entry else 1,
+            "topics": dict(starred_data)
+        }
+    # Filter to only return starred items
+    return {k: v for k, v in entry["topics"].items() if v.get("starred", False)}
+
+STARRED_PAGE_SIZE = 20
+
+def get_starred_topics_page(user_id, cursor=None, page_size=STARRED_PAGE_SIZE):
+    """
+    One page of starred topics, newest first, and the cursor of the next page.
+
+    Pages are read with cursor-based queries and cached in the session until the
+    starred topics version changes, so paging back and forth costs no extra reads.
+    """
+    pages = st.session_state.setdefault("_starred_pages", {})
+    version = starred_topics_version(user_id)
+    cached = pages.get(user_id)
+    if cached is None or cached["version"] != version:
+        cached = pages[user_id] = {"version": version, "pages": {}}
+    if cursor not in cached["pages"]:
+        # The page must include clicks still waiting for their debounce
+        flush_starred_topics(user_id)
+        try:
+            cached["pages"][cursor] = get_storage().starred_topics_page(user_id, page_size, cursor)
+        except Exception as e:
+            st.error(f"Error loading starred topics: {str(e)}")
+            return [], None
+    return cached["pages"][cursor]
 
 def unstar_topic(user_id, topic_id):
     """Remove a topic from starred topics"""
-    try:
-        db = get_db()
-        user_ref = db.collection("user_topics").document(user_id)
-        
-        user_ref.update({
-            f"starred_topics.{topic_id}": firestore.DELETE_FIELD
-        })
-        return True
-    except Exception as e:
-        st.error(f"Error unstarring topic: {str(e)}")
-        return False
+    _queue_star_write(user_id, topic_id, None)
+    return True
+
+def save_flowchart(user_id, mindmap_text, timestamp=None):
+    """
+    Queue a mind map / flowchart for saving and return its id, or None if the queue is full.
+
+    The id is the content hash of the user and the mind map, so saving the same map
+    twice (or retrying) overwrites one document instead of creating duplicates.
+    """
+    mindmap_id = content_hash([user_id, mindmap_text])
+    record = {
+        "content": mindmap_text,
+        "saved_at": timestamp or datetime.datetime.now().isoformat()
+    }
+    start = mindmap_text.find("{")
+    if start != -1:
+        try:
+            record["mindmap"] = json.loads(mindmap_text[start:])
+        except json.JSONDecodeError:
+            pass
+    accepted = get_write_queue().submit(
+        mindmap_id, lambda: get_storage().save_mindmap(user_id, mindmap_id, record)
+    )
+    return mindmap_id if accepted else None
+
+def flowchart_save_status(mindmap_id):
+    """"pending", "done" or "failed" for an id returned by save_flowchart"""
+    return get_write_queue().status(mindmap_id)
+
+def save_user_artifact(user_id, kind, name, data):
+    """
+    Queue a generated artifact (question paper, mock test set, ...) for compressed,
+    chunked storage; returns the write key, or None if the queue is full.
+    """
+    key = content_hash([user_id, kind, name, content_hash(data)])
+    accepted = get_write_queue().submit(key, lambda: get_storage().save_artifact(user_id, kind, name, data))
+    return key if accepted else None
 
 def initialize_user_topics(user_id):
     """Initialize a user's topics document if it doesn't exist"""
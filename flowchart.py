@@ -0,0 +1,211 @@
+"""
+Local flowchart generation from mind map graphs.
+
+Converts mind map JSON (nodes with id/label/level, edges with from/to) into Mermaid or
+Graphviz DOT source using the user's ``flowchart_settings`` colours, without a model call.
+
+Bulk export of every cached topic hierarchy and saved ``mindmap_*.txt`` file:
+    python flowchart.py --format mermaid --out flowcharts
+"""
+import argparse
+import glob
+import html
+import io
+import json
+import os
+import re
+import time
+import zipfile
+
+from artifact_cache import get_artifact_cache
+
+DEFAULT_SETTINGS = {
+    "main_topic_color": "#4CAF50",
+    "subtopic_color": "#FFECB3",
+    "starred_color": "#FFD700"
+}
+
+FORMATS = {"mermaid": ".mmd", "dot": ".dot", "html": ".html"}
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Mermaid Flowchart</title>
+    <script src="https://cdn.jsdelivr.net/npm/mermaid/dist/mermaid.min.js"></script>
+    <script>
+        mermaid.initialize({{ startOnLoad: true, theme: 'default' }});
+    </script>
+    <style>
+        .mermaid {{
+            height: 750px;
+            width: 100%;
+        }}
+    </style>
+</head>
+<body>
+    <div class="mermaid">
+{source}
+    </div>
+</body>
+</html>
+"""
+
+
+def _node_id(node_id, index):
+    """Mermaid/DOT safe identifier; the index keeps sanitised ids unique"""
+    return f"n{index}_{re.sub(r'[^A-Za-z0-9_]', '_', str(node_id))[:40]}"
+
+
+def _node_classes(mindmap_data, starred_topics):
+    """Yield (raw id, safe id, label, class) for every node, class being main/sub/starred"""
+    for index, node in enumerate(mindmap_data.get("nodes", [])):
+        if (starred_topics or {}).get(node["label"], False):
+            node_class = "starred"
+        elif node.get("level", 1) == 0:
+            node_class = "main"
+        else:
+            node_class = "sub"
+        yield node["id"], _node_id(node["id"], index), node["label"], node_class
+
+
+# Characters that end or reshape a quoted Mermaid label, as Mermaid entity codes; each
+# character is replaced once, so the "#" of a code is never escaped again
+_MERMAID_ENTITIES = {"#": "#35;", '"': "#quot;", "[": "#91;", "]": "#93;", "|": "#124;", "<": "#lt;", ">": "#gt;"}
+
+
+def _mermaid_label(label):
+    """Label text for a quoted Mermaid node label; line breaks become <br>"""
+    text = "".join(_MERMAID_ENTITIES.get(char, char) for char in str(label))
+    return "<br>".join(text.splitlines())
+
+
+def to_mermaid(mindmap_data, settings=None, starred_topics=None, direction="TB"):
+    """Mermaid flowchart source for a mind map graph"""
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    lines = [f"graph {direction};"]
+    ids = {}
+    members = {"main": [], "sub": [], "starred": []}
+    for raw_id, safe_id, label, node_class in _node_classes(mindmap_data, starred_topics):
+        ids[raw_id] = safe_id
+        text = _mermaid_label(label)
+        shape = f'(["{text}"])' if node_class == "main" else f'["{text}"]'
+        lines.append(f"{safe_id}{shape}")
+        members[node_class].append(safe_id)
+    for edge in mindmap_data.get("edges", []):
+        if edge.get("from") in ids and edge.get("to") in ids:
+            lines.append(f"{ids[edge['from']]} --> {ids[edge['to']]}")
+
+    colors = {"main": "main_topic_color", "sub": "subtopic_color", "starred": "starred_color"}
+    for node_class, setting in colors.items():
+        if members[node_class]:
+            lines.append(f"classDef {node_class} fill:{settings[setting]},stroke:#333,stroke-width:2px")
+            lines.append(f"class {','.join(members[node_class])} {node_class}")
+    return "\n".join(lines)
+
+
+def to_dot(mindmap_data, settings=None, starred_topics=None, rankdir="TB"):
+    """Graphviz DOT source for a mind map graph"""
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    colors = {
+        "main": settings["main_topic_color"],
+        "sub": settings["subtopic_color"],
+        "starred": settings["starred_color"]
+    }
+    lines = [
+        "digraph mindmap {",
+        f"    rankdir={rankdir};",
+        '    node [style=filled, color="#333333", penwidth=2];'
+    ]
+    ids = {}
+    for raw_id, safe_id, label, node_class in _node_classes(mindmap_data, starred_topics):
+        ids[raw_id] = safe_id
+        text = str(label).replace("\\", "\\\\").replace('"', '\\"')
+        shape = "hexagon" if node_class == "main" else "box"
+        lines.append(f'    {safe_id} [label="{text}", shape={shape}, fillcolor="{colors[node_class]}"];')
+    for edge in mindmap_data.get("edges", []):
+        if edge.get("from") in ids and edge.get("to") in ids:
+            lines.append(f"    {ids[edge['from']]} -> {ids[edge['to']]};")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def to_html(mindmap_data, settings=None, starred_topics=None):
+    """Standalone HTML page rendering the Mermaid flowchart in the browser"""
+    # Labels come from user documents and the model; Mermaid reads the decoded text
+    source = html.escape(to_mermaid(mindmap_data, settings, starred_topics), quote=False)
+    return HTML_TEMPLATE.format(source=source)
+
+
+RENDERERS = {"mermaid": to_mermaid, "dot": to_dot, "html": to_html}
+
+
+def load_saved_mindmap(path):
+    """Read a saved ``mindmap_*.txt`` / ``flowchart_*.txt`` file ("... Data (JSON):" header + JSON)"""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    start = text.find("{")
+    if start == -1:
+        return None
+    try:
+        data = json.loads(text[start:])
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) and "nodes" in data else None
+
+
+def cached_mindmaps():
+    """Yield (name, mindmap data) for every topic hierarchy in the artifact cache"""
+    from topic_hierarchy import to_mindmap_data
+
+    cache = get_artifact_cache()
+    for key in cache.keys("topic_hierarchy"):
+        data = cache.get("topic_hierarchy", key)
+        if data is not None:
+            yield f"topics_{key[:12]}", to_mindmap_data(json.loads(data))
+
+
+def export_zip(mindmaps, fmt="mermaid", settings=None, starred_topics=None):
+    """Zip archive (bytes) with one flowchart file per (name, mindmap data) pair"""
+    render = RENDERERS[fmt]
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, mindmap_data in mindmaps:
+            archive.writestr(name + FORMATS[fmt], render(mindmap_data, settings, starred_topics))
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export mind maps as Mermaid/DOT flowcharts without a model call")
+    parser.add_argument("files", nargs="*", help="saved mind map files (default: mindmap_*.txt plus the artifact cache)")
+    parser.add_argument("--format", choices=sorted(RENDERERS), default="mermaid")
+    parser.add_argument("--out", default="flowcharts", help="output directory")
+    parser.add_argument("--settings", help="JSON file with flowchart_settings colours")
+    args = parser.parse_args()
+
+    settings = None
+    if args.settings:
+        with open(args.settings, "r") as f:
+            settings = json.load(f)
+
+    def sources():
+        for path in args.files or sorted(glob.glob("mindmap_*.txt")):
+            data = load_saved_mindmap(path)
+            if data is not None:
+                yield os.path.splitext(os.path.basename(path))[0], data
+        if not args.files:
+            yield from cached_mindmaps()
+
+    os.makedirs(args.out, exist_ok=True)
+    start = time.perf_counter()
+    count = 0
+    for name, data in sources():
+        with open(os.path.join(args.out, name + FORMATS[args.format]), "w", encoding="utf-8") as f:
+            f.write(RENDERERS[args.format](data, settings))
+        count += 1
+    elapsed = time.perf_counter() - start
+    print(f"Exported {count} flowcharts to {args.out}/ in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Offline batch grading of mock test submissions.
+
+Reads a JSONL file with one attempt per line::
+
+    {"id": "s1", "questions": [...], "answers": {"<question>": "<answer>"}, "time_taken": 312.5}
+
+grades it with the same rules as ``Analysis.analyze_performance`` (``grading.GradingEngine``)
+in a process pool, and streams results to JSONL (full ``analysis_results``) or CSV (one
+summary row per attempt) in input order:
+
+    python grade_batch.py class_submissions.jsonl --out results.csv --workers 4
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from artifact_cache import content_hash
+from grading import GradingEngine
+
+CHUNK_SIZE = 500
+CSV_FIELDS = [
+    "id", "score", "total", "accuracy", "correct_mcqs", "total_mcqs",
+    "correct_short", "total_short", "time_taken", "error"
+]
+
+# Engines compiled by this worker process, keyed by the hash of the question set, so a
+# class taking the same test pays for keyword compilation once per worker
+_engines = {}
+
+
+def _engine_for(questions):
+    key = content_hash(questions)
+    engine = _engines.get(key)
+    if engine is None:
+        if len(_engines) >= 64:
+            _engines.clear()
+        engine = _engines[key] = GradingEngine(questions)
+    return engine
+
+
+def parse_record(line):
+    """(record, answers, time taken, error) for one JSONL line; error is None for a gradable record"""
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        return None, None, None, f"invalid JSON: {e}"
+    if not isinstance(record, dict):
+        return None, None, None, "record is not a JSON object"
+    questions = record.get("questions")
+    if not isinstance(questions, list) or not questions:
+        return record, None, None, "missing questions"
+    answers = record.get("answers") or {}
+    if not isinstance(answers, dict):
+        return record, None, None, "answers is not a JSON object"
+    try:
+        time_taken = float(record.get("time_taken", 0) or 0)
+    except (TypeError, ValueError):
+        return record, None, None, f"invalid time_taken: {record.get('time_taken')!r}"
+    return record, answers, time_taken, None
+
+
+def grade_chunk(lines):
+    """Grade a chunk of raw JSONL lines; returns one result dict per line"""
+    # Records are validated one by one, so a malformed line only fails itself
+    parsed = [(line_no, *parse_record(line)) for line_no, line in lines]
+
+    # Group the chunk by question set so each engine grades its submissions in one batch
+    groups = {}
+    for position, (_, record, _, _, error) in enumerate(parsed):
+        if error is None:
+            groups.setdefault(content_hash(record["questions"]), []).append(position)
+
+    results = [None] * len(parsed)
+    errors = [error for *_, error in parsed]
+    for positions in groups.values():
+        questions = parsed[positions[0]][1]["questions"]
+        try:
+            graded = _engine_for(questions).grade_batch(
+                [parsed[p][2] for p in positions], [parsed[p][3] for p in positions]
+            )
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            # Only a malformed question set gets here, shared by every record in the group
+            for p in positions:
+                errors[p] = f"grading failed: {e}"
+            continue
+        for p, result in zip(positions, graded):
+            results[p] = result
+
+    output = []
+    for (line_no, record, *_), error, result in zip(parsed, errors, results):
+        attempt_id = (record or {}).get("id", line_no)
+        if result is None:
+            output.append({"id": attempt_id, "error": error or "grading failed"})
+        else:
+            output.append({"id": attempt_id, **result})
+    return output
+
+
+def read_chunks(path, chunk_size):
+    """Yield lists of (line number, line) from a JSONL file (``-`` for stdin)"""
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        numbered = ((n, line) for n, line in enumerate(f, 1) if line.strip())
+        while True:
+            chunk = list(islice(numbered, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def graded_chunks(chunks, workers):
+    """Grade chunks in a process pool, yielding results in input order.
+
+    At most two chunks per worker are in flight, so memory stays bounded however large
+    the input file is.
+    """
+    if workers <= 1:
+        yield from map(grade_chunk, chunks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(grade_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade a JSONL file of mock test submissions")
+    parser.add_argument("input", help="submissions JSONL file, or - for stdin")
+    parser.add_argument("--out", default="-", help="output file (.jsonl or .csv), or - for stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="output format (default: from --out extension)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.out.endswith(".csv") else "jsonl")
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8", newline="")
+    writer = csv.DictWriter(out, CSV_FIELDS, extrasaction="ignore") if fmt == "csv" else None
+    if writer:
+        writer.writeheader()
+
+    start = time.perf_counter()
+    graded = failed = 0
+    try:
+        for chunk_results in graded_chunks(read_chunks(args.input, args.chunk_size), args.workers):
+            for result in chunk_results:
+                if "error" in result:
+                    failed += 1
+                else:
+                    graded += 1
+                if writer:
+                    writer.writerow(result)
+                else:
+                    out.write(json.dumps(result) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    rate = graded / elapsed if elapsed > 0 else 0
+    print(f"Graded {graded} submissions ({failed} failed) in {elapsed:.2f} s, {rate:.0f} submissions/s "
+          f"with {args.workers} worker(s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
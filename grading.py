@@ -0,0 +1,127 @@
+"""
+Bulk grading engine for mock tests.
+
+A test's keywords are prepared once and a whole batch of submissions is graded in one
+call. Scoring rules are the ones used by ``Analysis.analyze_performance``: MCQs need an
+exact option match, short answers need 60% of their keywords (or an exact answer match
+when they have no keywords). Keywords match as substrings of the answer, as the legacy
+loop did.
+"""
+from typing import Dict, List, Optional
+
+KEYWORD_THRESHOLD = 0.6
+
+
+class GradingEngine:
+    """Grades submissions for one test (a fixed list of questions)"""
+
+    def __init__(self, questions: List[Dict]):
+        self.questions = questions
+        self.is_mcq = [q.get("type") == "MCQ" for q in questions]
+
+        # Distinct keywords per question with a weight: duplicate keywords in a question
+        # still count towards its total
+        self.keyword_counts = [0] * len(questions)
+        self._keywords = []
+        for index, q in enumerate(questions):
+            weights = {}
+            if not self.is_mcq[index]:
+                for kw in q.get("keywords", []):
+                    self.keyword_counts[index] += 1
+                    key = str(kw).strip().lower()
+                    weights[key] = weights.get(key, 0) + 1
+            self._keywords.append(list(weights.items()))
+        self._keyword_questions = [i for i, count in enumerate(self.keyword_counts) if count]
+
+    def _short_matches(self, submissions: List[Dict[str, str]]) -> List[List[int]]:
+        """Matched keyword counts per submission and question"""
+        # Each keyword counts once if it occurs anywhere in the answer
+        matched = [[0] * len(self.questions) for _ in submissions]
+        for q_index in self._keyword_questions:
+            question = self.questions[q_index]["question"]
+            weights = self._keywords[q_index]
+            for counts, answers in zip(matched, submissions):
+                text = str(answers.get(question, "")).lower()
+                counts[q_index] = sum([weight for kw, weight in weights if kw in text])
+        return matched
+
+    def score_answer(self, q_index: int, answer: str):
+        """(is_correct, score, matched keywords, total keywords) for a single answer"""
+        q = self.questions[q_index]
+        answer = str(answer).strip()
+        if self.is_mcq[q_index]:
+            is_correct = answer == str(q["answer"]).strip()
+            return is_correct, float(is_correct), 0, 0
+        total = self.keyword_counts[q_index]
+        if total:
+            matched = self._short_matches([{q["question"]: answer}])[0][q_index]
+            score = matched / total
+            return score >= KEYWORD_THRESHOLD, score, matched, total
+        is_correct = answer.lower() == str(q["answer"]).strip().lower()
+        return is_correct, float(is_correct), 0, 0
+
+    def grade_batch(self, submissions: List[Dict[str, str]], times: Optional[List[float]] = None) -> List[Dict]:
+        """Grade many {question: answer} submissions, returning one ``analysis_results`` dict each"""
+        n_q = len(self.questions)
+        times = times if times is not None else [0.0] * len(submissions)
+        is_mcq = self.is_mcq
+        counts = self.keyword_counts
+        total_mcqs = sum(is_mcq)
+        total_short = n_q - total_mcqs
+        expected = [str(q["answer"]).strip() for q in self.questions]
+        # Compared against: exact option for MCQs, case-insensitive answer for short answers without keywords
+        targets = [e if mcq else e.lower() for e, mcq in zip(expected, is_mcq)]
+        matched_rows = self._short_matches(submissions)
+        # (question, type label, explanation) per question, shared by every submission
+        static = [
+            (q["question"], "MCQ" if mcq else "Short Answer", q.get("explanation", ""))
+            for q, mcq in zip(self.questions, is_mcq)
+        ]
+
+        results = []
+        for answers, matched, time_taken in zip(submissions, matched_rows, times):
+            correct_answers, incorrect_answers = [], []
+            correct_mcqs, correct_short = 0, 0.0
+            for q_index, (question, label, explanation) in enumerate(static):
+                user_answer = str(answers.get(question, "")).strip()
+                detail = {
+                    "index": q_index,
+                    "question": question,
+                    "user_answer": user_answer,
+                    "correct_answer": expected[q_index],
+                    "explanation": explanation,
+                    "type": label
+                }
+                if is_mcq[q_index]:
+                    is_correct = user_answer == targets[q_index]
+                    correct_mcqs += is_correct
+                else:
+                    total = counts[q_index]
+                    if total:
+                        score = matched[q_index] / total
+                        is_correct = score >= KEYWORD_THRESHOLD
+                    else:
+                        is_correct = user_answer.lower() == targets[q_index]
+                        score = float(is_correct)
+                    # Short answers earn partial keyword credit once they pass the threshold
+                    if is_correct:
+                        correct_short += score
+                    detail.update({"score": score, "matched_keywords": matched[q_index], "total_keywords": total})
+                (correct_answers if is_correct else incorrect_answers).append(detail)
+            total_score = float(correct_mcqs + correct_short)
+            results.append({
+                "correct_mcqs": int(correct_mcqs),
+                "total_mcqs": total_mcqs,
+                "correct_short": float(correct_short),
+                "total_short": total_short,
+                "score": total_score,
+                "total": n_q,
+                "accuracy": (total_score / n_q) * 100 if n_q > 0 else 0,
+                "time_taken": float(time_taken),
+                "correct_answers": correct_answers,
+                "incorrect_answers": incorrect_answers
+            })
+        return results
+
+    def grade(self, answers: Dict[str, str], time_taken: float = 0.0) -> Dict:
+        return self.grade_batch([answers], [time_taken])[0]
@@ -0,0 +1,124 @@
+import json
+import logging
+import re
+import threading
+
+logger = logging.getLogger(__name__)
+
+_FENCE_RE = re.compile(r'```(?:json|JSON)?\s*\n?(.*?)(?:```|$)', re.DOTALL)
+
+# Process-wide counters so we can see how many re-generations the repair step saves
+_stats = {"clean": 0, "repaired": 0, "failed": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def repair_stats():
+    """Snapshot of clean / repaired / failed parse counts since process start"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _strip_wrapping(text):
+    """Drop markdown fences and any prose before the first JSON bracket"""
+    fenced = _FENCE_RE.search(text)
+    if fenced and fenced.group(1).strip():
+        text = fenced.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    return text[min(starts):] if starts else ""
+
+
+def _scan(text):
+    """
+    Single pass over ``text`` that removes trailing commas, stops at the end of the
+    first complete JSON value and closes truncated arrays/objects after the last
+    complete element.
+    """
+    out = []
+    stack = []
+    in_string = False
+    escaped = False
+    last_cut = None  # (output length, open brackets) after the last closed element
+
+    for ch in text:
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if not stack or stack[-1] != ch:
+                break
+            # Trailing comma before a closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            stack.pop()
+            out.append(ch)
+            if not stack:
+                return "".join(out)
+            last_cut = (len(out), tuple(stack))
+            continue
+        elif ch == "," and stack:
+            # Everything before a separator is a complete element
+            last_cut = (len(out), tuple(stack))
+        out.append(ch)
+
+    if last_cut is None:
+        return None
+    length, open_brackets = last_cut
+    return "".join(out[:length]) + "".join(reversed(open_brackets))
+
+
+def repair_json(text):
+    """
+    Parse JSON produced by a language model, repairing common defects.
+
+    Returns ``(data, repaired)``; raises ``ValueError`` if nothing can be salvaged.
+    """
+    if not isinstance(text, str):
+        raise ValueError("Model output is not a string")
+    try:
+        return json.loads(text), False
+    except json.JSONDecodeError:
+        pass
+
+    candidate = _strip_wrapping(text)
+    if candidate:
+        fixed = _scan(candidate)
+        if fixed:
+            try:
+                return json.loads(fixed), True
+            except json.JSONDecodeError:
+                pass
+    raise ValueError("Model output could not be repaired into valid JSON")
+
+
+def parse_model_json(text, default=None):
+    """Tolerant JSON parse of model output that records repair statistics; returns ``default`` on failure"""
+    try:
+        data, repaired = repair_json(text)
+    except ValueError as e:
+        _count("failed")
+        logger.warning(f"{e}: {str(text)[:200]!r}")
+        return default
+    if repaired:
+        _count("repaired")
+        logger.info(f"Repaired model JSON output (stats: {repair_stats()})")
+    else:
+        _count("clean")
+    return data
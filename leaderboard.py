@@ -0,0 +1,177 @@
+import heapq
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from artifact_cache import content_hash
+
+DB_PATH = os.path.join("data", "leaderboard.db")
+# Entries of each board kept in memory for the top-N display
+TOP_K = 50
+
+SCHEMA_VERSION = 1
+
+# One row per (board, user): the user's best result on that board
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS best_entries (
+    id INTEGER PRIMARY KEY,
+    board TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    score REAL NOT NULL,
+    total INTEGER NOT NULL,
+    time_taken REAL NOT NULL,
+    created_at TEXT NOT NULL,
+    UNIQUE (board, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_best_entries_rank ON best_entries (board, score DESC, time_taken ASC);
+"""
+
+
+def mask_email(email: str) -> str:
+    """Public form of an email address: first two characters of the local part only"""
+    local, _, domain = str(email).partition("@")
+    return f"{local[:2]}***@{domain}" if domain else f"{local[:2]}***"
+
+
+class Leaderboard:
+    """
+    Persistent leaderboards shared by all sessions, one per test topic.
+
+    Each user's best entry per board is stored in SQLite under their uid, with a public
+    display name, and a (board, score, time) index for rank lookups; the best ``top_k``
+    entries of each board are kept in a bounded min-heap so showing the top of a board
+    needs no query.
+    """
+
+    def __init__(self, path=DB_PATH, top_k=TOP_K):
+        self.path = path
+        self.top_k = top_k
+        self._local = threading.local()
+        self._heaps = {}
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                self._migrate_entries(conn)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def _migrate_entries(conn: sqlite3.Connection):
+        """Move version 0 entries (every attempt, keyed by email) into best_entries"""
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'entries'").fetchone():
+            return
+        best = {}
+        for row in conn.execute("SELECT * FROM entries ORDER BY score DESC, time_taken ASC, id ASC"):
+            best.setdefault((row["board"], row["user"]), row)
+        # No uid was stored; the address is hashed so it isn't kept in the clear
+        conn.executemany(
+            "INSERT OR IGNORE INTO best_entries (board, user_id, display_name, score, total, time_taken, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(row["board"], "legacy:" + content_hash(row["user"])[:16], mask_email(row["user"]),
+              row["score"], row["total"], row["time_taken"], row["created_at"]) for row in best.values()]
+        )
+        conn.execute("DROP TABLE entries")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _heap_item(entry: Dict):
+        # Min-heap on "goodness": the root is the worst of the kept entries
+        return (entry["score"], -entry["time_taken"], -entry["id"], entry)
+
+    def _heap(self, board: str) -> List:
+        """Top-k heap of ``board``, loaded from the index on first use (caller holds the lock)"""
+        heap = self._heaps.get(board)
+        if heap is None:
+            rows = self._connect().execute(
+                "SELECT * FROM best_entries WHERE board = ? ORDER BY score DESC, time_taken ASC LIMIT ?",
+                (board, self.top_k)
+            ).fetchall()
+            heap = [self._heap_item(dict(row)) for row in rows]
+            heapq.heapify(heap)
+            self._heaps[board] = heap
+        return heap
+
+    def submit(self, board: str, user_id: str, display_name: str, score: float, total: int, time_taken: float) -> Dict:
+        """Record a finished test; returns the user's best entry on ``board``, which may be an earlier one"""
+        created_at = datetime.now().isoformat()
+        with self._lock:
+            # Load the heap before writing so the new row is never counted twice
+            heap = self._heap(board)
+        conn = self._connect()
+        with conn:
+            # Replace the user's entry only if this result ranks higher
+            conn.execute(
+                "INSERT INTO best_entries (board, user_id, display_name, score, total, time_taken, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (board, user_id) DO UPDATE SET display_name = excluded.display_name, "
+                "score = excluded.score, total = excluded.total, time_taken = excluded.time_taken, "
+                "created_at = excluded.created_at "
+                "WHERE excluded.score > best_entries.score "
+                "OR (excluded.score = best_entries.score AND excluded.time_taken < best_entries.time_taken)",
+                (board, user_id, display_name, float(score), int(total), float(time_taken), created_at)
+            )
+            entry = dict(conn.execute(
+                "SELECT * FROM best_entries WHERE board = ? AND user_id = ?", (board, user_id)
+            ).fetchone())
+        item = self._heap_item(entry)
+        with self._lock:
+            # Drop the user's previous entry so a board never lists anyone twice
+            kept = [old for old in heap if old[3]["user_id"] != user_id]
+            if len(kept) != len(heap):
+                heap[:] = kept
+                heapq.heapify(heap)
+            if len(heap) < self.top_k:
+                heapq.heappush(heap, item)
+            elif item[:3] > heap[0][:3]:
+                heapq.heapreplace(heap, item)
+        return entry
+
+    def top(self, board: str, n: int = 10) -> List[Dict]:
+        """Best ``n`` entries (n <= top_k), highest score first and then fastest"""
+        with self._lock:
+            items = heapq.nlargest(min(n, self.top_k), self._heap(board), key=lambda item: item[:3])
+        return [item[3] for item in items]
+
+    def rank(self, board: str, score: float, time_taken: float) -> int:
+        """1-based position a (score, time) result holds among the users on ``board``"""
+        row = self._connect().execute(
+            "SELECT COUNT(*) FROM best_entries WHERE board = ? AND (score > ? OR (score = ? AND time_taken < ?))",
+            (board, score, score, time_taken)
+        ).fetchone()
+        return row[0] + 1
+
+    def size(self, board: str) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM best_entries WHERE board = ?", (board,)).fetchone()[0]
+
+
+_leaderboard = None
+_leaderboard_lock = threading.Lock()
+
+
+def get_leaderboard() -> Leaderboard:
+    """Process-wide leaderboard store"""
+    global _leaderboard
+    with _leaderboard_lock:
+        if _leaderboard is None:
+            _leaderboard = Leaderboard()
+        return _leaderboard
+
+
+def board_for(topic: str, difficulty: Optional[str] = None) -> str:
+    """Board key for a test: the same content hash the question bank uses, plus difficulty"""
+    key = content_hash(topic[:3000])
+    return f"{key}:{difficulty}" if difficulty else key
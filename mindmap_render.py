@@ -0,0 +1,331 @@
+import networkx as nx
+import numpy as np
+import plotly.graph_objects as go
+from pyvis.network import Network
+
+# Above this many nodes the mind map switches to level-of-detail rendering
+LOD_NODE_THRESHOLD = 300
+# Maximum number of nodes that are drawn in level-of-detail mode
+LOD_MAX_VISIBLE = 400
+# Maximum number of text labels drawn in level-of-detail mode
+LOD_MAX_LABELS = 60
+
+
+def build_graph(mindmap_data):
+    """Build a directed graph from mind map JSON, returning the graph and any skipped edges"""
+    G = nx.DiGraph()
+    for node in mindmap_data["nodes"]:
+        G.add_node(node["id"], label=node["label"], level=node["level"])
+    skipped = []
+    for edge in mindmap_data["edges"]:
+        if edge["from"] in G.nodes and edge["to"] in G.nodes:
+            G.add_edge(edge["from"], edge["to"])
+        else:
+            skipped.append(edge)
+    return G, skipped
+
+
+def node_depths(G):
+    """Depth of every node measured from the main topics (level 0 or no parent)"""
+    roots = [n for n, d in G.nodes(data=True) if d.get("level", 1) == 0 or G.in_degree(n) == 0]
+    depth = {n: 0 for n in roots}
+    frontier = list(roots)
+    while frontier:
+        next_frontier = []
+        for node in frontier:
+            for child in G.successors(node):
+                if child not in depth:
+                    depth[child] = depth[node] + 1
+                    next_frontier.append(child)
+        frontier = next_frontier
+    # Nodes only reachable through cycles fall back to their declared level
+    for node, data in G.nodes(data=True):
+        depth.setdefault(node, max(int(data.get("level", 1)), 1))
+    return depth
+
+
+def tree_children(G, depth):
+    """Spanning-tree children of every node; a node with several parents keeps the first one"""
+    children = {n: [] for n in G.nodes()}
+    has_parent = set()
+    for node in sorted(G.nodes(), key=depth.get):
+        for child in G.successors(node):
+            if child not in has_parent and depth[child] == depth[node] + 1:
+                has_parent.add(child)
+                children[node].append(child)
+    return children, has_parent
+
+
+def collapse_for_lod(G, max_visible=LOD_MAX_VISIBLE):
+    """
+    Collapse deep subtrees so at most ``max_visible`` nodes are drawn.
+
+    Returns the visible subgraph, the depth of every visible node and the number of
+    hidden descendants folded into each aggregate node.
+    """
+    depth = node_depths(G)
+    tier_counts = np.bincount(np.fromiter(depth.values(), dtype=np.int64))
+    cumulative = np.cumsum(tier_counts)
+    # Deepest tier that still fits the budget; the main topics are always shown
+    fitting = np.nonzero(cumulative <= max_visible)[0]
+    max_depth = int(fitting[-1]) if len(fitting) else 0
+
+    visible = [n for n, d in depth.items() if d <= max_depth]
+    H = G.subgraph(visible).copy()
+
+    collapsed = {}
+    if max_depth < len(tier_counts) - 1:
+        # Count hidden descendants bottom-up so every aggregate knows its subtree size
+        children, _ = tree_children(G, depth)
+        hidden_below = {}
+        for node in sorted(depth, key=depth.get, reverse=True):
+            if depth[node] < max_depth:
+                break
+            hidden_below[node] = sum(1 + hidden_below[child] for child in children[node])
+        collapsed = {
+            n: hidden_below[n] for n in visible
+            if depth[n] == max_depth and hidden_below.get(n, 0) > 0
+        }
+    return H, {n: depth[n] for n in visible}, collapsed
+
+
+def radial_tree_layout(G, depth):
+    """O(n) radial layout: each node gets an angular wedge proportional to its leaf count"""
+    children, has_parent = tree_children(G, depth)
+    leaves = {}
+    for node in sorted(depth, key=depth.get, reverse=True):
+        leaves[node] = sum(leaves[c] for c in children[node]) or 1
+
+    roots = [n for n in G.nodes() if n not in has_parent]
+    pos = {}
+    stack = []
+    total = sum(leaves[r] for r in roots) or 1
+    start = 0.0
+    for root in roots:
+        span = 2 * np.pi * leaves[root] / total
+        stack.append((root, start, span))
+        start += span
+
+    single_root = len(roots) == 1
+    while stack:
+        node, start, span = stack.pop()
+        radius = depth[node] + (0 if single_root else 0.5)
+        angle = start + span / 2
+        pos[node] = [radius * np.cos(angle), radius * np.sin(angle)]
+        child_start = start
+        for child in children[node]:
+            child_span = span * leaves[child] / leaves[node]
+            stack.append((child, child_start, child_span))
+            child_start += child_span
+    return pos
+
+
+def build_lod_figure(G, settings, starred_topics, max_visible=LOD_MAX_VISIBLE, max_labels=LOD_MAX_LABELS):
+    """Level-of-detail mind map figure using WebGL traces and labels on the top tiers only"""
+    H, depth, collapsed = collapse_for_lod(G, max_visible)
+    pos = radial_tree_layout(H, depth)
+    nodes = list(H.nodes())
+
+    # Label only the shallowest tiers that fit within the label budget
+    tier_counts = np.bincount(np.fromiter((depth[n] for n in nodes), dtype=np.int64))
+    fitting = np.nonzero(np.cumsum(tier_counts) <= max_labels)[0]
+    label_depth = int(fitting[-1]) if len(fitting) else -1
+
+    node_size = settings.get("node_size", 30)
+    xy = np.array([pos[n] for n in nodes], dtype=float)
+    depths = np.array([depth[n] for n in nodes])
+    hidden = np.array([collapsed.get(n, 0) for n in nodes])
+    starred = np.array([bool(starred_topics.get(H.nodes[n]["label"], False)) for n in nodes])
+
+    colors = np.where(depths == 0, settings.get("main_topic_color", "#FF5722"), settings.get("subtopic_color", "#4CAF50"))
+    colors = np.where(starred, settings.get("starred_color", "#FF9800"), colors)
+    # Shrink deeper tiers and grow aggregates logarithmically with the number of folded nodes
+    sizes = np.maximum(node_size / (1 + depths) * 1.5, 4) + np.log1p(hidden) * 2
+    hover = [
+        f"{H.nodes[n]['label']} (+{collapsed[n]} hidden)" if n in collapsed else H.nodes[n]["label"]
+        for n in nodes
+    ]
+
+    # All edges in a single trace, separated by NaN gaps
+    edge_x = np.full(H.number_of_edges() * 3, np.nan)
+    edge_y = np.full(H.number_of_edges() * 3, np.nan)
+    for i, (u, v) in enumerate(H.edges()):
+        edge_x[3 * i], edge_y[3 * i] = pos[u]
+        edge_x[3 * i + 1], edge_y[3 * i + 1] = pos[v]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        x=edge_x,
+        y=edge_y,
+        mode='lines',
+        line=dict(color='#999', width=1),
+        hoverinfo='none'
+    ))
+    fig.add_trace(go.Scattergl(
+        x=xy[:, 0],
+        y=xy[:, 1],
+        mode='markers',
+        marker=dict(
+            size=sizes,
+            color=colors,
+            line=dict(width=1, color='#333'),
+            symbol=np.where(hidden > 0, 'diamond', np.where(depths == 0, 'hexagon', 'circle'))
+        ),
+        hovertext=hover,
+        hoverinfo='text'
+    ))
+    labelled = depths <= label_depth
+    fig.add_trace(go.Scatter(
+        x=xy[labelled, 0],
+        y=xy[labelled, 1],
+        mode='text',
+        text=[h for h, keep in zip(hover, labelled) if keep],
+        textposition="top center",
+        textfont=dict(size=11, color='#000000'),
+        hoverinfo='none'
+    ))
+    return fig
+
+
+def layout_positions(G, layout_style):
+    """Spring-based Radial/Tree layouts used for small mind maps"""
+    main_nodes = [n for n, d in G.nodes(data=True) if d.get("level", 1) == 0]
+    main_index = {n: i for i, n in enumerate(main_nodes)}
+
+    def place_main(pos, radius):
+        for node in main_nodes:
+            if len(main_nodes) > 1:
+                angle = main_index[node] * 360 / len(main_nodes)
+                pos[node] = [radius * np.cos(np.radians(angle)), radius * np.sin(np.radians(angle))]
+            else:
+                pos[node] = [0, 0]
+
+    if layout_style == "Tree":
+        pos = nx.spring_layout(G, k=0.7, iterations=50)
+        place_main(pos, 0.5)
+        for node, data in G.nodes(data=True):
+            if data.get("level", 1) == 1:
+                angle = hash(node) % 360
+                radius = 1.8
+                pos[node] = [radius * np.cos(np.radians(angle)), radius * np.sin(np.radians(angle))]
+        return pos
+    pos = nx.spring_layout(G, k=1.5, iterations=100)
+    place_main(pos, 0.5)
+    return pos
+
+
+def build_full_figure(G, pos, settings, starred_topics):
+    """Fully labelled mind map figure for small graphs"""
+    node_size = settings.get("node_size", 30)
+    central_color = settings.get("main_topic_color", "#FF5722")
+    subtopic_color = settings.get("subtopic_color", "#4CAF50")
+    starred_color = settings.get("starred_color", "#FF9800")
+
+    labels = [data["label"] for _, data in G.nodes(data=True)]
+    x_positions = [pos[node][0] for node in G.nodes()]
+    y_positions = [pos[node][1] for node in G.nodes()]
+    colors = [central_color if data.get("level", 1) == 0 else subtopic_color for _, data in G.nodes(data=True)]
+    is_starred = [starred_topics.get(data["label"], False) for _, data in G.nodes(data=True)]
+    sizes = [node_size * 2 if data.get("level", 1) == 0 else node_size for _, data in G.nodes(data=True)]
+
+    fig = go.Figure()
+
+    # Edges
+    for edge in G.edges():
+        x0, y0 = pos[edge[0]]
+        x1, y1 = pos[edge[1]]
+        xc = (x0 + x1) / 2 + (y1 - y0) * 0.1
+        yc = (y0 + y1) / 2 + (x0 - x1) * 0.1
+        fig.add_trace(go.Scatter(
+            x=[x0, xc, x1],
+            y=[y0, yc, y1],
+            mode='lines',
+            line=dict(color='#666', width=2, shape='spline'),
+            hoverinfo='none'
+        ))
+
+    # Nodes
+    fig.add_trace(go.Scatter(
+        x=x_positions,
+        y=y_positions,
+        mode='markers+text',
+        text=labels,
+        textposition="middle center",
+        textfont=dict(size=12, color='#000000'),
+        marker=dict(
+            size=sizes,
+            color=[starred_color if starred else color for starred, color in zip(is_starred, colors)],
+            line=dict(width=2, color='#333'),
+            symbol=['hexagon' if data.get("level", 1) == 0 else 'circle' for _, data in G.nodes(data=True)]
+        ),
+        hoverinfo='none'
+    ))
+    return fig
+
+
+def build_mindmap_figure(G, layout_style, settings, starred_topics, lod_threshold=LOD_NODE_THRESHOLD):
+    """
+    Build the mind map figure and its Plotly config.
+
+    Small graphs keep the fully labelled static rendering; graphs above ``lod_threshold``
+    nodes use level-of-detail rendering with zoom and hover enabled.
+    """
+    lod = G.number_of_nodes() > lod_threshold
+    if lod:
+        fig = build_lod_figure(G, settings, starred_topics)
+        config = {'displayModeBar': True, 'scrollZoom': True}
+    else:
+        pos = layout_positions(G, layout_style)
+        fig = build_full_figure(G, pos, settings, starred_topics)
+        config = {'staticPlot': True, 'displayModeBar': False}
+
+    fig.update_layout(
+        title="Knowledge Mind Map",
+        showlegend=False,
+        xaxis=dict(visible=False, fixedrange=not lod),
+        yaxis=dict(visible=False, fixedrange=not lod),
+        dragmode='pan' if lod else False,
+        height=750,
+        width=800,
+        plot_bgcolor='white',
+        margin=dict(l=0, r=0, t=50, b=0)
+    )
+    return fig, config
+
+
+def build_pyvis_html(G, layout_style, settings, starred_topics):
+    """
+    Interactive HTML export of the mind map.
+
+    Node positions are computed here and physics is disabled, so the browser only draws
+    the graph instead of running a force simulation.
+    """
+    if G.number_of_nodes() > LOD_NODE_THRESHOLD:
+        pos = radial_tree_layout(G, node_depths(G))
+    else:
+        pos = layout_positions(G, layout_style)
+    # Spread the unit-scale layout over a pixel canvas
+    scale = 300 if G.number_of_nodes() <= LOD_NODE_THRESHOLD else 120
+
+    node_size = settings.get("node_size", 30)
+    net = Network(height="750px", width="100%", directed=True, cdn_resources="remote")
+    for node, data in G.nodes(data=True):
+        is_main = data.get("level", 1) == 0
+        color = settings.get("main_topic_color", "#FF5722") if is_main else settings.get("subtopic_color", "#4CAF50")
+        if starred_topics.get(data["label"], False):
+            color = settings.get("starred_color", "#FF9800")
+        net.add_node(
+            node,
+            label=data["label"],
+            title=data["label"],
+            color=color,
+            shape="hexagon" if is_main else "dot",
+            size=node_size if is_main else node_size / 2,
+            x=float(pos[node][0]) * scale,
+            y=-float(pos[node][1]) * scale,
+            physics=False
+        )
+    for source, target in G.edges():
+        net.add_edge(source, target, color="#666")
+    net.toggle_physics(False)
+    return net.generate_html()
@@ -9,17 +9,22 @@ def load_model():
         st.error(f"Error loading model: {e}")
         return None
 
+def request_output(question, client=None):
+    """Model response for ``question``; raises instead of reporting, so worker threads can call it"""
+    client = client or groq.Client(api_key=st.secrets["groq_api_key"])
+    response = client.chat.completions.create(
+        model="mistral-saba-24b",  # Changed model here
+        messages=[{"role": "user", "content": question}]
+    )
+    return response.choices[0].message.content
+
 def get_output(question):
     client = load_model()
     if client is None:
         return "Failed to load model."
 
     try:
-        response = client.chat.completions.create(
-            model="mistral-saba-24b",  # Changed model here
-            messages=[{"role": "user", "content": question}]
-        )
-        return response.choices[0].message.content  
+        return request_output(question, client)
     except Exception as e:
         st.error(f"Error generating response: {e}")
         return "Error generating response."
\ No newline at end of file
@@ -1,6 +1,7 @@
 import groq
 import streamlit as st
 import json
+from json_repair import parse_model_json
 
 def load_model():
     try:
@@ -48,41 +49,41 @@ def get_mindmap_output(question):
         )
         raw_response = response.choices[0].message.content.strip()
 
-        # Validate JSON
-        try:
-            data = json.loads(raw_response)
-            if not isinstance(data, dict) or "nodes" not in data or "edges" not in data:
-                st.warning("Invalid JSON structure. Using fallback.")
-                return json.dumps({"nodes": [], "edges": []})
-
-            # Ensure nodes have required fields
-            for node in data["nodes"]:
-                if not isinstance(node, dict):
-                    st.warning(f"Invalid node: {node}. Using fallback.")
-                    return json.dumps({"nodes": [], "edges": []})
-                if "id" not in node:
-                    node["id"] = f"node_{hash(str(node)) % 10000}"
-                if "label" not in node:
-                    node["label"] = "Unnamed"
-                if "level" not in node:
-                    node["level"] = 1
-                    st.warning(f"Node {node['id']} missing 'level'. Set to 1.")
+        # Validate JSON (repairs fences, trailing commas and truncated output)
+        data = parse_model_json(raw_response)
+        if data is None:
+            st.error("Model returned invalid JSON. Using fallback.")
+            return json.dumps({"nodes": [], "edges": []})
+        if isinstance(data, dict) and "nodes" in data:
+            data.setdefault("edges", [])
+        if not isinstance(data, dict) or "nodes" not in data or "edges" not in data:
+            st.warning("Invalid JSON structure. Using fallback.")
+            return json.dumps({"nodes": [], "edges": []})
 
-            # Validate edges
-            node_ids = {node["id"] for node in data["nodes"]}
-            valid_edges = [
-                edge for edge in data["edges"]
-                if isinstance(edge, dict) and edge.get("from") in node_ids and edge.get("to") in node_ids
-            ]
-            if len(valid_edges) < len(data["edges"]):
-                st.warning("Some edges were invalid and removed.")
-            data["edges"] = valid_edges
+        # Ensure nodes have required fields
+        for node in data["nodes"]:
+            if not isinstance(node, dict):
+                st.warning(f"Invalid node: {node}. Using fallback.")
+                return json.dumps({"nodes": [], "edges": []})
+            if "id" not in node:
+                node["id"] = f"node_{hash(str(node)) % 10000}"
+            if "label" not in node:
+                node["label"] = "Unnamed"
+            if "level" not in node:
+                node["level"] = 1
+                st.warning(f"Node {node['id']} missing 'level'. Set to 1.")
 
-            return json.dumps(data)  # Return validated JSON as string
+        # Validate edges
+        node_ids = {node["id"] for node in data["nodes"]}
+        valid_edges = [
+            edge for edge in data["edges"]
+            if isinstance(edge, dict) and edge.get("from") in node_ids and edge.get("to") in node_ids
+        ]
+        if len(valid_edges) < len(data["edges"]):
+            st.warning("Some edges were invalid and removed.")
+        data["edges"] = valid_edges
 
-        except json.JSONDecodeError:
-            st.error("Model returned invalid JSON. Using fallback.")
-            return json.dumps({"nodes": [], "edges": []})
+        return json.dumps(data)  # Return validated JSON as string
 
     except Exception as e:
         st.error(f"Error generating mind map response: {e}")
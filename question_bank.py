@@ -0,0 +1,274 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+DB_PATH = os.path.join("data", "question_bank.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT NOT NULL UNIQUE,
+    content_hash TEXT NOT NULL,
+    topic TEXT,
+    type TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    marks INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_questions_content_hash ON questions (content_hash);
+CREATE INDEX IF NOT EXISTS idx_questions_topic ON questions (topic);
+CREATE INDEX IF NOT EXISTS idx_questions_type ON questions (type);
+CREATE INDEX IF NOT EXISTS idx_questions_difficulty ON questions (difficulty);
+CREATE INDEX IF NOT EXISTS idx_questions_marks ON questions (marks);
+CREATE INDEX IF NOT EXISTS idx_questions_lookup ON questions (content_hash, type, difficulty, marks);
+CREATE TABLE IF NOT EXISTS item_stats (
+    question_id INTEGER PRIMARY KEY REFERENCES questions (id),
+    content_hash TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    difficulty REAL NOT NULL DEFAULT 0,
+    discrimination REAL NOT NULL DEFAULT 1,
+    sum_x REAL NOT NULL DEFAULT 0,
+    sum_t REAL NOT NULL DEFAULT 0,
+    sum_xt REAL NOT NULL DEFAULT 0,
+    sum_tt REAL NOT NULL DEFAULT 0,
+    timed_attempts INTEGER NOT NULL DEFAULT 0,
+    time_sum REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_item_stats_difficulty ON item_stats (content_hash, difficulty);
+"""
+
+# Starting item difficulty (on the ability scale) for each difficulty label
+INITIAL_ITEM_DIFFICULTY = {"Easy": -1.0, "Medium": 0.0, "Hard": 1.0}
+# Question types that can be graded instantly and so used in adaptive tests
+ADAPTIVE_TYPES = ("MCQ", "Short Answer")
+
+# Marks a question is worth when the generator doesn't say
+DEFAULT_MARKS = {"MCQ": 1, "Short Answer": 1, "Descriptive": 3}
+
+
+# Bumped when stored fingerprints must be recomputed (PRAGMA user_version)
+SCHEMA_VERSION = 1
+
+
+def question_fingerprint(question: Dict, content_hash: str, difficulty: str = "") -> str:
+    """Dedup key: same source content, difficulty, type and normalised question text"""
+    text = re.sub(r"\W+", " ", str(question.get("question", "")).lower()).strip()
+    return hashlib.sha256(f"{content_hash}|{difficulty}|{question.get('type')}|{text}".encode("utf-8")).hexdigest()
+
+
+def parse_marks(value, q_type: Optional[str] = None) -> Optional[int]:
+    """
+    Marks as a positive int from model output (3, 3.0, "3" and "3 marks" all give 3).
+
+    Missing marks fall back to the type's default; None means unparseable.
+    """
+    if value is None or value == "":
+        return DEFAULT_MARKS.get(q_type, 1)
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        marks = int(value)
+    else:
+        match = re.search(r"\d+", str(value))
+        if match is None:
+            return None
+        marks = int(match.group())
+    return marks if marks > 0 else None
+
+
+class QuestionBank:
+    """
+    Persistent, deduplicated store of validated questions shared by all users.
+
+    One SQLite connection per thread (Streamlit serves sessions from a thread pool);
+    WAL mode lets readers assemble papers while another session is adding questions.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Banks created before response times were tracked
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(item_stats)")}
+            for column, definition in (("timed_attempts", "INTEGER NOT NULL DEFAULT 0"),
+                                       ("time_sum", "REAL NOT NULL DEFAULT 0")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE item_stats ADD COLUMN {column} {definition}")
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                # Fingerprints before version 1 ignored difficulty, so a question stored
+                # under one difficulty blocked the same question under another
+                rows = conn.execute("SELECT id, content_hash, difficulty, payload FROM questions").fetchall()
+                conn.executemany(
+                    "UPDATE questions SET fingerprint = ? WHERE id = ?",
+                    [(question_fingerprint(json.loads(row["payload"]), row["content_hash"], row["difficulty"]), row["id"])
+                     for row in rows]
+                )
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_questions(self, questions: List[Dict], content_hash: str, difficulty: str,
+                      topic: Optional[str] = None) -> int:
+        """Insert validated questions, skipping duplicates; returns the number of new rows"""
+        now = datetime.now().isoformat()
+        rows = []
+        for q in questions:
+            q_type = q["type"]
+            rows.append((
+                question_fingerprint(q, content_hash, difficulty),
+                content_hash,
+                q.get("topic") or topic,
+                q_type,
+                difficulty,
+                parse_marks(q.get("marks"), q_type) or DEFAULT_MARKS.get(q_type, 1),
+                q["question"],
+                json.dumps(q),
+                now
+            ))
+        conn = self._connect()
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO questions "
+                "(fingerprint, content_hash, topic, type, difficulty, marks, question, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            return conn.total_changes - before
+
+    def _filters(self, content_hash, q_type, difficulty, marks, topics):
+        clauses = ["content_hash = ?", "type = ?", "difficulty = ?"]
+        params = [content_hash, q_type, difficulty]
+        if marks is not None:
+            clauses.append("marks = ?")
+            params.append(marks)
+        if topics:
+            clauses.append(f"topic IN ({','.join('?' * len(topics))})")
+            params.extend(topics)
+        return " AND ".join(clauses), params
+
+    def count(self, content_hash: str, q_type: str, difficulty: str, marks: Optional[int] = None,
+              topics: Optional[List[str]] = None) -> int:
+        where, params = self._filters(content_hash, q_type, difficulty, marks, topics)
+        row = self._connect().execute(f"SELECT COUNT(*) FROM questions WHERE {where}", params).fetchone()
+        return row[0]
+
+    def draw(self, content_hash: str, q_type: str, difficulty: str, count: int, marks: Optional[int] = None,
+             topics: Optional[List[str]] = None) -> List[Dict]:
+        """Random sample of up to ``count`` matching questions, each tagged with its ``bank_id``"""
+        if count <= 0:
+            return []
+        where, params = self._filters(content_hash, q_type, difficulty, marks, topics)
+        rows = self._connect().execute(
+            f"SELECT id, payload FROM questions WHERE {where} ORDER BY RANDOM() LIMIT ?",
+            params + [count]
+        ).fetchall()
+        questions = []
+        for row in rows:
+            q = json.loads(row["payload"])
+            q["bank_id"] = row["id"]
+            questions.append(q)
+        return questions
+
+    def ensure_item_stats(self, content_hash: str) -> int:
+        """Create item statistics for any gradable question of ``content_hash`` that has none"""
+        conn = self._connect()
+        with conn:
+            before = conn.total_changes
+            conn.execute(
+                "INSERT OR IGNORE INTO item_stats (question_id, content_hash, difficulty) "
+                "SELECT id, content_hash, CASE difficulty WHEN 'Easy' THEN ? WHEN 'Hard' THEN ? ELSE ? END "
+                f"FROM questions WHERE content_hash = ? AND type IN ({','.join('?' * len(ADAPTIVE_TYPES))})",
+                [INITIAL_ITEM_DIFFICULTY["Easy"], INITIAL_ITEM_DIFFICULTY["Hard"], INITIAL_ITEM_DIFFICULTY["Medium"],
+                 content_hash, *ADAPTIVE_TYPES]
+            )
+            return conn.total_changes - before
+
+    def nearest_item(self, content_hash: str, target: float, exclude_ids: List[int]) -> Optional[Dict]:
+        """
+        Unasked item whose difficulty is closest to ``target``.
+
+        Two range probes on the (content_hash, difficulty) index, so the lookup is
+        O(log n) in the size of the bank.
+        """
+        conn = self._connect()
+        excluded = f"AND question_id NOT IN ({','.join('?' * len(exclude_ids))})" if exclude_ids else ""
+        candidates = []
+        for comparison, order in ((">=", "ASC"), ("<", "DESC")):
+            row = conn.execute(
+                f"SELECT question_id, difficulty, discrimination, timed_attempts, time_sum FROM item_stats "
+                f"WHERE content_hash = ? AND difficulty {comparison} ? {excluded} "
+                f"ORDER BY difficulty {order} LIMIT 1",
+                [content_hash, target, *exclude_ids]
+            ).fetchone()
+            if row is not None:
+                candidates.append(row)
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda row: abs(row["difficulty"] - target))
+        payload = conn.execute("SELECT payload FROM questions WHERE id = ?", (best["question_id"],)).fetchone()
+        question = json.loads(payload["payload"])
+        question.update({
+            "bank_id": best["question_id"],
+            "item_difficulty": best["difficulty"],
+            "item_discrimination": best["discrimination"],
+            "item_mean_time": best["time_sum"] / best["timed_attempts"] if best["timed_attempts"] else None
+        })
+        return question
+
+    def update_item_stats(self, question_id: int, updater) -> None:
+        """Atomically read, transform (``updater(dict) -> dict``) and write one item's statistics"""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT * FROM item_stats WHERE question_id = ?", (question_id,)).fetchone()
+            if row is None:
+                return
+            updated = updater(dict(row))
+            conn.execute(
+                "UPDATE item_stats SET attempts = ?, difficulty = ?, discrimination = ?, "
+                "sum_x = ?, sum_t = ?, sum_xt = ?, sum_tt = ? WHERE question_id = ?",
+                (updated["attempts"], updated["difficulty"], updated["discrimination"],
+                 updated["sum_x"], updated["sum_t"], updated["sum_xt"], updated["sum_tt"], question_id)
+            )
+
+    def record_response_times(self, timings: List) -> None:
+        """Add (question_id, seconds) dwell times to the items' statistics"""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "UPDATE item_stats SET timed_attempts = timed_attempts + 1, time_sum = time_sum + ? "
+                "WHERE question_id = ?",
+                [(float(seconds), question_id) for question_id, seconds in timings]
+            )
+
+
+_bank = None
+_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> QuestionBank:
+    """Process-wide question bank"""
+    global _bank
+    with _bank_lock:
+        if _bank is None:
+            _bank = QuestionBank()
+        return _bank
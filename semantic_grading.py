@@ -0,0 +1,183 @@
+"""
+Optional semantic grading of short answers by the model.
+
+Keyword matching misgrades paraphrases, so when enabled the short answers of a test are
+sent to the model in batches of (question, reference answer, student answer) triples,
+one request per batch. Verdicts are cached in the artifact cache by a hash of the
+normalised triple, so an identical answer is never graded twice. Anything that cannot be
+graded within the request budget or the latency SLO keeps its keyword score.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from artifact_cache import content_hash, get_artifact_cache
+from json_repair import parse_model_json
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10
+# At most this many model requests per graded test; the rest fall back to keywords
+MAX_REQUESTS_PER_TEST = 3
+# Wall-clock budget for all requests of one test, in seconds
+LATENCY_SLO_SECONDS = 8.0
+PASS_SCORE = 0.6
+
+# Shared by all sessions; requests still running after the SLO finish in the background
+# and their verdicts land in the cache for the next identical answer
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="semantic-grading")
+
+_stats = {"cached": 0, "graded": 0, "fallback": 0, "requests": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(outcome, n=1):
+    with _stats_lock:
+        _stats[outcome] += n
+
+
+def grading_stats():
+    """Snapshot of cached / model-graded / keyword-fallback verdict counts since process start"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def normalize_answer(text) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", str(text).lower())).strip()
+
+
+def verdict_key(question, reference, answer) -> str:
+    return content_hash([normalize_answer(question), normalize_answer(reference), normalize_answer(answer)])
+
+
+def build_grading_prompt(items):
+    """Prompt asking for one verdict per (question, reference, answer) triple"""
+    blocks = []
+    for index, (question, reference, answer) in enumerate(items):
+        blocks.append(
+            f"### Item {index}\n"
+            f"Question: {question}\n"
+            f"Reference answer: {reference}\n"
+            f"Student answer: {answer}"
+        )
+    return (
+        "You are grading short answers. For each item decide whether the student answer "
+        "conveys the same meaning as the reference answer; paraphrases and different wording "
+        "are fine, missing or wrong key facts are not.\n\n"
+        + "\n\n".join(blocks)
+        + "\n\nReturn ONLY a JSON array with one object per item, in order:\n"
+        '[{"item": 0, "score": 0.0-1.0, "feedback": "one short sentence"}]'
+    )
+
+
+def _grade_batch(items):
+    """Model verdicts for a batch of triples as {position: (score, feedback)}"""
+    # Runs on a pool thread without a script context: request_output raises instead of
+    # calling st.error, so a failed request surfaces from future.result() and is logged
+    from model import request_output
+
+    _count("requests")
+    data = parse_model_json(request_output(build_grading_prompt(items)), default=[])
+    if isinstance(data, dict):
+        data = data.get("items") or data.get("verdicts") or []
+    verdicts = {}
+    for position, entry in enumerate(data if isinstance(data, list) else []):
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get("item", position)
+        try:
+            index, score = int(index), min(max(float(entry.get("score", 0)), 0.0), 1.0)
+        except (TypeError, ValueError):
+            continue
+        if 0 <= index < len(items):
+            verdicts[index] = (score, str(entry.get("feedback", "")))
+    cache = get_artifact_cache()
+    for index, (score, feedback) in verdicts.items():
+        cache.put("grading_verdicts", verdict_key(*items[index]),
+                  json.dumps({"score": score, "feedback": feedback}))
+    return verdicts
+
+
+def semantic_verdicts(items, max_requests=MAX_REQUESTS_PER_TEST, slo_seconds=LATENCY_SLO_SECONDS):
+    """
+    Verdicts for a list of (question, reference, answer) triples.
+
+    Returns {index: (score, feedback)}; indexes missing from the result could not be
+    graded within budget and should keep their keyword score.
+    """
+    cache = get_artifact_cache()
+    verdicts, pending = {}, {}
+    for index, (question, reference, answer) in enumerate(items):
+        if not normalize_answer(answer):
+            verdicts[index] = (0.0, "No answer given.")
+            continue
+        key = verdict_key(question, reference, answer)
+        cached = cache.get("grading_verdicts", key)
+        if cached is not None:
+            entry = json.loads(cached)
+            verdicts[index] = (entry["score"], entry["feedback"])
+            _count("cached")
+        else:
+            # Identical answers within one test share a single model verdict
+            pending.setdefault(key, []).append(index)
+
+    unique = list(pending.values())
+    batches = [unique[i:i + BATCH_SIZE] for i in range(0, len(unique), BATCH_SIZE)][:max_requests]
+    deadline = time.monotonic() + slo_seconds
+    futures = {
+        _executor.submit(_grade_batch, [items[group[0]] for group in batch]): batch
+        for batch in batches
+    }
+    done, _ = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+    for future in done:
+        try:
+            batch_verdicts = future.result()
+        except Exception as e:
+            logger.warning(f"Semantic grading request failed: {e}")
+            continue
+        for position, verdict in batch_verdicts.items():
+            for index in futures[future][position]:
+                verdicts[index] = verdict
+                _count("graded")
+    _count("fallback", len(items) - len(verdicts))
+    return verdicts
+
+
+def apply_semantic_grading(questions, results, **kwargs):
+    """
+    Re-grade the short answers of ``analysis_results`` with model verdicts, updating the
+    per-question details and the totals in place. Returns the number of answers graded.
+    """
+    details = [d for d in results["correct_answers"] + results["incorrect_answers"] if d["type"] != "MCQ"]
+    if not details:
+        return 0
+    references = {q["question"]: q.get("answer", "") for q in questions}
+    items = [(d["question"], references.get(d["question"], d["correct_answer"]), d["user_answer"]) for d in details]
+    verdicts = semantic_verdicts(items, **kwargs)
+
+    for index, detail in enumerate(details):
+        if index in verdicts:
+            detail["score"], detail["feedback"] = verdicts[index]
+            detail["graded_by"] = "model"
+        else:
+            detail["graded_by"] = "keywords"
+
+    keyword_correct = {id(d) for d in results["correct_answers"]}
+    correct, incorrect = [], []
+    for detail in results["correct_answers"] + results["incorrect_answers"]:
+        if detail.get("graded_by") == "model":
+            passed = detail["score"] >= PASS_SCORE
+        else:
+            passed = id(detail) in keyword_correct
+        (correct if passed else incorrect).append(detail)
+
+    # Passing short answers earn their score, as with keyword grading
+    correct_short = sum(d["score"] for d in correct if d["type"] != "MCQ")
+    results["correct_answers"], results["incorrect_answers"] = correct, incorrect
+    results["correct_short"] = float(correct_short)
+    results["score"] = float(results["correct_mcqs"] + correct_short)
+    results["accuracy"] = (results["score"] / results["total"]) * 100 if results["total"] > 0 else 0
+    return len(verdicts)
@@ -0,0 +1,643 @@
+"""
+Persistence for per-user data: starred topics, saved mind maps, test attempts and
+generated artifacts (question papers, mock test sets), which are stored zlib-compressed
+in fixed-size chunks behind a small manifest.
+
+``FirestoreStorage`` is the production backend. ``SQLiteStorage`` keeps the same data
+in a local database for offline development, deterministic benchmarks and small
+single-node deployments. The backend is picked by ``get_storage()`` from the
+``STORAGE_BACKEND`` environment variable or ``[storage] backend`` in the Streamlit
+secrets ("firestore" or "sqlite").
+"""
+import json
+import os
+import sqlite3
+import threading
+import uuid
+import zlib
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from artifact_cache import content_hash
+
+DB_PATH = os.path.join("data", "storage.db")
+# Firestore allows at most 500 writes and about 10 MiB of payload per batch
+BATCH_LIMIT = 400
+BATCH_MAX_BYTES = 9 * 1024 * 1024
+
+COLLECTIONS = {
+    "user_topics": "user_topics",
+    "flowcharts": "user_flowcharts",
+    "attempts": "user_attempts",
+    "artifacts": "user_artifacts"
+}
+# Per-user collections covered by export/import
+EXPORT_COLLECTIONS = ("starred", "flowcharts", "attempts", "artifacts")
+
+# Raw bytes per chunk document, compressed; well under Firestore's 1 MiB document limit
+ARTIFACT_CHUNK_SIZE = 512 * 1024
+COMPRESSION_LEVEL = 6
+
+
+def _payload_size(data) -> int:
+    """Rough serialised size of a document's fields, in bytes"""
+    if isinstance(data, (bytes, str)):
+        return len(data)
+    if isinstance(data, dict):
+        return sum(len(str(key)) + _payload_size(value) for key, value in data.items())
+    if isinstance(data, (list, tuple)):
+        return sum(_payload_size(value) for value in data)
+    return 8
+
+
+def _write_batches(writes: List[Tuple]):
+    """Split (doc_ref, data) writes into batches within both the write count and payload limits"""
+    batch, size = [], 0
+    for write in writes:
+        write_size = _payload_size(write[1])
+        if batch and (len(batch) >= BATCH_LIMIT or size + write_size > BATCH_MAX_BYTES):
+            yield batch
+            batch, size = [], 0
+        batch.append(write)
+        size += write_size
+    if batch:
+        yield batch
+
+
+def pack_artifact(kind: str, name: str, data):
+    """Compress an artifact (str, bytes or JSON-serialisable) into (manifest, chunks)"""
+    if isinstance(data, bytes):
+        raw, encoding = data, "bytes"
+    elif isinstance(data, str):
+        raw, encoding = data.encode("utf-8"), "text"
+    else:
+        raw, encoding = json.dumps(data, separators=(",", ":")).encode("utf-8"), "json"
+    compressed = zlib.compress(raw, COMPRESSION_LEVEL)
+    chunks = [compressed[i:i + ARTIFACT_CHUNK_SIZE] for i in range(0, len(compressed), ARTIFACT_CHUNK_SIZE)] or [b""]
+    manifest = {
+        # The same content saved under another kind or name is a separate artifact
+        "artifact_id": content_hash([kind, name, content_hash(raw)]),
+        "kind": kind,
+        "name": name,
+        "encoding": encoding,
+        "compression": "zlib",
+        "size": len(raw),
+        "compressed_size": len(compressed),
+        "chunks": len(chunks),
+        "created_at": datetime.now().isoformat()
+    }
+    return manifest, chunks
+
+
+def unpack_artifact(manifest: Dict, chunks):
+    """Decompress chunks (any iterable, consumed lazily) back into the stored value"""
+    decompressor = zlib.decompressobj()
+    raw = b"".join(decompressor.decompress(chunk) for chunk in chunks) + decompressor.flush()
+    if manifest["encoding"] == "bytes":
+        return raw
+    text = raw.decode("utf-8")
+    return json.loads(text) if manifest["encoding"] == "json" else text
+
+
+class Storage:
+    """Interface shared by the storage backends"""
+
+    def get_starred_topics(self, user_id: str) -> Dict[str, Dict]:
+        """All stored topics of a user, {topic_id: topic data}"""
+        raise NotImplementedError
+
+    def apply_starred_changes(self, user_id: str, changes: Dict[str, Optional[Dict]]) -> None:
+        """Write {topic_id: data} changes in one batch; None removes the topic"""
+        raise NotImplementedError
+
+    def starred_topics_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None):
+        """
+        One page of starred topics, newest first: (items, next cursor or None).
+        Each item is the topic data plus its ``topic_id``.
+        """
+        raise NotImplementedError
+
+    def save_mindmap(self, user_id: str, mindmap_id: str, data: Dict) -> str:
+        """Store a mind map / flowchart under ``mindmap_id`` (overwriting) and return the id"""
+        raise NotImplementedError
+
+    def list_mindmaps(self, user_id: str, limit: int = 50) -> List[Dict]:
+        """A user's saved mind maps, newest first"""
+        raise NotImplementedError
+
+    def append_attempt(self, user_id: str, attempt: Dict) -> str:
+        raise NotImplementedError
+
+    def save_artifact(self, user_id: str, kind: str, name: str, data) -> Dict:
+        """Store a compressed, chunked artifact; returns its manifest (content-addressed id)"""
+        raise NotImplementedError
+
+    def list_artifacts(self, user_id: str, kind: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Manifests only, newest first; no chunk is read"""
+        raise NotImplementedError
+
+    def load_artifact(self, user_id: str, artifact_id: str):
+        """The stored value, or None; chunks are fetched only here"""
+        raise NotImplementedError
+
+    def list_attempts(self, user_id: str, limit: int = 100) -> List[Dict]:
+        """A user's attempts, newest first"""
+        raise NotImplementedError
+
+    # Bulk access for export/import. Records are {"id", "data"} plus "chunks" (bytes)
+    # for artifacts, in one of EXPORT_COLLECTIONS.
+
+    def list_user_ids(self) -> List[str]:
+        raise NotImplementedError
+
+    def iter_records(self, user_id: str, collection: str, page_size: int = BATCH_LIMIT) -> Iterator[Dict]:
+        """All records of one collection, read page by page"""
+        raise NotImplementedError
+
+    def write_records(self, user_id: str, collection: str, records: List[Dict]) -> None:
+        """Write (overwrite) records in as few batches as possible"""
+        raise NotImplementedError
+
+
+class FirestoreStorage(Storage):
+    def __init__(self, db=None):
+        self._db = db
+        # Users whose starred topics are known to be in the subcollection layout
+        self._migrated = set()
+        self._migrated_lock = threading.Lock()
+
+    @property
+    def db(self):
+        if self._db is None:
+            from firebase_auth import get_db
+            self._db = get_db()
+        return self._db
+
+    def _starred(self, user_id):
+        return self.db.collection(COLLECTIONS["user_topics"]).document(user_id).collection("starred")
+
+    @staticmethod
+    def _starred_doc_id(topic_id):
+        # Topic ids are free text (may contain "/"), so documents are keyed by a hash
+        return content_hash(topic_id)[:40]
+
+    @staticmethod
+    def _starred_fields(topic_id, data):
+        """Stored document: the topic data plus indexed topic_id/main_topic/timestamp fields"""
+        return {
+            **data,
+            "topic_id": topic_id,
+            "main_topic": data.get("main_topic", ""),
+            "timestamp": data.get("timestamp") or datetime.now().isoformat()
+        }
+
+    def get_starred_topics(self, user_id):
+        self.migrate_starred_topics(user_id)
+        return {doc.get("topic_id"): doc.to_dict() for doc in self._starred(user_id).stream()}
+
+    def apply_starred_changes(self, user_id, changes):
+        if not changes:
+            return
+        starred = self._starred(user_id)
+        writes = [
+            (starred.document(self._starred_doc_id(topic_id)), None if data is None else self._starred_fields(topic_id, data))
+            for topic_id, data in changes.items()
+        ]
+        for writes_batch in _write_batches(writes):
+            batch = self.db.batch()
+            for doc_ref, data in writes_batch:
+                if data is None:
+                    batch.delete(doc_ref)
+                else:
+                    batch.set(doc_ref, data)
+            batch.commit()
+
+    def starred_topics_page(self, user_id, limit=20, cursor=None):
+        from firebase_admin import firestore
+
+        self.migrate_starred_topics(user_id)
+        # Served by the single-field timestamp index Firestore creates automatically
+        query = self._starred(user_id).order_by("timestamp", direction=firestore.Query.DESCENDING)
+        if cursor:
+            snapshot = self._starred(user_id).document(cursor).get()
+            if snapshot.exists:
+                query = query.start_after(snapshot)
+        docs = list(query.limit(limit).stream())
+        items = [doc.to_dict() for doc in docs]
+        return items, (docs[-1].id if len(docs) == limit else None)
+
+    def migrate_starred_topics(self, user_id) -> int:
+        """
+        Move a user's topics from the old ``starred_topics`` map of the user document
+        into the ``starred`` subcollection; returns the number of topics moved.
+
+        Each user is checked once per process; a user document already carrying the
+        ``starred_layout`` marker is not migrated again.
+        """
+        from firebase_admin import firestore
+
+        with self._migrated_lock:
+            if user_id in self._migrated:
+                return 0
+        user_ref = self.db.collection(COLLECTIONS["user_topics"]).document(user_id)
+        doc = user_ref.get()
+        fields = (doc.to_dict() or {}) if doc.exists else {}
+        legacy = fields.get("starred_topics") if fields.get("starred_layout") != 2 else None
+        if legacy:
+            self.apply_starred_changes(user_id, legacy)
+            # Drop the map only after every topic is in the subcollection
+            user_ref.update({"starred_topics": firestore.DELETE_FIELD, "starred_layout": 2})
+        with self._migrated_lock:
+            self._migrated.add(user_id)
+        return len(legacy or {})
+
+    def migrate_all_starred_topics(self) -> int:
+        """One-off migration of every user; users are otherwise migrated on first read"""
+        return sum(self.migrate_starred_topics(doc.id)
+                   for doc in self.db.collection(COLLECTIONS["user_topics"]).stream())
+
+    def _items(self, collection, user_id):
+        return self.db.collection(COLLECTIONS[collection]).document(user_id).collection("items")
+
+    def save_mindmap(self, user_id, mindmap_id, data):
+        self._items("flowcharts", user_id).document(mindmap_id).set({
+            **data, "saved_at": data.get("saved_at") or datetime.now().isoformat()
+        })
+        return mindmap_id
+
+    def list_mindmaps(self, user_id, limit=50):
+        from firebase_admin import firestore
+
+        query = self._items("flowcharts", user_id).order_by("saved_at", direction=firestore.Query.DESCENDING)
+        return [{"id": doc.id, **doc.to_dict()} for doc in query.limit(limit).stream()]
+
+    def append_attempt(self, user_id, attempt):
+        doc_ref = self._items("attempts", user_id).document()
+        doc_ref.set(attempt)
+        return doc_ref.id
+
+    def save_artifact(self, user_id, kind, name, data):
+        manifest, chunks = pack_artifact(kind, name, data)
+        doc_ref = self._items("artifacts", user_id).document(manifest["artifact_id"])
+        existing = doc_ref.get()
+        if existing.exists:
+            # Same content already stored
+            return existing.to_dict()
+        writes = [(doc_ref.collection("chunks").document(f"{index:05d}"), {"data": chunk}) for index, chunk in enumerate(chunks)]
+        for writes_batch in _write_batches(writes):
+            batch = self.db.batch()
+            for chunk_ref, data in writes_batch:
+                batch.set(chunk_ref, data)
+            batch.commit()
+        # The manifest goes last, so a listed artifact always has all of its chunks
+        doc_ref.set(manifest)
+        return manifest
+
+    def list_artifacts(self, user_id, kind=None, limit=50):
+        from firebase_admin import firestore
+
+        query = self._items("artifacts", user_id)
+        if kind:
+            query = query.where("kind", "==", kind)
+        query = query.order_by("created_at", direction=firestore.Query.DESCENDING)
+        return [doc.to_dict() for doc in query.limit(limit).stream()]
+
+    def load_artifact(self, user_id, artifact_id):
+        doc_ref = self._items("artifacts", user_id).document(artifact_id)
+        doc = doc_ref.get()
+        if not doc.exists:
+            return None
+        chunks = (chunk.get("data") for chunk in doc_ref.collection("chunks").order_by("__name__").stream())
+        return unpack_artifact(doc.to_dict(), chunks)
+
+    def list_attempts(self, user_id, limit=100):
+        from firebase_admin import firestore
+
+        query = self._items("attempts", user_id).order_by("timestamp", direction=firestore.Query.DESCENDING)
+        return [doc.to_dict() for doc in query.limit(limit).stream()]
+
+    def _collection(self, user_id, collection):
+        return self._starred(user_id) if collection == "starred" else self._items(collection, user_id)
+
+    def list_user_ids(self):
+        # list_documents() also returns parents that only exist through subcollections
+        return sorted({
+            doc_ref.id
+            for name in COLLECTIONS.values()
+            for doc_ref in self.db.collection(name).list_documents()
+        })
+
+    def iter_records(self, user_id, collection, page_size=BATCH_LIMIT):
+        if collection == "starred":
+            # Users not yet migrated still keep their topics in the legacy map
+            self.migrate_starred_topics(user_id)
+        query = self._collection(user_id, collection).order_by("__name__").limit(page_size)
+        last = None
+        while True:
+            docs = list((query.start_after(last) if last is not None else query).stream())
+            for doc in docs:
+                record = {"id": doc.id, "data": doc.to_dict()}
+                if collection == "artifacts":
+                    chunks = doc.reference.collection("chunks").order_by("__name__").stream()
+                    record["chunks"] = [chunk.get("data") for chunk in chunks]
+                yield record
+            if len(docs) < page_size:
+                return
+            last = docs[-1]
+
+    def write_records(self, user_id, collection, records):
+        ref = self._collection(user_id, collection)
+        writes = []
+        for record in records:
+            if collection == "starred":
+                topic_id = record["data"].get("topic_id", record["id"])
+                writes.append((ref.document(self._starred_doc_id(topic_id)), self._starred_fields(topic_id, record["data"])))
+                continue
+            doc_ref = ref.document(record["id"])
+            for index, chunk in enumerate(record.get("chunks", [])):
+                writes.append((doc_ref.collection("chunks").document(f"{index:05d}"), {"data": chunk}))
+            # After its chunks, as in save_artifact
+            writes.append((doc_ref, record["data"]))
+        for writes_batch in _write_batches(writes):
+            batch = self.db.batch()
+            for doc_ref, data in writes_batch:
+                batch.set(doc_ref, data)
+            batch.commit()
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS starred_topics (
+    user_id TEXT NOT NULL,
+    topic_id TEXT NOT NULL,
+    main_topic TEXT NOT NULL DEFAULT '',
+    timestamp TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, topic_id)
+);
+CREATE TABLE IF NOT EXISTS mindmaps (
+    user_id TEXT NOT NULL,
+    mindmap_id TEXT NOT NULL,
+    saved_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, mindmap_id)
+);
+CREATE INDEX IF NOT EXISTS idx_mindmaps_saved_at ON mindmaps (user_id, saved_at);
+CREATE TABLE IF NOT EXISTS attempts (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_attempts_user ON attempts (user_id, timestamp);
+CREATE TABLE IF NOT EXISTS artifacts (
+    user_id TEXT NOT NULL,
+    artifact_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    manifest TEXT NOT NULL,
+    PRIMARY KEY (user_id, artifact_id)
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_kind ON artifacts (user_id, kind, created_at);
+CREATE TABLE IF NOT EXISTS artifact_chunks (
+    user_id TEXT NOT NULL,
+    artifact_id TEXT NOT NULL,
+    chunk INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (user_id, artifact_id, chunk)
+);
+"""
+
+# Created after the column migration below, for databases from before these columns
+STARRED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_starred_timestamp ON starred_topics (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_starred_main_topic ON starred_topics (user_id, main_topic);
+"""
+
+
+class SQLiteStorage(Storage):
+    """Local backend; one connection per thread, WAL mode as in the question bank"""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(starred_topics)")}
+            for column in ("main_topic", "timestamp"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE starred_topics ADD COLUMN {column} TEXT NOT NULL DEFAULT ''")
+            conn.executescript(STARRED_INDEXES)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_starred_topics(self, user_id):
+        rows = self._connect().execute(
+            "SELECT topic_id, data FROM starred_topics WHERE user_id = ?", (user_id,)
+        ).fetchall()
+        return {row["topic_id"]: json.loads(row["data"]) for row in rows}
+
+    def apply_starred_changes(self, user_id, changes):
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO starred_topics (user_id, topic_id, main_topic, timestamp, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(user_id, topic_id, data.get("main_topic", ""), data.get("timestamp") or datetime.now().isoformat(),
+                  json.dumps(data)) for topic_id, data in changes.items() if data is not None]
+            )
+            conn.executemany(
+                "DELETE FROM starred_topics WHERE user_id = ? AND topic_id = ?",
+                [(user_id, topic_id) for topic_id, data in changes.items() if data is None]
+            )
+
+    def starred_topics_page(self, user_id, limit=20, cursor=None):
+        # Keyset pagination on (timestamp, topic_id); the cursor is the last topic_id seen
+        conn = self._connect()
+        params = [user_id]
+        after = ""
+        if cursor:
+            row = conn.execute(
+                "SELECT timestamp FROM starred_topics WHERE user_id = ? AND topic_id = ?", (user_id, cursor)
+            ).fetchone()
+            if row is not None:
+                after = "AND (timestamp < ? OR (timestamp = ? AND topic_id < ?))"
+                params += [row["timestamp"], row["timestamp"], cursor]
+        rows = conn.execute(
+            f"SELECT topic_id, data FROM starred_topics WHERE user_id = ? {after} "
+            "ORDER BY timestamp DESC, topic_id DESC LIMIT ?",
+            params + [limit]
+        ).fetchall()
+        items = [{**json.loads(row["data"]), "topic_id": row["topic_id"]} for row in rows]
+        return items, (rows[-1]["topic_id"] if len(rows) == limit else None)
+
+    def save_mindmap(self, user_id, mindmap_id, data):
+        saved_at = data.get("saved_at") or datetime.now().isoformat()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO mindmaps (user_id, mindmap_id, saved_at, data) VALUES (?, ?, ?, ?)",
+                (user_id, mindmap_id, saved_at, json.dumps({**data, "saved_at": saved_at}))
+            )
+        return mindmap_id
+
+    def list_mindmaps(self, user_id, limit=50):
+        rows = self._connect().execute(
+            "SELECT mindmap_id, data FROM mindmaps WHERE user_id = ? ORDER BY saved_at DESC LIMIT ?",
+            (user_id, limit)
+        ).fetchall()
+        return [{"id": row["mindmap_id"], **json.loads(row["data"])} for row in rows]
+
+    def append_attempt(self, user_id, attempt):
+        attempt_id = uuid.uuid4().hex
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO attempts (id, user_id, timestamp, data) VALUES (?, ?, ?, ?)",
+                (attempt_id, user_id, str(attempt.get("timestamp", datetime.now().isoformat())), json.dumps(attempt))
+            )
+        return attempt_id
+
+    def save_artifact(self, user_id, kind, name, data):
+        manifest, chunks = pack_artifact(kind, name, data)
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO artifact_chunks (user_id, artifact_id, chunk, data) VALUES (?, ?, ?, ?)",
+                [(user_id, manifest["artifact_id"], index, chunk) for index, chunk in enumerate(chunks)]
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO artifacts (user_id, artifact_id, kind, created_at, manifest) VALUES (?, ?, ?, ?, ?)",
+                (user_id, manifest["artifact_id"], kind, manifest["created_at"], json.dumps(manifest))
+            )
+        return manifest
+
+    def list_artifacts(self, user_id, kind=None, limit=50):
+        where, params = ("AND kind = ?", [kind]) if kind else ("", [])
+        rows = self._connect().execute(
+            f"SELECT manifest FROM artifacts WHERE user_id = ? {where} ORDER BY created_at DESC LIMIT ?",
+            [user_id, *params, limit]
+        ).fetchall()
+        return [json.loads(row["manifest"]) for row in rows]
+
+    def load_artifact(self, user_id, artifact_id):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT manifest FROM artifacts WHERE user_id = ? AND artifact_id = ?", (user_id, artifact_id)
+        ).fetchone()
+        if row is None:
+            return None
+        cursor = conn.execute(
+            "SELECT data FROM artifact_chunks WHERE user_id = ? AND artifact_id = ? ORDER BY chunk",
+            (user_id, artifact_id)
+        )
+        return unpack_artifact(json.loads(row["manifest"]), (chunk["data"] for chunk in cursor))
+
+    def list_attempts(self, user_id, limit=100):
+        rows = self._connect().execute(
+            "SELECT data FROM attempts WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?", (user_id, limit)
+        ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    # collection -> (table, id column, JSON column)
+    TABLES = {
+        "starred": ("starred_topics", "topic_id", "data"),
+        "flowcharts": ("mindmaps", "mindmap_id", "data"),
+        "attempts": ("attempts", "id", "data"),
+        "artifacts": ("artifacts", "artifact_id", "manifest")
+    }
+
+    def list_user_ids(self):
+        conn = self._connect()
+        union = " UNION ".join(f"SELECT user_id FROM {table}" for table, _, _ in self.TABLES.values())
+        return [row[0] for row in conn.execute(f"SELECT DISTINCT user_id FROM ({union}) ORDER BY user_id")]
+
+    def iter_records(self, user_id, collection, page_size=BATCH_LIMIT):
+        table, id_column, data_column = self.TABLES[collection]
+        conn = self._connect()
+        last = ""
+        while True:
+            # Keyset pagination on the primary key
+            rows = conn.execute(
+                f"SELECT {id_column} AS id, {data_column} AS data FROM {table} "
+                f"WHERE user_id = ? AND {id_column} > ? ORDER BY {id_column} LIMIT ?",
+                (user_id, last, page_size)
+            ).fetchall()
+            for row in rows:
+                record = {"id": row["id"], "data": json.loads(row["data"])}
+                if collection == "artifacts":
+                    record["chunks"] = [chunk["data"] for chunk in conn.execute(
+                        "SELECT data FROM artifact_chunks WHERE user_id = ? AND artifact_id = ? ORDER BY chunk",
+                        (user_id, row["id"])
+                    )]
+                yield record
+            if len(rows) < page_size:
+                return
+            last = rows[-1]["id"]
+
+    def write_records(self, user_id, collection, records):
+        conn = self._connect()
+        with conn:
+            if collection == "starred":
+                self.apply_starred_changes(user_id, {r["data"].get("topic_id", r["id"]): r["data"] for r in records})
+            elif collection == "flowcharts":
+                conn.executemany(
+                    "INSERT OR REPLACE INTO mindmaps (user_id, mindmap_id, saved_at, data) VALUES (?, ?, ?, ?)",
+                    [(user_id, r["id"], r["data"].get("saved_at", ""), json.dumps(r["data"])) for r in records]
+                )
+            elif collection == "attempts":
+                conn.executemany(
+                    "INSERT OR REPLACE INTO attempts (id, user_id, timestamp, data) VALUES (?, ?, ?, ?)",
+                    [(r["id"], user_id, str(r["data"].get("timestamp", "")), json.dumps(r["data"])) for r in records]
+                )
+            elif collection == "artifacts":
+                conn.executemany(
+                    "INSERT OR REPLACE INTO artifact_chunks (user_id, artifact_id, chunk, data) VALUES (?, ?, ?, ?)",
+                    [(user_id, r["id"], index, chunk) for r in records for index, chunk in enumerate(r.get("chunks", []))]
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO artifacts (user_id, artifact_id, kind, created_at, manifest) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(user_id, r["id"], r["data"].get("kind", ""), r["data"].get("created_at", ""), json.dumps(r["data"]))
+                     for r in records]
+                )
+            else:
+                raise ValueError(f"Unknown collection: {collection}")
+
+
+BACKENDS = {"firestore": FirestoreStorage, "sqlite": SQLiteStorage}
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def storage_backend() -> str:
+    backend = os.environ.get("STORAGE_BACKEND")
+    if not backend:
+        try:
+            import streamlit as st
+            backend = st.secrets.get("storage", {}).get("backend")
+        except Exception:
+            backend = None
+    return (backend or "firestore").lower()
+
+
+def get_storage() -> Storage:
+    """Process-wide storage backend selected by configuration"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            backend = storage_backend()
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown storage backend: {backend}")
+            _storage = BACKENDS[backend]()
+        return _storage
@@ -0,0 +1,62 @@
+import pytest
+
+import adaptive_test
+from adaptive_test import _updated_item, estimate_ability, next_question, record_response, start_adaptive_test
+from question_bank import QuestionBank
+
+
+def mcq(text):
+    return {"question": text, "type": "MCQ", "options": list("ABCD"), "answer": "A"}
+
+
+@pytest.fixture
+def bank(tmp_path, monkeypatch):
+    bank = QuestionBank(str(tmp_path / "bank.db"))
+    monkeypatch.setattr(adaptive_test, "get_question_bank", lambda: bank)
+    bank.add_questions([mcq("easy 1"), mcq("easy 2")], "doc", "Easy")
+    bank.add_questions([mcq("medium 1"), mcq("medium 2")], "doc", "Medium")
+    bank.add_questions([mcq("hard 1"), mcq("hard 2")], "doc", "Hard")
+    return bank
+
+
+def test_prior_estimate():
+    theta, se = estimate_ability([])
+    assert theta == pytest.approx(0.0, abs=1e-9)
+    assert se == pytest.approx(1.0, abs=0.01)
+
+
+def test_estimate_follows_responses():
+    items = [(0.0, 1.0), (0.5, 1.0), (1.0, 1.0)]
+    high, high_se = estimate_ability([(b, a, True) for b, a in items])
+    low, _ = estimate_ability([(b, a, False) for b, a in items])
+    assert low < 0 < high
+    assert high_se < 1.0
+
+
+def test_item_gets_easier_when_answered_correctly():
+    stats = {"attempts": 0, "difficulty": 0.0, "discrimination": 1.0,
+             "sum_x": 0.0, "sum_t": 0.0, "sum_xt": 0.0, "sum_tt": 0.0}
+    assert _updated_item(stats, True, 0.0)["difficulty"] < 0.0
+    assert _updated_item(stats, False, 0.0)["difficulty"] > 0.0
+    assert stats["attempts"] == 0
+
+
+def test_adaptive_test_moves_towards_ability(bank):
+    state = start_adaptive_test("doc", max_items=3)
+    first = next_question(state)
+    assert first["question"].startswith("medium")
+    record_response(state, first, True)
+    assert state["theta"] > 0
+    second = next_question(state)
+    assert second["bank_id"] != first["bank_id"]
+    assert second["item_difficulty"] >= first["item_difficulty"] - adaptive_test.DIFFICULTY_STEP
+    record_response(state, second, True)
+    third = next_question(state)
+    assert third["question"].startswith("hard")
+
+
+def test_adaptive_test_stops_at_max_items(bank):
+    state = start_adaptive_test("doc", max_items=2)
+    for _ in range(2):
+        record_response(state, next_question(state), False)
+    assert next_question(state) is None
@@ -0,0 +1,29 @@
+import queue
+
+from attempt_log import AttemptLog
+
+
+def test_appended_attempts_are_readable(tmp_path):
+    log = AttemptLog(str(tmp_path / "attempts.jsonl"))
+    for i in range(5):
+        assert log.append({"user": "u1" if i % 2 else "u2", "i": i})
+    assert log.flush(timeout=5)
+    assert [a["i"] for a in log.read("u1")] == [1, 3]
+    assert len(list(log.read())) == 5
+    log.close()
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    log = AttemptLog(str(tmp_path / "attempts.jsonl"))
+    assert log.append({"i": 0})
+
+    def full(item):
+        raise queue.Full
+
+    monkeypatch.setattr(log._queue, "put_nowait", full)
+    assert not log.append({"i": 1})
+    assert log.dropped == 1
+    # A dropped attempt is not waited for
+    assert log.flush(timeout=5)
+    assert [a["i"] for a in log.read()] == [0]
+    log.close()
@@ -0,0 +1,24 @@
+from flowchart import to_dot, to_mermaid
+
+MINDMAP = {
+    "nodes": [
+        {"id": "root", "label": "Arrays [1|2]", "level": 0},
+        {"id": "a/b", "label": 'Say "hi"\nthen #1 <b>', "level": 1}
+    ],
+    "edges": [{"from": "root", "to": "a/b"}, {"from": "root", "to": "missing"}]
+}
+
+
+def test_mermaid_labels_are_escaped():
+    source = to_mermaid(MINDMAP)
+    lines = source.splitlines()
+    assert lines[1] == 'n0_root(["Arrays #91;1#124;2#93;"])'
+    assert lines[2] == 'n1_a_b["Say #quot;hi#quot;<br>then #35;1 #lt;b#gt;"]'
+    assert lines[3] == "n0_root --> n1_a_b"
+    assert "missing" not in source
+
+
+def test_dot_labels_are_escaped():
+    source = to_dot(MINDMAP)
+    assert 'label="Say \\"hi\\"' in source
+    assert "n0_root -> n1_a_b;" in source
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from grade_batch import grade_chunk, graded_chunks, parse_record
+
+QUESTIONS = [
+    {"question": "M", "type": "MCQ", "options": list("ABCD"), "answer": "A"},
+    {"question": "Q", "type": "Short Answer", "answer": "x", "keywords": ["energy"]}
+]
+
+
+def line(**record):
+    return json.dumps({"questions": QUESTIONS, **record})
+
+
+@pytest.mark.parametrize("text, error", [
+    ("not json", "invalid JSON"),
+    ("[1, 2]", "record is not a JSON object"),
+    ('{"id": "a"}', "missing questions"),
+    (line(answers=[1]), "answers is not a JSON object"),
+    (line(answers={}, time_taken="soon"), "invalid time_taken"),
+])
+def test_parse_record_rejects(text, error):
+    assert parse_record(text)[3].startswith(error)
+
+
+def test_bad_lines_only_fail_themselves():
+    lines = list(enumerate([
+        line(id="ok", answers={"M": "A", "Q": "energy"}, time_taken=5),
+        "[1, 2]",
+        line(id="bad time", answers={}, time_taken="soon"),
+        line(id="ok2", answers={"M": "B"}),
+    ], 1))
+    results = grade_chunk(lines)
+    assert [r["id"] for r in results] == ["ok", 2, "bad time", "ok2"]
+    assert [("error" in r) for r in results] == [False, True, True, False]
+    assert results[0]["score"] == 2.0 and results[0]["time_taken"] == 5.0
+    assert results[3]["score"] == 0.0
+
+
+def test_malformed_question_set_fails_its_group():
+    results = grade_chunk([(1, json.dumps({"id": "q", "questions": [{"type": "MCQ"}], "answers": {}}))])
+    assert results[0]["error"].startswith("grading failed")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_results_keep_input_order(workers):
+    chunks = [[(n, line(id=n, answers={"M": "A"}))] for n in range(6)]
+    results = [r["id"] for chunk in graded_chunks(chunks, workers) for r in chunk]
+    assert results == list(range(6))
@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+import bench_grading
+from grading import GradingEngine
+
+
+def short_answer(keywords, answer="reference"):
+    return {"question": "Q", "type": "Short Answer", "answer": answer, "keywords": keywords}
+
+
+def test_keywords_match_as_substrings_case_insensitively():
+    engine = GradingEngine([short_answer(["Plant", "carbon dioxide", "plant"])])
+    assert engine.score_answer(0, "a PLANTATION absorbs Carbon Dioxide") == (True, 1.0, 3, 3)
+    assert engine.score_answer(0, "carbon") == (False, 0.0, 0, 3)
+
+
+def test_reproduces_legacy_loop():
+    random.seed(3)
+    questions = bench_grading.make_test(keywords_per_question=12)
+    submissions = bench_grading.make_submissions(questions, 200)
+    results = GradingEngine(questions).grade_batch(submissions)
+    for result, answers in zip(results, submissions):
+        legacy = bench_grading.legacy_grade(questions, answers)
+        assert result["score"] == pytest.approx(legacy["score"])
+        assert result["correct_mcqs"] == legacy["correct_mcqs"]
+        assert len(result["correct_answers"]) == len(legacy["correct_answers"])
+
+
+def test_grade_result_structure():
+    questions = [
+        {"question": "M", "type": "MCQ", "options": list("ABCD"), "answer": "B"},
+        short_answer(["energy", "sunlight"]),
+        {"question": "N", "type": "Short Answer", "answer": "Guido"}
+    ]
+    result = GradingEngine(questions).grade({"M": "B", "Q": "sunlight gives energy", "N": " guido "}, 12.0)
+    assert result["score"] == 3.0
+    assert result["total"] == 3 and result["total_mcqs"] == 1 and result["total_short"] == 2
+    assert result["time_taken"] == 12.0
+    assert [d["index"] for d in result["correct_answers"]] == [0, 1, 2]
+    assert result["correct_answers"][1]["matched_keywords"] == 2
+
+
+def test_grade_batch_empty():
+    assert GradingEngine([short_answer(["x"])]).grade_batch([]) == []
@@ -0,0 +1,32 @@
+import pytest
+
+from json_repair import parse_model_json, repair_json
+
+
+def test_clean_json_is_not_repaired():
+    assert repair_json('{"a": 1}') == ({"a": 1}, False)
+
+
+def test_fenced_output_with_trailing_comma():
+    assert repair_json('```json\n{"a": [1, 2,]}\n```') == ({"a": [1, 2]}, True)
+
+
+def test_prose_before_json_and_trailing_text():
+    assert repair_json('Sure! [1, 2] Hope this helps.') == ([1, 2], True)
+
+
+def test_truncated_output_keeps_complete_elements():
+    data, repaired = repair_json('{"questions": [{"q": "x"}, {"q": "y')
+    assert repaired
+    assert data == {"questions": [{"q": "x"}]}
+
+
+def test_brackets_inside_strings_are_ignored():
+    assert repair_json('{"a": "[not] {a} bracket", }') == ({"a": "[not] {a} bracket"}, True)
+
+
+@pytest.mark.parametrize("text", ["nothing here", '{"a": "unterminated', None])
+def test_unrepairable_output(text):
+    with pytest.raises(ValueError):
+        repair_json(text)
+    assert parse_model_json(text, default=[]) == []
@@ -0,0 +1,49 @@
+import sqlite3
+
+from leaderboard import Leaderboard, mask_email
+
+
+def test_mask_email():
+    assert mask_email("alice@example.com") == "al***@example.com"
+    assert mask_email("") == "***"
+
+
+def test_keeps_best_entry_per_user(tmp_path):
+    board = Leaderboard(str(tmp_path / "lb.db"), top_k=2)
+    board.submit("b", "u1", "al***@x.com", 3, 5, 60)
+    assert board.submit("b", "u1", "al***@x.com", 2, 5, 10)["score"] == 3
+    assert board.submit("b", "u1", "al***@x.com", 3, 5, 40)["time_taken"] == 40
+    board.submit("b", "u2", "bo***@x.com", 4, 5, 90)
+    board.submit("b", "u3", "ca***@x.com", 1, 5, 90)
+    assert [e["user_id"] for e in board.top("b")] == ["u2", "u1"]
+    assert board.size("b") == 3
+    assert board.rank("b", 3.5, 0) == 2
+    assert "email" not in board.top("b")[0]
+
+
+def test_migrates_email_keyed_entries(tmp_path):
+    path = str(tmp_path / "lb.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE entries (id INTEGER PRIMARY KEY, board TEXT NOT NULL, user TEXT NOT NULL, score REAL NOT NULL, "
+        "total INTEGER NOT NULL, time_taken REAL NOT NULL, created_at TEXT NOT NULL)"
+    )
+    conn.executemany(
+        "INSERT INTO entries (board, user, score, total, time_taken, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+        [("b", "alice@x.com", 2, 5, 10, "t"), ("b", "alice@x.com", 4, 5, 20, "t"), ("b", "bob@y.org", 3, 5, 15, "t")]
+    )
+    conn.commit()
+    conn.close()
+
+    board = Leaderboard(path)
+    assert [(e["display_name"], e["score"]) for e in board.top("b")] == [("al***@x.com", 4), ("bo***@y.org", 3)]
+    tables = {row[0] for row in sqlite3.connect(path).execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert tables == {"best_entries"}
+
+
+def test_rank_of_returned_entry_ignores_own_row(tmp_path):
+    board = Leaderboard(str(tmp_path / "lb.db"))
+    board.submit("b", "u1", "al***@x.com", 4, 5, 30)
+    # A worse retry still ranks the user's best entry, first of one
+    entry = board.submit("b", "u1", "al***@x.com", 2, 5, 90)
+    assert (board.rank("b", entry["score"], entry["time_taken"]), board.size("b")) == (1, 1)
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from storage import BATCH_LIMIT, BATCH_MAX_BYTES, SQLiteStorage, _write_batches, pack_artifact, unpack_artifact
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return SQLiteStorage(str(tmp_path / "storage.db"))
+
+
+@pytest.mark.parametrize("data", ["text ✓", b"\x00\x01bytes", {"nodes": [1, 2], "edges": []}])
+def test_pack_unpack_round_trip(data):
+    manifest, chunks = pack_artifact("kind", "name", data)
+    assert manifest["chunks"] == len(chunks)
+    assert unpack_artifact(manifest, iter(chunks)) == data
+
+
+def test_pack_splits_large_artifacts():
+    data = os.urandom(3 * 512 * 1024)
+    manifest, chunks = pack_artifact("kind", "name", data)
+    assert len(chunks) > 1
+    assert unpack_artifact(manifest, chunks) == data
+
+
+def test_write_batches_respect_count_and_bytes():
+    small = [(i, {"a": 1}) for i in range(BATCH_LIMIT * 2 + 1)]
+    assert [len(batch) for batch in _write_batches(small)] == [BATCH_LIMIT, BATCH_LIMIT, 1]
+    chunk = b"x" * (512 * 1024)
+    large = [(i, {"data": chunk}) for i in range(50)]
+    batches = list(_write_batches(large))
+    assert sum(len(batch) for batch in batches) == 50
+    assert all(sum(len(data["data"]) for _, data in batch) <= BATCH_MAX_BYTES for batch in batches)
+
+
+def test_starred_changes_upsert_and_delete(storage):
+    storage.apply_starred_changes("u1", {"t1": {"main_topic": "A"}, "t2": {"main_topic": "B"}})
+    storage.apply_starred_changes("u1", {"t1": {"main_topic": "A2"}, "t2": None})
+    assert storage.get_starred_topics("u1") == {"t1": {"main_topic": "A2"}}
+    assert storage.get_starred_topics("u2") == {}
+
+
+def test_mindmaps_newest_first(storage):
+    storage.save_mindmap("u1", "m1", {"saved_at": "2025-01-01", "data": "a"})
+    storage.save_mindmap("u1", "m2", {"saved_at": "2025-01-02", "data": "b"})
+    assert [m["id"] for m in storage.list_mindmaps("u1")] == ["m2", "m1"]
+    assert storage.list_mindmaps("u1", limit=1)[0]["data"] == "b"
+
+
+def test_attempts_newest_first(storage):
+    storage.append_attempt("u1", {"timestamp": "2025-01-01 10:00:00", "score": 1})
+    storage.append_attempt("u1", {"timestamp": "2025-01-02 10:00:00", "score": 2})
+    assert [a["score"] for a in storage.list_attempts("u1")] == [2, 1]
+    assert storage.list_attempts("u2") == []
+
+
+def test_starred_topics_keyset_pagination(storage):
+    changes = {f"t{i:02d}": {"main_topic": f"Topic {i}", "timestamp": f"2025-01-{i % 5 + 1:02d}"} for i in range(23)}
+    storage.apply_starred_changes("u1", changes)
+    seen, cursor = [], None
+    while True:
+        items, cursor = storage.starred_topics_page("u1", limit=5, cursor=cursor)
+        seen.extend(items)
+        if cursor is None:
+            break
+    assert sorted(item["topic_id"] for item in seen) == sorted(changes)
+    keys = [(item["timestamp"], item["topic_id"]) for item in seen]
+    assert keys == sorted(keys, reverse=True)
+
+    storage.apply_starred_changes("u1", {"t00": None})
+    assert "t00" not in storage.get_starred_topics("u1")
+
+
+def test_artifacts_are_deduplicated_and_user_scoped(storage):
+    manifest = storage.save_artifact("u1", "paper", "p1", {"questions": ["q"]})
+    assert storage.save_artifact("u1", "paper", "p1", {"questions": ["q"]})["artifact_id"] == manifest["artifact_id"]
+    assert [m["artifact_id"] for m in storage.list_artifacts("u1", "paper")] == [manifest["artifact_id"]]
+    assert storage.load_artifact("u1", manifest["artifact_id"]) == {"questions": ["q"]}
+    assert storage.load_artifact("u2", manifest["artifact_id"]) is None
+
+
+def test_iter_records_pages_through_everything(storage):
+    for i in range(7):
+        storage.save_mindmap("u1", f"m{i}", {"saved_at": f"2025-01-0{i + 1}"})
+    records = list(storage.iter_records("u1", "flowcharts", page_size=3))
+    assert [r["id"] for r in records] == [f"m{i}" for i in range(7)]
+
+
+def test_artifact_id_covers_kind_and_name(storage):
+    first = storage.save_artifact("u1", "paper", "p1", "same text")
+    renamed = storage.save_artifact("u1", "paper", "p2", "same text")
+    assert renamed["artifact_id"] != first["artifact_id"] and renamed["name"] == "p2"
+    assert len(storage.list_artifacts("u1")) == 2
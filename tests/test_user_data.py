@@ -0,0 +1,25 @@
+import os
+
+import user_data
+from storage import SQLiteStorage
+
+
+def test_user_data_round_trip(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "storage.db"))
+    storage.apply_starred_changes("u1", {"t1": {"main_topic": "A", "timestamp": "2025-01-01"}})
+    storage.save_mindmap("u1", "m1", {"saved_at": "2025-01-01", "data": "graph"})
+    storage.append_attempt("u2", {"timestamp": "2025-01-01 10:00:00", "score": 3})
+    manifest = storage.save_artifact("u2", "html", "page", os.urandom(600 * 1024))
+
+    records = list(user_data.export_records(storage, storage.list_user_ids(), page_size=2))
+    target = SQLiteStorage(str(tmp_path / "restored.db"))
+    assert user_data.import_records(target, records, batch_size=2) == len(records)
+
+    assert target.list_user_ids() == ["u1", "u2"]
+    assert target.get_starred_topics("u1") == storage.get_starred_topics("u1")
+    assert target.list_mindmaps("u1") == storage.list_mindmaps("u1")
+    assert target.list_attempts("u2") == storage.list_attempts("u2")
+    assert target.load_artifact("u2", manifest["artifact_id"]) == storage.load_artifact("u2", manifest["artifact_id"])
+    # Importing again overwrites by id
+    user_data.import_records(target, records)
+    assert len(list(target.iter_records("u2", "attempts"))) == 1
@@ -0,0 +1,47 @@
+import threading
+
+import write_queue
+from write_queue import WriteQueue
+
+
+def test_writes_once_per_key():
+    writes = []
+    queue = WriteQueue()
+    assert queue.submit("k1", lambda: writes.append(1))
+    assert queue.join(timeout=5)
+    assert queue.submit("k1", lambda: writes.append(2))
+    assert queue.join(timeout=5)
+    assert writes == [1]
+    assert queue.status("k1") == "done"
+    assert queue.status("unknown") is None
+
+
+def test_retries_then_fails(monkeypatch):
+    monkeypatch.setattr(write_queue, "BASE_BACKOFF", 0.0)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 2:
+            raise OSError("unavailable")
+
+    queue = WriteQueue(max_attempts=3)
+    queue.submit("flaky", flaky)
+    queue.submit("broken", lambda: 1 / 0)
+    assert queue.join(timeout=5)
+    assert len(calls) == 2
+    assert queue.status("flaky") == "done"
+    assert queue.status("broken") == "failed"
+
+
+def test_full_queue_rejects_without_blocking():
+    release = threading.Event()
+    queue = WriteQueue(max_queue=1)
+    queue.submit("blocker", release.wait)
+    # The worker may not have taken the first write yet, so fill until rejected
+    accepted = [queue.submit(f"k{i}", lambda: None) for i in range(3)]
+    assert accepted.count(False) >= 1
+    rejected = f"k{accepted.index(False)}"
+    assert queue.status(rejected) is None
+    release.set()
+    assert queue.join(timeout=5)
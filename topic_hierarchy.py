@@ -0,0 +1,97 @@
+import json
+import re
+import streamlit as st
+from model import get_output
+from json_repair import parse_model_json
+from artifact_cache import content_hash, get_artifact_cache
+
+# Both the topics page and the mind map only ever look at the start of the content
+CONTENT_LIMIT = 3000
+
+
+def _build_prompt(content):
+    return f"""
+    Identify the important main topics in the following content and the key points under each one.
+    Return ONLY a JSON object with this structure, no additional text or markdown:
+    {{
+        "topics": [
+            {{"topic": "Main Topic", "points": ["Key point 1", "Key point 2"]}}
+        ]
+    }}
+
+    Content:
+    {content[:CONTENT_LIMIT]}
+    """
+
+
+def _normalise(data):
+    """Coerce model output into [{"topic": str, "points": [str, ...]}, ...]"""
+    if isinstance(data, dict):
+        data = data.get("topics", [])
+    topics = []
+    for item in data if isinstance(data, list) else []:
+        if not isinstance(item, dict) or not str(item.get("topic", "")).strip():
+            continue
+        points = item.get("points", [])
+        topics.append({
+            "topic": str(item["topic"]).strip(),
+            "points": [str(p).strip() for p in points if str(p).strip()] if isinstance(points, list) else []
+        })
+    return topics
+
+
+def extract_topic_hierarchy(content, refresh=False):
+    """
+    Topic hierarchy for ``content``, extracted with one model call per content hash.
+
+    The result is kept in the shared artifact cache so the topics page and the mind map
+    (and every other session with the same document) reuse it.
+    """
+    content = content[:CONTENT_LIMIT]
+    key = content_hash(content)
+    cache = get_artifact_cache()
+    if not refresh:
+        cached = cache.get("topic_hierarchy", key)
+        if cached is not None:
+            return json.loads(cached)
+
+    topics = _normalise(parse_model_json(get_output(_build_prompt(content)), default=[]))
+    if topics:
+        cache.put("topic_hierarchy", key, json.dumps(topics))
+    else:
+        st.warning("Could not extract topics from the model output.")
+    return topics
+
+
+def to_topics_dict(topics):
+    """{main topic: [key points]} as used by the topics page"""
+    topics_dict = {}
+    for item in topics:
+        topics_dict.setdefault(item["topic"], []).extend(item["points"])
+    return topics_dict
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")[:40] or "topic"
+
+
+def to_mindmap_data(topics):
+    """Mind map nodes/edges (level 0 main topics, level 1 key points) derived locally"""
+    nodes, edges, used_ids = [], [], set()
+
+    def unique_id(base):
+        node_id, suffix = base, 2
+        while node_id in used_ids:
+            node_id = f"{base}_{suffix}"
+            suffix += 1
+        used_ids.add(node_id)
+        return node_id
+
+    for item in topics:
+        topic_id = unique_id(_slug(item["topic"]))
+        nodes.append({"id": topic_id, "label": item["topic"], "level": 0})
+        for point in item["points"]:
+            point_id = unique_id(f"{topic_id}_{_slug(point)}")
+            nodes.append({"id": point_id, "label": point, "level": 1})
+            edges.append({"from": topic_id, "to": point_id})
+    return {"nodes": nodes, "edges": edges}
@@ -0,0 +1,106 @@
+"""
+Bulk export and import of user data.
+
+Exports every per-user collection (starred topics, saved flowcharts, attempts and
+artifacts) of one user or all users from the configured storage backend into a gzipped
+NDJSON archive, one record per line::
+
+    {"user": "<uid>", "collection": "artifacts", "id": "...", "data": {...}, "chunks": ["<base64>"]}
+
+Reads are paginated (``Storage.iter_records``) and imports are written back in batches
+per user and collection (``Storage.write_records``), so neither side holds more than one
+page or batch in memory. Importing an archive is idempotent: records overwrite by id.
+
+    python user_data.py export backup.ndjson.gz [--user UID]
+    python user_data.py import backup.ndjson.gz [--user UID]
+"""
+import argparse
+import base64
+import gzip
+import json
+import sys
+import time
+from itertools import groupby
+
+from storage import BATCH_LIMIT, EXPORT_COLLECTIONS, get_storage
+
+
+def export_records(storage, user_ids, collections=EXPORT_COLLECTIONS, page_size=BATCH_LIMIT):
+    """Yield archive lines for the given users, collection by collection"""
+    for user_id in user_ids:
+        for collection in collections:
+            for record in storage.iter_records(user_id, collection, page_size):
+                line = {"user": user_id, "collection": collection, "id": record["id"], "data": record["data"]}
+                if "chunks" in record:
+                    line["chunks"] = [base64.b64encode(chunk).decode("ascii") for chunk in record["chunks"]]
+                yield line
+
+
+def read_archive(path, user_id=None):
+    """Yield archive lines, optionally only those of one user"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if user_id is None or record["user"] == user_id:
+                yield record
+
+
+def import_records(storage, records, batch_size=BATCH_LIMIT):
+    """Write archive lines back in batches per (user, collection); returns records written"""
+    written = 0
+    for (user_id, collection), group in groupby(records, key=lambda r: (r["user"], r["collection"])):
+        batch = []
+        for record in group:
+            item = {"id": record["id"], "data": record["data"]}
+            if "chunks" in record:
+                item["chunks"] = [base64.b64decode(chunk) for chunk in record["chunks"]]
+            batch.append(item)
+            if len(batch) >= batch_size:
+                storage.write_records(user_id, collection, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            storage.write_records(user_id, collection, batch)
+            written += len(batch)
+    return written
+
+
+def _report(action, count, path, elapsed):
+    size = 0
+    try:
+        with open(path, "rb") as f:
+            size = f.seek(0, 2)
+    except OSError:
+        pass
+    rate = count / elapsed if elapsed > 0 else 0
+    print(f"{action} {count} records ({size / 1024:.1f} KiB compressed) in {elapsed:.2f} s, "
+          f"{rate:.0f} records/s", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import user data as a gzipped NDJSON archive")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("archive", help="archive path (.ndjson.gz)")
+    parser.add_argument("--user", help="only this user id (default: all users)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_LIMIT, help="records per read page / write batch")
+    args = parser.parse_args()
+
+    storage = get_storage()
+    start = time.perf_counter()
+    if args.action == "export":
+        user_ids = [args.user] if args.user else storage.list_user_ids()
+        count = 0
+        with gzip.open(args.archive, "wt", encoding="utf-8") as f:
+            for line in export_records(storage, user_ids, page_size=args.batch_size):
+                f.write(json.dumps(line, separators=(",", ":"), default=str) + "\n")
+                count += 1
+        _report(f"Exported {len(user_ids)} user(s),", count, args.archive, time.perf_counter() - start)
+    else:
+        count = import_records(storage, read_archive(args.archive, args.user), args.batch_size)
+        _report("Imported", count, args.archive, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import streamlit as st
 import json
 from datetime import datetime
+from Intitialise import session_text
 
 def generate_prompt(num_mcq, num_3_marks, num_5_marks, difficulty_level, topics=None):
     prompt = f"Generate a comprehensive question paper with: "
@@ -14,9 +15,9 @@ def generate_prompt(num_mcq, num_3_marks, num_5_marks, difficulty_level, topics=
     
     # Use either the uploaded content or custom topic
     if st.session_state.uploaded_file:
-        prompt += f"\n\nBase the questions on this content:\n{st.session_state.file_content[:3000]}"  # Using first 3000 chars
-    elif st.session_state.custom_topic:
-        prompt += f"\n\nBase the questions on this topic: {st.session_state.custom_topic}"
+        prompt += f"\n\nBase the questions on this content:\n{session_text('file_content')[:3000]}"  # Using first 3000 chars
+    elif st.session_state.custom_topic_id:
+        prompt += f"\n\nBase the questions on this topic: {session_text('custom_topic')}"
     
     if topics:
         prompt += f'\nFocus specifically on these aspects: {", ".join(topics)}'
@@ -33,4 +34,73 @@ def load_templates():
 
 def save_templates(templates):
     with open("templates.json", "w") as f:
-        json.dump(templates, f)
\ No newline at end of file
+        json.dump(templates, f)
+
+def paper_source_content():
+    """Content the question paper is based on: uploaded text or the custom topic"""
+    if st.session_state.uploaded_file:
+        return session_text("file_content")[:3000]
+    return session_text("custom_topic")[:3000]
+
+def build_paper_json_prompt(missing, difficulty_level, content, topics=None):
+    prompt = "Generate exam questions with: "
+    for q_type, marks, count in missing:
+        if count > 0:
+            label = "MCQs (4 options each)" if q_type == "MCQ" else "descriptive questions"
+            prompt += f'{count} {label} with {marks} mark(s) each, '
+    prompt += f'Difficulty level: {difficulty_level}. '
+    prompt += f"\n\nBase the questions on this content:\n{content}"
+    if topics:
+        prompt += f'\nFocus specifically on these aspects, and set "topic" to exactly one of: {", ".join(topics)}'
+    prompt += """
+Return ONLY valid JSON with this structure:
+{
+    "questions": [
+        {"question": "...", "type": "MCQ", "topic": "...", "marks": 1, "options": ["A", "B", "C", "D"], "answer": "CorrectOption"},
+        {"question": "...", "type": "Descriptive", "topic": "...", "marks": 3, "answer": "Model answer"}
+    ]
+}"""
+    return prompt
+
+def format_question_paper(sections):
+    """Render [(title, questions)] as a numbered paper with mark allocations"""
+    lines = []
+    number = 1
+    for title, questions in sections:
+        if not questions:
+            continue
+        lines.append(f"{title}\n")
+        for q in questions:
+            lines.append(f"Q{number}. {q['question']} [{q.get('marks', 1)} mark(s)]")
+            for letter, option in zip("abcd", q.get("options", [])):
+                lines.append(f"    ({letter}) {option}")
+            lines.append("")
+            number += 1
+    return "\n".join(lines)
+
+def generate_question_paper(num_mcq, num_3_marks, num_5_marks, difficulty_level, topics=None):
+    """Assemble a question paper from the question bank, calling the model only to top up thin sections"""
+    from model import get_output
+    from Mock_test import parse_questions
+    from artifact_cache import content_hash
+    from question_bank import get_question_bank, parse_marks
+
+    content = paper_source_content()
+    key = content_hash(content)
+    bank = get_question_bank()
+    slots = [("MCQ", 1, num_mcq), ("Descriptive", 3, num_3_marks), ("Descriptive", 5, num_5_marks)]
+    missing = [
+        (q_type, marks, max(0, count - bank.count(key, q_type, difficulty_level, marks, topics)))
+        for q_type, marks, count in slots
+    ]
+    if any(count for _, _, count in missing):
+        questions = parse_questions(get_output(build_paper_json_prompt(missing, difficulty_level, content, topics)))
+        allowed_marks = {q_type: {m for t, m, _ in slots if t == q_type} for q_type, _, _ in slots}
+        questions = [q for q in questions if q["type"] in allowed_marks and parse_marks(q.get("marks"), q["type"]) in allowed_marks[q["type"]]]
+        bank.add_questions(questions, key, difficulty_level)
+
+    sections = [
+        (f"Section {section}: {count} x {marks} mark(s)", bank.draw(key, q_type, difficulty_level, count, marks, topics))
+        for section, (q_type, marks, count) in zip("ABC", slots)
+    ]
+    return format_question_paper(sections)
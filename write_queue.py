@@ -0,0 +1,108 @@
+"""
+Background write queue for remote storage.
+
+Writes are put on a bounded queue and performed by a worker thread with exponential
+backoff, so a slow or briefly unavailable Firestore never blocks a Streamlit render.
+Every write carries an idempotency key: the storage call must be an overwrite keyed by
+it, so a retry (or a second click on the same button) cannot create a duplicate, and a
+key that was already written successfully is not written again.
+"""
+import logging
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+MAX_QUEUE = 1000
+MAX_ATTEMPTS = 5
+BASE_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+# Completed keys remembered for deduplication and status lookups
+STATUS_HISTORY = 10000
+
+
+class WriteQueue:
+    def __init__(self, max_queue=MAX_QUEUE, max_attempts=MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._status = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="write-queue", daemon=True)
+        self._thread.start()
+
+    def _set_status(self, key, status):
+        with self._lock:
+            self._status[key] = status
+            self._status.move_to_end(key)
+            while len(self._status) > STATUS_HISTORY:
+                self._status.popitem(last=False)
+
+    def submit(self, key: str, write: Callable[[], None]) -> bool:
+        """Queue ``write()`` under idempotency ``key``; False if the queue is full"""
+        with self._lock:
+            previous = self._status.get(key)
+            if previous in ("pending", "done"):
+                return True
+            # Marked before queueing so the worker's "done" can't be overwritten
+            self._status[key] = "pending"
+            try:
+                self._queue.put_nowait((key, write))
+            except queue.Full:
+                if previous is None:
+                    del self._status[key]
+                else:
+                    self._status[key] = previous
+                return False
+        return True
+
+    def status(self, key: str):
+        """"pending", "done", "failed" or None for unknown keys"""
+        with self._lock:
+            return self._status.get(key)
+
+    def join(self, timeout=None) -> bool:
+        """Wait until the queue is drained; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _run(self):
+        while True:
+            key, write = self._queue.get()
+            try:
+                for attempt in range(1, self.max_attempts + 1):
+                    try:
+                        write()
+                        self._set_status(key, "done")
+                        break
+                    except Exception as e:
+                        if attempt == self.max_attempts:
+                            logger.error(f"Write {key} failed after {attempt} attempts: {e}")
+                            self._set_status(key, "failed")
+                            break
+                        # Exponential backoff with full jitter
+                        delay = random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2 ** (attempt - 1)))
+                        logger.warning(f"Write {key} failed (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                        time.sleep(delay)
+            finally:
+                self._queue.task_done()
+
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+
+def get_write_queue() -> WriteQueue:
+    """Process-wide background write queue"""
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is None:
+            _write_queue = WriteQueue()
+        return _write_queue